@@ -0,0 +1,282 @@
+"""Model service file.
+
+This module provides the model served by the API. The FastText model and the
+label encoder are loaded in a background thread at startup and warmed up on
+representative descriptions, so importing the API is cheap, a missing artifact
+does not crash the process, and readiness can be reported to an orchestrator.
+The similarity index of the training products is optional: when it is missing
+or does not match the model, the service is ready without it.
+"""
+
+import logging
+import threading
+import time
+
+from pathlib import Path
+
+import pandas as pd
+
+from pos_classifier.config.config import (
+    API_WARMUP_DATA_PATH,
+    API_WARMUP_SAMPLES,
+    FASTTEXT_MODEL_PATH,
+    LABEL_ENCODER_PATH,
+    SIMILARITY_N_PROBE,
+)
+from pos_classifier.data.data_loader import load_data
+from pos_classifier.data.postprocessing import (
+    decode_fasttext_labels,
+    decode_fasttext_top_k,
+    load_label_encoder,
+)
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.similarity_index import META_FILE, SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_DESCRIPTIONS = [
+    "Sparkling mineral water 1.5L",
+    "Orange juice not from concentrate",
+    "Basmati rice 1kg",
+    "Whole wheat penne pasta",
+    "Free range eggs dozen",
+    "Fresh atlantic salmon fillet",
+    "Mint toothpaste 75ml",
+    "Laundry detergent pods",
+    "Birthday candles pack",
+    "Gift card holder",
+]
+
+
+def load_warmup_descriptions(path=API_WARMUP_DATA_PATH, n_samples: int = 200):
+    """Read representative product descriptions for the warmup.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV file with a 'Product Description' column, e.g. the query data.
+    n_samples : int
+        Maximum number of descriptions to read.
+
+    Returns
+    -------
+    list[str]
+        Descriptions from the file, or built-in samples if it cannot be read.
+
+    """
+    try:
+        descriptions = load_data(path)["product_description"].dropna()
+        descriptions = descriptions.astype(str).head(n_samples).tolist()
+    except (FileNotFoundError, KeyError, pd.errors.ParserError) as e:
+        logger.info(f"Using built-in warmup descriptions: {e}")
+        descriptions = []
+    return descriptions or DEFAULT_WARMUP_DESCRIPTIONS
+
+
+class ModelService:
+    """Load, warm up and serve the FastText model and its label encoder."""
+
+    def __init__(
+        self,
+        model_path=FASTTEXT_MODEL_PATH,
+        label_encoder_path=LABEL_ENCODER_PATH,
+        warmup_samples: int = API_WARMUP_SAMPLES,
+        similarity_index_dir=None,
+        n_probe: int = SIMILARITY_N_PROBE,
+    ):
+        """Initialize the service without loading anything.
+
+        Parameters
+        ----------
+        model_path : str or Path
+            FastText model file.
+        label_encoder_path : str or Path
+            Label encoder file.
+        warmup_samples : int
+            Number of representative descriptions predicted before the service
+            reports ready; 0 disables the warmup.
+        similarity_index_dir : str or Path, optional
+            Directory of the similarity index of the model, loaded if it exists.
+        n_probe : int
+            Number of partitions scored per similarity query.
+
+        """
+        self.model = FastTextModelWrapper({"model_location": str(model_path)})
+        self.label_encoder_path = label_encoder_path
+        self.warmup_samples = warmup_samples
+        self.similarity_index_dir = similarity_index_dir
+        self.n_probe = n_probe
+        self.label_encoder = None
+        self.similarity_index = None
+        self.status = "starting"
+        self.error = None
+        self.timings = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Load and warm up the model in a background thread."""
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until loading and warmup succeeded or failed.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        bool
+            Whether the service is ready.
+
+        """
+        self._done.wait(timeout)
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        """Whether the model is loaded and warmed up."""
+        return self.status == "ready"
+
+    def _load(self):
+        try:
+            self.status = "loading"
+            start = time.perf_counter()
+            self.model.load_model()
+            self.label_encoder = load_label_encoder(self.label_encoder_path)
+            self.timings["load"] = time.perf_counter() - start
+            self.similarity_index = self._load_similarity_index()
+
+            if self.warmup_samples > 0:
+                self.status = "warming_up"
+                start = time.perf_counter()
+                self.warmup(load_warmup_descriptions(n_samples=self.warmup_samples))
+                self.timings["warmup"] = time.perf_counter() - start
+
+            self.status = "ready"
+            logger.info(f"Model ready: {self.timings}")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Model loading failed: {e}")
+        finally:
+            self._done.set()
+
+    def _load_similarity_index(self) -> SimilarityIndex | None:
+        if self.similarity_index_dir is None:
+            return None
+        if not (Path(self.similarity_index_dir) / META_FILE).exists():
+            logger.info(f"No similarity index in {self.similarity_index_dir}")
+            return None
+        try:
+            index = SimilarityIndex(self.similarity_index_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Similarity index loading failed: {e}")
+            return None
+        if index.dimension != self.model.model.get_dimension():
+            logger.warning(
+                f"Ignoring similarity index of dimension {index.dimension}, "
+                f"the model has dimension {self.model.model.get_dimension()}"
+            )
+            return None
+        logger.info(f"Similarity index loaded: {index.meta}")
+        return index
+
+    def warmup(self, descriptions: list[str]):
+        """Run single and batched predictions through the full request path.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Representative product descriptions.
+
+        """
+        for description in descriptions:
+            self.predict(description)
+        self.predict_batch(descriptions)
+
+    def predict(self, description: str) -> tuple[str, float]:
+        """Predict the category of one raw product description.
+
+        Parameters
+        ----------
+        description : str
+            Raw product description.
+
+        Returns
+        -------
+        tuple[str, float]
+            Predicted category and its probability.
+
+        """
+        labels, probabilities = self.model.predict(description)
+        category = decode_fasttext_labels([labels], self.label_encoder)[0]
+        return category, float(probabilities[0])
+
+    def predict_batch(self, descriptions: list[str]) -> tuple[list[str], list[float]]:
+        """Predict the categories of raw product descriptions in one call.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Raw product descriptions.
+
+        Returns
+        -------
+        tuple[list[str], list[float]]
+            Predicted category and probability per description.
+
+        """
+        labels, probabilities = self.model.predict_batch(descriptions)
+        categories = decode_fasttext_labels(labels, self.label_encoder)
+        return categories.tolist(), [float(p[0]) for p in probabilities]
+
+    def predict_top_k(self, descriptions: list[str], k: int) -> pd.DataFrame:
+        """Predict the top-k categories of raw product descriptions in one call.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Raw product descriptions.
+        k : int
+            Number of categories per description.
+
+        Returns
+        -------
+        pd.DataFrame
+            'predicted_category', 'probability' and the 'top<i>_category' and
+            'top<i>_probability' columns per description.
+
+        """
+        labels, probabilities = self.model.predict_batch(descriptions, k=k)
+        return decode_fasttext_top_k(labels, probabilities, self.label_encoder, k)
+
+    def similar(self, descriptions: list[str], k: int) -> list[pd.DataFrame]:
+        """Find the most similar training products of raw product descriptions.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Raw product descriptions.
+        k : int
+            Number of training products per description.
+
+        Returns
+        -------
+        list[pd.DataFrame]
+            Per description, 'product_description', 'category' and 'similarity'
+            of the closest training products, best first.
+
+        """
+        queries = self.model.sentence_vectors(descriptions)
+        return self.similarity_index.neighbours(queries, k, self.n_probe)
+
+    def health(self) -> dict:
+        """Return the loading status, error and timings of the service."""
+        health = {"status": self.status, "error": self.error, "timings": self.timings}
+        if self.similarity_index is not None:
+            health["similarity_index"] = self.similarity_index.meta
+        return health
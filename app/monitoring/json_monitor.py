@@ -16,6 +16,18 @@ def update_monitoring_json(key: str):
     key : str
        The key in the monitoring JSON to increment
 
+    """
+    update_monitoring_counts({key: 1})
+
+
+def update_monitoring_counts(counts: dict[str, int]):
+    """Add a batch of counts to the monitoring counters in one file update.
+
+    Parameters
+    ----------
+    counts : dict[str, int]
+        Increment per key of the monitoring JSON
+
     """
     try:
         with open(MONITORING_PATH) as f:
@@ -23,8 +35,8 @@ def update_monitoring_json(key: str):
     except (FileNotFoundError, json.JSONDecodeError):
         data = {}
 
-    current_value = data.get(key, 0)
-    data[key] = current_value + 1
+    for key, count in counts.items():
+        data[key] = data.get(key, 0) + count
 
     with open(MONITORING_PATH, "w") as f:
         json.dump(data, f, indent=4)
@@ -39,6 +51,20 @@ def update_prediction_time(time):
         Duration of the current request in seconds.
 
     """
+    update_prediction_times([time])
+
+
+def update_prediction_times(times):
+    """Update request timing statistics with a batch of durations in one file update.
+
+    Parameters
+    ----------
+    times : list[float]
+        Duration of every request in seconds.
+
+    """
+    if not times:
+        return
     try:
         with open(MONITORING_PATH) as f:
             data = json.load(f)
@@ -49,9 +75,9 @@ def update_prediction_time(time):
     total_time = data.get("total_time", 0.0)
     max_time = data.get("max_time", 0.0)
 
-    total_requests += 1
-    total_time += time
-    max_time = max(max_time, time)
+    total_requests += len(times)
+    total_time += sum(times)
+    max_time = max(max_time, max(times))
 
     avg_time = total_time / total_requests if total_requests > 0 else 0.0
 
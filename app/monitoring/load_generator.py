@@ -0,0 +1,150 @@
+"""Load generator file.
+
+This module provides a local harness for the live metrics feed. It either sends
+`/predict` requests to a running API or serves a simulated metrics stream, so
+the dashboard can be exercised without a trained model.
+
+Send load to a running API:
+    python app/monitoring/load_generator.py load --url http://127.0.0.1:8000 --rps 50
+
+Serve a simulated stream on ws://127.0.0.1:8765/ws/metrics:
+    python app/monitoring/load_generator.py simulate --port 8765 --rps 200
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+
+import uvicorn
+from fastapi import FastAPI, WebSocket
+
+from pos_classifier.config.logging_config import setup_logging
+from pos_classifier.monitoring.metrics_stream import (
+    MetricsAggregator,
+    MetricsBroadcaster,
+)
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_DESCRIPTIONS = {
+    "Beverages": ["Sparkling mineral water 1.5L", "Orange juice not from concentrate"],
+    "Dry Goods & Pantry Staples": ["Basmati rice 1kg", "Whole wheat penne pasta"],
+    "Fresh & Perishable Items": [
+        "Free range eggs dozen",
+        "Fresh atlantic salmon fillet",
+    ],
+    "Household & Personal Care": ["Mint toothpaste 75ml", "Laundry detergent pods"],
+    "Specialty & Miscellaneous": ["Birthday candles pack", "Gift card holder"],
+}
+
+
+def send_load(url: str, rps: float, duration: float, concurrency: int = 8):
+    """Send `/predict` requests with random product descriptions at a target rate.
+
+    Parameters
+    ----------
+    url : str
+        Base URL of the API, e.g. 'http://127.0.0.1:8000'.
+    rps : float
+        Target number of requests per second.
+    duration : float
+        Number of seconds to send requests for.
+    concurrency : int
+        Maximum number of requests in flight.
+
+    """
+    descriptions = [d for texts in SAMPLE_DESCRIPTIONS.values() for d in texts]
+
+    def post():
+        body = json.dumps({"product_description": random.choice(descriptions)})
+        request = urllib.request.Request(
+            f"{url}/predict",
+            data=body.encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except Exception as e:
+            logger.warning(f"Request failed: {e}")
+
+    sent = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while (elapsed := time.perf_counter() - start) < duration:
+            if sent < elapsed * rps:
+                executor.submit(post)
+                sent += 1
+            else:
+                time.sleep(1 / rps)
+    logger.info(f"Sent {sent} requests in {duration}s.")
+
+
+def simulate_stream(port: int, rps: float, interval: float = 1.0):
+    """Serve a metrics stream fed by simulated predictions.
+
+    Parameters
+    ----------
+    port : int
+        Port to serve '/ws/metrics' on.
+    rps : float
+        Number of simulated predictions per second.
+    interval : float
+        Number of seconds between two pushed deltas.
+
+    """
+    aggregator = MetricsAggregator(worker_id=f"simulated:{port}")
+    broadcaster = MetricsBroadcaster(aggregator, interval)
+    categories = list(SAMPLE_DESCRIPTIONS)
+
+    def produce():
+        while True:
+            aggregator.record(
+                random.choice(categories),
+                random.lognormvariate(-6, 0.8),
+                random.random() < 0.9 if random.random() < 0.2 else None,
+            )
+            time.sleep(1 / rps)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    app = FastAPI()
+
+    @app.websocket("/ws/metrics")
+    async def metrics_stream(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            await broadcaster.serve(websocket)
+        except Exception:
+            logger.info("Metrics stream subscriber disconnected.")
+
+    logger.info(f"Serving simulated metrics on ws://127.0.0.1:{port}/ws/metrics")
+    uvicorn.run(app, host="127.0.0.1", port=port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    load_parser = subparsers.add_parser("load", help="Send /predict requests.")
+    load_parser.add_argument("--url", default="http://127.0.0.1:8000")
+    load_parser.add_argument("--rps", type=float, default=20.0)
+    load_parser.add_argument("--duration", type=float, default=60.0)
+
+    simulate_parser = subparsers.add_parser("simulate", help="Serve a fake stream.")
+    simulate_parser.add_argument("--port", type=int, default=8765)
+    simulate_parser.add_argument("--rps", type=float, default=100.0)
+
+    args = parser.parse_args()
+    if args.mode == "load":
+        send_load(args.url, args.rps, args.duration)
+    else:
+        simulate_stream(args.port, args.rps)
@@ -7,10 +7,19 @@ import streamlit as st
 import pandas as pd
 import json
 import os
+import time
 
 from streamlit_autorefresh import st_autorefresh
 
-from pos_classifier.config.config import MONITORING_PATH
+from pos_classifier.monitoring.drift import (
+    FEATURES,
+    drift_scores,
+    load_reference,
+    merge_sketches,
+)
+from pos_classifier.monitoring.metrics_store import MetricsStore
+from pos_classifier.monitoring.metrics_stream import MetricsFeed, latency_percentile
+from pos_classifier.config.config import MONITORING_PATH, METRICS_STREAM_URLS
 
 CATEGORIES = [
     "Beverages",
@@ -20,6 +29,30 @@ CATEGORIES = [
     "Specialty & Miscellaneous",
 ]
 
+WINDOWS_MINUTES = [15, 60, 360]
+
+EVENT_COLUMNS = ["id", "ts", "category", "latency", "correct"]
+ROLLUP_COLUMNS = [
+    "minute",
+    "category",
+    "count",
+    "total_latency",
+    "max_latency",
+    "labeled",
+    "correct",
+]
+SHADOW_ROLLUP_COLUMNS = [
+    "minute",
+    "category",
+    "count",
+    "agreed",
+    "total_latency",
+    "candidate_total_latency",
+    "candidate_max_latency",
+]
+
+DRIFT_SKETCH_COLUMNS = ["minute", "feature", "key", "count"]
+
 
 def load_monitoring_data():
     """Load monitoring data from the JSON file.
@@ -98,24 +131,366 @@ def display_request_time(data):
     cols_time[2].metric("Total Request Time (s)", data.get("total_time", 0.0))
 
 
-def reset_monitoring_data():
-    """Delete the monitoring JSON file to reset all metrics."""
+@st.cache_resource
+def get_metrics_store():
+    """Open the time-windowed metrics store once per dashboard process.
+
+    Returns
+    -------
+    MetricsStore
+        Store shared by all dashboard sessions.
+
+    """
+    return MetricsStore()
+
+
+def refresh_window_data(store, window_minutes):
+    """Read only events and rollups written since the previous refresh.
+
+    New rows are appended to the DataFrames kept in the session state and rows
+    that fell out of the selected window are dropped, so each refresh costs
+    proportionally to the new data instead of the whole history.
+
+    Parameters
+    ----------
+    store : MetricsStore
+        Metrics store to read from.
+    window_minutes : int
+        Length of the displayed time window in minutes.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, pd.DataFrame]
+        Raw events and per-minute rollups within the window.
+
+    """
+    state = st.session_state
+    if state.get("window_minutes") != window_minutes:
+        state.window_minutes = window_minutes
+        state.events = pd.DataFrame(columns=EVENT_COLUMNS)
+        state.rollups = pd.DataFrame(columns=ROLLUP_COLUMNS)
+        state.last_event_id = 0
+        state.last_minute = 0
+
+    window_start = time.time() - window_minutes * 60
+    first_minute = int(window_start // 60)
+
+    new_events = pd.DataFrame(
+        store.fetch_events(after_id=state.last_event_id, since=window_start),
+        columns=EVENT_COLUMNS,
+    )
+    if not new_events.empty:
+        state.last_event_id = int(new_events["id"].iloc[-1])
+        state.events = pd.concat([state.events, new_events], ignore_index=True)
+    state.events = state.events[state.events["ts"] >= window_start]
+
+    since_minute = max(state.last_minute, first_minute)
+    new_rollups = pd.DataFrame(
+        store.fetch_rollups(since_minute=since_minute), columns=ROLLUP_COLUMNS
+    )
+    rollups = state.rollups[state.rollups["minute"] < since_minute]
+    if not new_rollups.empty:
+        state.last_minute = int(new_rollups["minute"].max())
+        rollups = pd.concat([rollups, new_rollups], ignore_index=True)
+    state.rollups = rollups[rollups["minute"] >= first_minute]
+
+    return state.events, state.rollups
+
+
+def display_throughput(rollups):
+    """Display the number of predictions per minute.
+
+    Parameters
+    ----------
+    rollups : pd.DataFrame
+        Per-minute rollups within the selected window.
+
+    """
+    st.markdown("Throughput (predictions / min)")
+    if rollups.empty:
+        st.info("No predictions in the selected window.")
+        return
+    throughput = rollups.groupby("minute")["count"].sum()
+    throughput.index = pd.to_datetime(throughput.index * 60, unit="s")
+    st.line_chart(throughput)
+
+
+def display_latency_percentiles(events):
+    """Display p50, p95 and p99 prediction latency per minute.
+
+    Parameters
+    ----------
+    events : pd.DataFrame
+        Raw events within the selected window.
+
+    """
+    st.markdown("Latency percentiles (s)")
+    if events.empty:
+        st.info("No predictions in the selected window.")
+        return
+    minutes = pd.to_datetime((events["ts"] // 60) * 60, unit="s")
+    percentiles = (
+        events["latency"]
+        .astype(float)
+        .groupby(minutes)
+        .quantile([0.5, 0.95, 0.99])
+        .unstack()
+        .rename(columns={0.5: "p50", 0.95: "p95", 0.99: "p99"})
+    )
+    st.line_chart(percentiles)
+
+
+def display_class_distribution(rollups):
+    """Display the share of each predicted category per minute.
+
+    Parameters
+    ----------
+    rollups : pd.DataFrame
+        Per-minute rollups within the selected window.
+
+    """
+    st.markdown("Class distribution over time")
+    if rollups.empty:
+        st.info("No predictions in the selected window.")
+        return
+    counts = rollups.pivot_table(
+        index="minute", columns="category", values="count", aggfunc="sum"
+    ).fillna(0)
+    shares = counts.div(counts.sum(axis=1), axis=0)
+    shares.index = pd.to_datetime(shares.index * 60, unit="s")
+    st.area_chart(shares)
+
+
+def display_shadow_comparison(store, window_minutes):
+    """Display the agreement and latency of the candidate model with the primary one.
+
+    Parameters
+    ----------
+    store : MetricsStore
+        Metrics store to read from.
+    window_minutes : int
+        Length of the displayed time window in minutes.
+
+    """
+    first_minute = int((time.time() - window_minutes * 60) // 60)
+    rollups = pd.DataFrame(
+        store.fetch_shadow_rollups(since_minute=first_minute),
+        columns=SHADOW_ROLLUP_COLUMNS,
+    )
+    if rollups.empty:
+        return
+    st.subheader("Shadow Candidate Model")
+    count = rollups["count"].sum()
+    cols = st.columns(4)
+    cols[0].metric("Compared predictions", int(count))
+    cols[1].metric("Agreement (%)", round(rollups["agreed"].sum() / count * 100, 2))
+    cols[2].metric(
+        "Avg. primary latency (ms)",
+        round(rollups["total_latency"].sum() / count * 1000, 3),
+    )
+    cols[3].metric(
+        "Avg. candidate latency (ms)",
+        round(rollups["candidate_total_latency"].sum() / count * 1000, 3),
+    )
+    per_category = rollups.groupby("category")[["count", "agreed"]].sum()
+    st.markdown("Agreement per primary category")
+    st.bar_chart(per_category["agreed"] / per_category["count"])
+
+
+def display_drift(store, window_minutes):
+    """Display drift scores of the window against the training-time reference.
+
+    Scores are computed from the per-minute drift sketches, so raw predictions
+    are never read.
+
+    Parameters
+    ----------
+    store : MetricsStore
+        Metrics store to read from.
+    window_minutes : int
+        Length of the displayed time window in minutes.
+
+    """
+    st.subheader("Drift")
+    reference = load_reference()
+    if reference is None:
+        st.info("No drift reference, train the model with drift.reference_rows set.")
+        return
+    first_minute = int((time.time() - window_minutes * 60) // 60)
+    sketches = pd.DataFrame(
+        store.fetch_drift_sketches(since_minute=first_minute),
+        columns=DRIFT_SKETCH_COLUMNS,
+    )
+    if sketches.empty:
+        st.info("No predictions in the selected window.")
+        return
+
+    rows = sketches[["feature", "key", "count"]].itertuples(index=False)
+    scores = drift_scores(reference, merge_sketches(rows))
+    st.caption(
+        f"Reference: {reference['rows']} training descriptions, {reference['created']}. "
+        "PSI below 0.1 is usually read as stable and above 0.25 as drifted."
+    )
+    cols = st.columns(len(FEATURES))
+    for col, feature in zip(cols, FEATURES):
+        if feature in scores:
+            col.metric(
+                f"PSI {feature}",
+                round(scores[feature]["psi"], 4),
+                help=f"KL divergence: {scores[feature]['kl']:.4f}",
+            )
+
+    per_minute = {
+        minute: drift_scores(
+            reference,
+            merge_sketches(group[["feature", "key", "count"]].itertuples(index=False)),
+        )
+        for minute, group in sketches.groupby("minute")
+    }
+    trend = pd.DataFrame(
+        {
+            feature: {
+                minute: minute_scores[feature]["psi"]
+                for minute, minute_scores in per_minute.items()
+                if feature in minute_scores
+            }
+            for feature in FEATURES
+        }
+    )
+    trend.index = pd.to_datetime(trend.index * 60, unit="s")
+    categories = sketches[sketches["feature"] == "category"]
+    window_shares = categories.groupby("key")["count"].sum()
+    expected = pd.Series(reference["sketch"]["category"], dtype=float)
+    shares = pd.DataFrame(
+        {
+            "reference": expected / expected.sum(),
+            "window": window_shares / window_shares.sum(),
+        }
+    ).fillna(0)
+
+    cols = st.columns(2)
+    with cols[0]:
+        st.markdown("PSI per minute")
+        st.line_chart(trend)
+    with cols[1]:
+        st.markdown("Predicted class share, reference versus window")
+        st.bar_chart(shares)
+
+
+@st.cache_resource
+def get_metrics_feed():
+    """Subscribe once per dashboard process to the configured API metrics streams.
+
+    Returns
+    -------
+    MetricsFeed
+        Started feed merging the deltas of all configured workers.
+
+    """
+    return MetricsFeed(METRICS_STREAM_URLS).start()
+
+
+def display_live_feed(feed):
+    """Display per-second throughput and latency pushed by the API workers.
+
+    Parameters
+    ----------
+    feed : MetricsFeed
+        Feed subscribed to the API metrics streams.
+
+    """
+    st.subheader("Live Feed")
+    st.caption(f"Workers: {', '.join(feed.workers()) or 'waiting for first delta'}")
+    deltas = feed.recent()
+    if not deltas:
+        st.info("No metrics received yet.")
+        return
+
+    seconds = {}
+    for delta in deltas:
+        second = int(delta["ts"])
+        requests, histogram = seconds.get(second, (0, None))
+        if histogram is None:
+            histogram = [0] * len(delta["latency_histogram"])
+        histogram = [a + b for a, b in zip(histogram, delta["latency_histogram"])]
+        seconds[second] = (requests + delta["requests"], histogram)
+
+    live = pd.DataFrame(
+        [
+            {
+                "time": pd.to_datetime(second, unit="s"),
+                "requests": requests,
+                "p50": latency_percentile(histogram, 0.5),
+                "p95": latency_percentile(histogram, 0.95),
+            }
+            for second, (requests, histogram) in sorted(seconds.items())
+        ]
+    ).set_index("time")
+
+    cols = st.columns(2)
+    with cols[0]:
+        st.markdown("Requests per second")
+        st.line_chart(live["requests"])
+    with cols[1]:
+        st.markdown("Latency percentiles (s, bucketed)")
+        st.line_chart(live[["p50", "p95"]])
+
+
+def reset_monitoring_data(store, feed=None):
+    """Delete the monitoring JSON file and the time-windowed store to reset all metrics.
+
+    Parameters
+    ----------
+    store : MetricsStore
+        Metrics store to clear.
+    feed : MetricsFeed, optional
+        Live feed whose merged totals are cleared as well.
+
+    """
     if os.path.exists(MONITORING_PATH):
         os.remove(MONITORING_PATH)
-    st.success("Metrics file removed.")
+    store.reset()
+    if feed:
+        feed.reset()
+    st.session_state.pop("window_minutes", None)
+    st.success("Metrics removed.")
 
 
 st.set_page_config(page_title="Real-Time Monitoring", layout="wide")
 st.title("Real-Time Product Category Monitoring")
 
-st_autorefresh(interval=5000, limit=None, key="data_refresh")
+st_autorefresh(
+    interval=1000 if METRICS_STREAM_URLS else 5000, limit=None, key="data_refresh"
+)
+
+metrics_store = get_metrics_store()
+metrics_feed = get_metrics_feed() if METRICS_STREAM_URLS else None
 
 if st.button("Reset Metrics"):
-    reset_monitoring_data()
+    reset_monitoring_data(metrics_store, metrics_feed)
 
-monitoring_data = load_monitoring_data()
+if metrics_feed:
+    display_live_feed(metrics_feed)
+    st.markdown("---")
+
+monitoring_data = metrics_feed.totals() if metrics_feed else load_monitoring_data()
 display_category_counters(monitoring_data)
 st.markdown("---")
 display_prediction_metrics(monitoring_data)
 st.markdown("---")
 display_request_time(monitoring_data)
+st.markdown("---")
+
+st.subheader("Time-Windowed Metrics")
+window = st.selectbox(
+    "Window (minutes)", WINDOWS_MINUTES, index=1, key="window_selector"
+)
+window_events, window_rollups = refresh_window_data(metrics_store, window)
+display_throughput(window_rollups)
+cols_window = st.columns(2)
+with cols_window[0]:
+    display_latency_percentiles(window_events)
+with cols_window[1]:
+    display_class_distribution(window_rollups)
+display_drift(metrics_store, window)
+display_shadow_comparison(metrics_store, window)
@@ -8,30 +8,108 @@ import logging
 import time
 import os
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from pydantic import BaseModel
+from collections import Counter
+from contextlib import asynccontextmanager
 
-from app.monitoring.json_monitor import update_monitoring_json, update_prediction_time
-from pos_classifier.data.postprocessing import decode_fasttext_label
+from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from app.model_service import ModelService
+from app.shadow_scorer import ShadowScorer
+from app.monitoring.json_monitor import (
+    update_monitoring_counts,
+    update_prediction_times,
+)
+from pos_classifier.data.feedback_store import FeedbackStore
+from pos_classifier.data.prediction_writer import OUTPUT_FORMATS, PredictionWriter
+from pos_classifier.monitoring.drift import sketch_batch, sketch_prediction
+from pos_classifier.monitoring.metrics_store import MetricsStore
+from pos_classifier.monitoring.metrics_stream import (
+    DeltaLog,
+    MetricsAggregator,
+    MetricsBroadcaster,
+)
+from pos_classifier.monitoring.profiling import (
+    ProfilingMiddleware,
+    RequestProfiler,
+    profile_endpoint,
+)
 from pos_classifier.config.config import (
+    API_PROFILING,
+    API_PROFILING_SAMPLE_RATE,
+    CANDIDATE_LABEL_ENCODER_PATH,
+    CANDIDATE_MODEL_PATH,
     get_prediction_output_path,
-    FASTTEXT_MODEL_PATH,
+    METRICS_DB_PATH,
+    METRICS_STREAM_INTERVAL,
     OUTPUT_DIR,
+    PREDICTION_OUTPUT_FORMAT,
+    PREDICTION_ROW_GROUP_SIZE,
+    PREDICTION_TOP_K,
+    SHADOW_MAX_PENDING,
+    SHADOW_SAMPLE_RATE,
+    SIMILARITY_INDEX_DIR,
 )
 from pos_classifier.config.logging_config import setup_logging
-from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
-
-from src.pos_classifier.data.preprocessing import clean_text
 
 setup_logging()
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+model_service = ModelService(similarity_index_dir=SIMILARITY_INDEX_DIR)
+metrics_aggregator = MetricsAggregator()
+request_profiler = (
+    RequestProfiler(sample_rate=API_PROFILING_SAMPLE_RATE) if API_PROFILING else None
+)
+# Opened by the lifespan, so importing the app creates no database files.
+# Stores assigned before startup, e.g. by tests, are kept.
+metrics_store: MetricsStore | None = None
+feedback_store: FeedbackStore | None = None
+metrics_broadcaster: MetricsBroadcaster | None = None
+shadow_scorer: ShadowScorer | None = None
+
 
-params = {"model_location": str(FASTTEXT_MODEL_PATH)}
-fasttext_model = FastTextModelWrapper(params)
-fasttext_model.load_model()
+def open_stores():
+    """Create the stores and the shadow scorer that were not set before startup."""
+    global metrics_store, feedback_store, metrics_broadcaster, shadow_scorer
+    if metrics_store is None:
+        metrics_store = MetricsStore()
+    if feedback_store is None:
+        feedback_store = FeedbackStore()
+    if metrics_broadcaster is None:
+        # Workers of this host relay each other's deltas through the metrics database.
+        metrics_broadcaster = MetricsBroadcaster(
+            metrics_aggregator, METRICS_STREAM_INTERVAL, DeltaLog(METRICS_DB_PATH)
+        )
+    if shadow_scorer is None and CANDIDATE_MODEL_PATH:
+        shadow_scorer = ShadowScorer(
+            ModelService(CANDIDATE_MODEL_PATH, CANDIDATE_LABEL_ENCODER_PATH),
+            metrics_store,
+            SHADOW_SAMPLE_RATE,
+            SHADOW_MAX_PENDING,
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the stores, load and warm up the models and start the metrics stream."""
+    open_stores()
+    model_service.start()
+    metrics_store.start()
+    metrics_broadcaster.start()
+    if shadow_scorer is not None:
+        shadow_scorer.start()
+    yield
+    await metrics_broadcaster.stop()
+    if shadow_scorer is not None:
+        shadow_scorer.close()
+    metrics_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
+if request_profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
 
 
 class ProductInput(BaseModel):
@@ -45,25 +123,149 @@ class ProductInput(BaseModel):
     product_description: str
 
 
+class SimilarInput(BaseModel):
+    """Input model for similar product lookups.
+
+    Attributes:
+        product_description (str): A description of the product.
+        k (int, optional): Number of similar training products returned.
+
+    """
+
+    product_description: str
+    k: int = Field(default=5, ge=1, le=100)
+
+
+class ProfilingSettings(BaseModel):
+    """Input model for the request profiling toggle.
+
+    Attributes:
+        enabled (bool, optional): Whether requests are profiled at all.
+        sample_rate (float, optional): Share of requests profiled at random.
+
+    """
+
+    enabled: bool | None = None
+    sample_rate: float | None = Field(default=None, ge=0.0, le=1.0)
+
+
+def require_model() -> ModelService:
+    """Return the model service, or fail with 503 until it is ready."""
+    if not model_service.ready:
+        raise HTTPException(
+            status_code=503, detail=f"Model is not ready: {model_service.status}"
+        )
+    return model_service
+
+
+@app.get("/healthz")
+def healthz():
+    """Report that the process is alive, with the model loading status."""
+    health = model_service.health()
+    if shadow_scorer is not None:
+        health["candidate"] = shadow_scorer.health()
+    return health
+
+
+@app.get("/readyz")
+def readyz():
+    """Report ready only once the model is loaded and warmed up."""
+    status_code = 200 if model_service.ready else 503
+    return JSONResponse(model_service.health(), status_code=status_code)
+
+
+def require_profiler() -> RequestProfiler:
+    """Return the request profiler, or fail with 404 if profiling is not installed."""
+    if request_profiler is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Request profiling is disabled, start the API with API_PROFILING=true.",
+        )
+    return request_profiler
+
+
+@app.get("/admin/profiling")
+def get_profiling():
+    """Report the profiling toggle, sampling rate and stored profiles."""
+    return require_profiler().settings()
+
+
+@app.put("/admin/profiling")
+def set_profiling(settings: ProfilingSettings):
+    """Switch request profiling on or off and change its sampling rate."""
+    profiler = require_profiler()
+    if settings.enabled is not None:
+        profiler.enabled = settings.enabled
+    if settings.sample_rate is not None:
+        profiler.sample_rate = settings.sample_rate
+    logger.info(f"Request profiling settings changed: {profiler.settings()}")
+    return profiler.settings()
+
+
 @app.post("/predict")
+@profile_endpoint(API_PROFILING)
 def get_prediction(data: ProductInput):
     """Get a category prediction for a given product description."""
     logger.info(
         f"Received prediction request for product description: {data.product_description}"
     )
 
-    label, probability = fasttext_model.predict(clean_text(data.product_description))
-    category = decode_fasttext_label(label)
+    service = require_model()
+    start_time = time.perf_counter()
+    category, probability = service.predict(data.product_description)
+    elapsed = time.perf_counter() - start_time
+    metrics_store.record(category, elapsed)
+    metrics_store.record_sketch(
+        sketch_prediction(category, probability, data.product_description)
+    )
+    metrics_aggregator.record(category, elapsed)
+    if shadow_scorer is not None:
+        shadow_scorer.submit([data.product_description], [category], [elapsed])
+
+    logger.info(f"Prediction result: {category} with probability: {probability}")
+
+    return {"prediction": category, "probability": probability}
+
 
-    logger.info(f"Prediction result: {category} with probability: {probability[0]}")
+@app.post("/similar")
+@profile_endpoint(API_PROFILING)
+def get_similar(data: SimilarInput):
+    """Get the training products most similar to a product description."""
+    service = require_model()
+    if service.similarity_index is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Similarity index is not available, build it with "
+            "similarity.build_index in params.yaml.",
+        )
+    neighbours = service.similar([data.product_description], data.k)[0]
+    return {"neighbours": neighbours.to_dict(orient="records")}
 
-    return {"prediction": category, "probability": probability[0]}
+
+def predict_row_group(
+    service: ModelService, descriptions: pd.Series
+) -> tuple[pd.DataFrame, float]:
+    """Score one row group in a single call, with its top-k columns if configured.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, float]
+        Output rows of the group and the prediction time per row in seconds.
+
+    """
+    start_time = time.perf_counter()
+    group = service.predict_top_k(descriptions.tolist(), PREDICTION_TOP_K)
+    elapsed = (time.perf_counter() - start_time) / len(descriptions)
+    group.insert(0, "product_description", descriptions.to_numpy())
+    return group, elapsed
 
 
 @app.post("/predict_batch")
+@profile_endpoint(API_PROFILING)
 async def batch_prediction(file: UploadFile = File(...)):
     """Handle batch prediction requests from a CSV file."""
     logger.info(f"Received batch prediction request with file: {file.filename}")
+    service = require_model()
 
     if not file.filename.endswith(".csv"):
         logger.error("Invalid file format received. Only CSV files are supported.")
@@ -79,50 +281,98 @@ async def batch_prediction(file: UploadFile = File(...)):
                 status_code=400, detail="Missing 'product_description' column in CSV."
             )
 
+        # Blank descriptions are scored, sketched and shadowed as empty text,
+        # like the training sample of the drift reference.
+        descriptions = df["product_description"].fillna("").astype(str)
         has_labels = "HUMAN_VERIFIED_Category" in df.columns
         correct_predictions = 0
         total_predictions = 0
 
-        results = []
-        for _, row in df.iterrows():
-            start_time = time.perf_counter()
-            label, probability = fasttext_model.predict(
-                clean_text(row["product_description"])
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        output_path = get_prediction_output_path(
+            OUTPUT_FORMATS[PREDICTION_OUTPUT_FORMAT]
+        )
+        predicted_categories = []
+        probabilities = []
+        latencies = []
+        # Each row group is scored once; the top-1 columns and the per-row
+        # latency come from the same call as the top-k columns.
+        with PredictionWriter(
+            output_path,
+            service.label_encoder.classes_,
+            PREDICTION_OUTPUT_FORMAT,
+            PREDICTION_TOP_K,
+            PREDICTION_ROW_GROUP_SIZE,
+        ) as writer:
+            for start in range(0, len(df), PREDICTION_ROW_GROUP_SIZE):
+                rows = df.iloc[start : start + PREDICTION_ROW_GROUP_SIZE]
+                group, elapsed = predict_row_group(
+                    service,
+                    descriptions.iloc[start : start + PREDICTION_ROW_GROUP_SIZE],
+                )
+                writer.write(group)
+                categories = group["predicted_category"].tolist()
+                correct = [None] * len(rows)
+                if has_labels:
+                    true_labels = rows["HUMAN_VERIFIED_Category"]
+                    labeled = true_labels.notna().to_numpy()
+                    hits = labeled & (
+                        true_labels.to_numpy() == group["predicted_category"].to_numpy()
+                    )
+                    correct = [
+                        bool(hit) if known else None
+                        for hit, known in zip(hits, labeled)
+                    ]
+                    total_predictions += int(labeled.sum())
+                    correct_predictions += int(hits.sum())
+                for category, row_correct in zip(categories, correct):
+                    metrics_store.record(category, elapsed, row_correct)
+                    metrics_aggregator.record(category, elapsed, row_correct)
+                predicted_categories.extend(categories)
+                probabilities.extend(group["probability"].tolist())
+                latencies.extend([elapsed] * len(rows))
+        logger.info(f"Predicted {len(predicted_categories)} rows.")
+        # Monitoring counters and drift histograms are updated once per batch.
+        update_prediction_times(latencies)
+        counts = Counter(predicted_categories)
+        if total_predictions:
+            counts.update(
+                total_predictions=total_predictions,
+                correct_predictions=correct_predictions,
             )
-            category = decode_fasttext_label(label)
-            logger.info(f"Predicted: {category}")
-            elapsed = time.perf_counter() - start_time
-            update_prediction_time(elapsed)
-            update_monitoring_json(category)
-            if has_labels:
-                true_label = row["HUMAN_VERIFIED_Category"]
-                if not pd.isna(true_label):
-                    total_predictions += 1
-                    update_monitoring_json("total_predictions")
-                    if true_label == category:
-                        correct_predictions += 1
-                        update_monitoring_json("correct_predictions")
-
-            results.append(
-                {
-                    "product_description": row["product_description"],
-                    "predicted_category": category,
-                    "probability": probability[0],
-                }
+        update_monitoring_counts(counts)
+        metrics_store.record_sketch(
+            sketch_batch(predicted_categories, probabilities, descriptions)
+        )
+        if shadow_scorer is not None:
+            shadow_scorer.submit(descriptions.tolist(), predicted_categories, latencies)
+        if has_labels:
+            stored = feedback_store.add(
+                df["product_description"].tolist(),
+                df["HUMAN_VERIFIED_Category"].tolist(),
+                predicted_categories,
             )
-        result_df = pd.DataFrame(results)
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        output_path = get_prediction_output_path()
-        result_df.to_csv(output_path, index=False)
+            logger.info(f"Stored {stored} verified labels for retraining.")
 
         logger.info(f"Batch prediction completed. Results saved to {output_path}.")
 
         return {
             "message": "Batch prediction complete.",
             "output_file": str(output_path),
-            "rows_processed": len(result_df),
+            "rows_processed": writer.rows_written,
         }
 
     except Exception as e:
         logger.error(f"Error during batch prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.websocket("/ws/metrics")
+async def metrics_stream(websocket: WebSocket):
+    """Push aggregated metric deltas of all workers of this host at a fixed cadence."""
+    await websocket.accept()
+    logger.info("Metrics stream subscriber connected.")
+    try:
+        await metrics_broadcaster.serve(websocket)
+    except Exception:
+        logger.info("Metrics stream subscriber disconnected.")
@@ -0,0 +1,137 @@
+"""Shadow scorer file.
+
+This module provides shadow scoring of live traffic with a candidate model.
+A sample of the descriptions answered by the primary model is scored again by
+the candidate in a background executor, off the response path, and both
+predictions and latencies are recorded in the metrics store, so the candidate
+can be compared with the primary model before it is promoted.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.model_service import ModelService
+from pos_classifier.monitoring.metrics_store import MetricsStore
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowScorer:
+    """Score a sample of live traffic with a candidate model in the background."""
+
+    def __init__(
+        self,
+        candidate: ModelService,
+        metrics_store: MetricsStore,
+        sample_rate: float = 0.1,
+        max_pending: int = 100,
+    ):
+        """Initialize the scorer; the candidate is loaded by `start`.
+
+        Parameters
+        ----------
+        candidate : ModelService
+            Service of the candidate model.
+        metrics_store : MetricsStore
+            Store receiving the comparisons.
+        sample_rate : float
+            Share of the descriptions scored by the candidate.
+        max_pending : int
+            Number of queued jobs above which new samples are dropped, so a slow
+            candidate cannot grow the queue without bound.
+
+        """
+        self.candidate = candidate
+        self.metrics_store = metrics_store
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.submitted = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow-scorer"
+        )
+
+    def start(self):
+        """Load and warm up the candidate model in the background."""
+        self.candidate.start()
+
+    def close(self):
+        """Wait for the queued jobs and stop the executor."""
+        self._executor.shutdown(wait=True)
+
+    def submit(
+        self,
+        descriptions: list[str],
+        categories: list[str],
+        latencies: list[float],
+    ) -> bool:
+        """Queue a sample of answered descriptions for the candidate model.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Raw product descriptions answered by the primary model.
+        categories : list[str]
+            Category predicted by the primary model per description.
+        latencies : list[float]
+            Prediction time of the primary model per description in seconds.
+
+        Returns
+        -------
+        bool
+            Whether a job was queued.
+
+        """
+        if not self.candidate.ready:
+            return False
+        sample = [
+            row
+            for row in zip(descriptions, categories, latencies)
+            if random.random() < self.sample_rate
+        ]
+        if not sample:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += len(sample)
+                return False
+            self._pending += 1
+            self.submitted += len(sample)
+        self._executor.submit(self._score, sample)
+        return True
+
+    def _score(self, sample: list[tuple]):
+        try:
+            descriptions = [str(description) for description, _, _ in sample]
+            start = time.perf_counter()
+            candidate_categories, _ = self.candidate.predict_batch(descriptions)
+            candidate_latency = (time.perf_counter() - start) / len(sample)
+            for (_, category, latency), candidate_category in zip(
+                sample, candidate_categories
+            ):
+                self.metrics_store.record_shadow(
+                    category, candidate_category, latency, candidate_latency
+                )
+        except Exception as e:
+            logger.error(f"Shadow scoring failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def health(self) -> dict:
+        """Return the candidate status and the sampled, dropped and queued counts."""
+        with self._lock:
+            pending = self._pending
+        return {
+            **self.candidate.health(),
+            "sample_rate": self.sample_rate,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "pending": pending,
+        }
@@ -0,0 +1,119 @@
+"""API cold start benchmark.
+
+This script starts the API with uvicorn on a synthetic model, with and without
+the startup warmup, and reports the time until /healthz answers, the time until
+/readyz reports ready, and the latency of the first /predict request compared
+with the steady state.
+
+    PYTHONPATH=src python benchmarks/bench_api_cold_start.py --rows 200000 --requests 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from pathlib import Path
+
+from synthetic import generate_pos_data, train_benchmark_model
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def request(url: str, payload: dict | None = None) -> int:
+    """Send a GET, or a POST if a payload is given, and return the status code."""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return 0
+
+
+def wait_for(url: str, status: int, start: float, timeout: float = 120.0) -> float:
+    """Poll a URL until it returns a status and return the elapsed seconds."""
+    while time.perf_counter() - start < timeout:
+        if request(url) == status:
+            return time.perf_counter() - start
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not return {status} within {timeout}s")
+
+
+def measure(env: dict, port: int, descriptions: list[str]) -> dict:
+    """Start the API in a subprocess and time its startup and first requests."""
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.pos_api:app", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        healthz = wait_for(f"{base}/healthz", 200, start)
+        readyz = wait_for(f"{base}/readyz", 200, start)
+        latencies = []
+        for description in descriptions:
+            t = time.perf_counter()
+            status = request(f"{base}/predict", {"product_description": description})
+            assert status == 200, f"/predict returned {status}"
+            latencies.append(time.perf_counter() - t)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "healthz": healthz,
+        "readyz": readyz,
+        "first": latencies[0],
+        "steady": statistics.median(latencies[len(latencies) // 2 :]),
+    }
+
+
+def main(n_rows: int, n_requests: int, warmup_samples: int, port: int):
+    """Compare the cold start of the API with and without the warmup."""
+    print(f"rows: {n_rows}, requests: {n_requests}, warmup samples: {warmup_samples}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(tmp, n_rows=n_rows)
+        descriptions = generate_pos_data(n_requests, seed=1)[
+            "product_description"
+        ].tolist()
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)]),
+            "FASTTEXT_MODEL_PATH": model_path,
+            "LABEL_ENCODER_PATH": encoder_path,
+        }
+        for samples in (0, warmup_samples):
+            result = measure(
+                {**env, "API_WARMUP_SAMPLES": str(samples)}, port, descriptions
+            )
+            print(
+                f"warmup {samples}: /healthz {result['healthz'] * 1000:.0f}ms, "
+                f"/readyz {result['readyz'] * 1000:.0f}ms, "
+                f"first /predict {result['first'] * 1000:.1f}ms, "
+                f"steady /predict {result['steady'] * 1000:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    main(args.rows, args.requests, args.warmup, args.port)
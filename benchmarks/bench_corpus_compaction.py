@@ -0,0 +1,97 @@
+"""Corpus compaction benchmark.
+
+This script trains every combination of the experiment grid on a synthetic
+corpus with many repeated descriptions, with and without capping identical
+training lines, and reports the training time and `evaluate` F1 of both.
+
+    PYTHONPATH=src python benchmarks/bench_corpus_compaction.py --rows 1000000 --replicas 3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from synthetic import generate_pos_data
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "experiments"))
+
+from run_experiment import param_combinations, param_keys  # noqa: E402
+from pos_classifier.data.preprocessing import (  # noqa: E402
+    CorpusCompactor,
+    prepare_data_for_fasttext,
+    preprocess_data,
+    split_data,
+)
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper  # noqa: E402
+
+
+def train_and_evaluate(params: dict, train_file: Path, test_file: Path, workdir: Path):
+    """Train one grid combination and return its training time and F1."""
+    model = FastTextModelWrapper(
+        {
+            **params,
+            "input": str(train_file),
+            "model_location": str(workdir / "model.bin"),
+            "thread": os.cpu_count() or 1,
+            "verbose": 0,
+        }
+    )
+    start = time.perf_counter()
+    model.train()
+    elapsed = time.perf_counter() - start
+    return elapsed, model.evaluate(str(test_file))["f1"]
+
+
+def main(n_rows: int, unique_ratio: float, max_replicas: int):
+    """Compare training on the full and on the compacted corpus across the grid."""
+    print(f"rows: {n_rows}, unique ratio: {unique_ratio}, max replicas: {max_replicas}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        df = preprocess_data(
+            generate_pos_data(n_rows, unique_ratio=unique_ratio), tmp / "encoder.pkl"
+        )
+        train_df, test_df = split_data(df)
+        full_file, compact_file = tmp / "full.txt", tmp / "compact.txt"
+        test_file = tmp / "test.txt"
+        prepare_data_for_fasttext(train_df, full_file)
+        prepare_data_for_fasttext(test_df, test_file)
+        compactor = CorpusCompactor(max_replicas)
+        prepare_data_for_fasttext(train_df, compact_file, compactor)
+        report = compactor.report()
+        print(
+            f"lines: {report['compaction_lines_in']} -> "
+            f"{report['compaction_lines_out']} "
+            f"(ratio {report['compaction_ratio']:.1f}x, "
+            f"max label share shift {report['compaction_max_label_share_shift']:.4f})"
+        )
+
+        totals = [0.0, 0.0]
+        for combo in param_combinations:
+            params = dict(zip(param_keys, combo))
+            full_time, full_f1 = train_and_evaluate(params, full_file, test_file, tmp)
+            compact_time, compact_f1 = train_and_evaluate(
+                params, compact_file, test_file, tmp
+            )
+            totals[0] += full_time
+            totals[1] += compact_time
+            print(
+                f"{params}: full {full_time:.2f}s f1 {full_f1:.4f} | "
+                f"compacted {compact_time:.2f}s f1 {compact_f1:.4f}"
+            )
+    print(
+        f"grid training time: full {totals[0]:.1f}s, compacted {totals[1]:.1f}s, "
+        f"speedup {totals[0] / totals[1]:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique-ratio", type=float, default=0.05)
+    parser.add_argument("--replicas", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.unique_ratio, args.replicas)
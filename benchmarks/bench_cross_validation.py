@@ -0,0 +1,57 @@
+"""Cross-validation scaling benchmark.
+
+This script runs the parallel k-fold cross-validation of the experiment grid on
+synthetic data with growing thread budgets and reports the speedup.
+
+    PYTHONPATH=src python benchmarks/bench_cross_validation.py --budgets 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from unittest.mock import patch
+
+from synthetic import generate_pos_data
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "experiments"))
+
+import cross_validation  # noqa: E402
+from pos_classifier.data.preprocessing import (  # noqa: E402
+    preprocess_data,
+    write_kfold_files,
+)
+
+
+def main(n_rows: int, n_folds: int, budgets: list[int]):
+    """Cross-validate the grid with every thread budget, without MLflow logging."""
+    print(f"rows: {n_rows}, folds: {n_folds}, cpus: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        df = preprocess_data(generate_pos_data(n_rows), Path(tmp) / "e.pkl")
+        folds = write_kfold_files(df, Path(tmp) / "folds", n_folds)
+
+        baseline = None
+        with (
+            patch.object(cross_validation, "mlflow"),
+            patch.object(cross_validation, "EXPERIMENT_MODEL_PATH", tmp),
+        ):
+            for budget in budgets:
+                start = time.perf_counter()
+                cross_validation.run_cross_validation(folds, thread_budget=budget)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(
+                    f"budget={budget}: {elapsed:.1f}s, speedup {baseline / elapsed:.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    main(args.rows, args.folds, args.budgets)
@@ -0,0 +1,117 @@
+"""Drift sketch benchmark.
+
+This script measures the monitoring cost of a batch of predictions with the
+per-row JSON counter updates used before and with the per-batch counters and
+drift sketch, the throughput of the vectorized sketch, and the time to score
+class drift over a window from the stored sketches versus from raw events.
+
+    PYTHONPATH=src python benchmarks/bench_drift_sketches.py --rows 10000
+"""
+
+import argparse
+import tempfile
+import time
+
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import CATEGORY_WORDS, generate_pos_data
+
+
+def main(n_rows: int, window_minutes: int, rows_per_minute: int):
+    """Compare per-row and per-batch monitoring and sketch and raw drift scoring."""
+    import app.monitoring.json_monitor as json_monitor
+    from pos_classifier.monitoring.drift import (
+        drift_scores,
+        merge_sketches,
+        sketch_batch,
+    )
+    from pos_classifier.monitoring.metrics_store import MetricsStore
+
+    rng = np.random.default_rng(0)
+    df = generate_pos_data(n_rows, seed=1)
+    categories = df["category"].tolist()
+    probabilities = rng.random(n_rows).tolist()
+    latencies = (rng.random(n_rows) / 1000).tolist()
+    print(f"rows: {n_rows}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        json_monitor.MONITORING_PATH = tmp / "monitor.json"
+        start = time.perf_counter()
+        for category, latency in zip(categories, latencies):
+            json_monitor.update_prediction_time(latency)
+            json_monitor.update_monitoring_json(category)
+        per_row = time.perf_counter() - start
+
+        store = MetricsStore(tmp / "metrics.db")
+        start = time.perf_counter()
+        json_monitor.update_prediction_times(latencies)
+        json_monitor.update_monitoring_counts(Counter(categories))
+        store.record_sketch(
+            sketch_batch(categories, probabilities, df["product_description"])
+        )
+        store.flush()
+        per_batch = time.perf_counter() - start
+        print(
+            f"monitoring of one batch: per-row JSON {per_row:.2f}s, "
+            f"per-batch counters and sketch {per_batch * 1000:.1f}ms"
+        )
+
+        big = generate_pos_data(1_000_000, seed=2)
+        big_probabilities = rng.random(len(big))
+        start = time.perf_counter()
+        sketch_batch(big["category"], big_probabilities, big["product_description"])
+        elapsed = time.perf_counter() - start
+        print(f"sketch_batch: {len(big) / elapsed:,.0f} rows/s")
+
+        # A window of traffic, stored as raw events and as per-minute sketches.
+        names = list(CATEGORY_WORDS)
+        now = time.time()
+        window_rows = window_minutes * rows_per_minute
+        store = MetricsStore(
+            tmp / "window.db", batch_size=window_rows + 1, flush_interval=float("inf")
+        )
+        minutes = np.repeat(np.arange(window_minutes), rows_per_minute)
+        window = rng.choice(names, size=window_rows)
+        for minute in range(window_minutes):
+            ts = now - (window_minutes - 1 - minute) * 60
+            rows = window[minutes == minute]
+            for category in rows:
+                store.record(str(category), 0.001, ts=ts)
+            store.record_sketch({"category": dict(Counter(rows.tolist()))}, ts=ts)
+        store.flush()
+        reference = {"sketch": {"category": dict.fromkeys(names, 1)}}
+        since = now - window_minutes * 60
+
+        start = time.perf_counter()
+        rows = store.fetch_drift_sketches(since_minute=int(since // 60))
+        sketch_scores = drift_scores(reference, merge_sketches(r[1:] for r in rows))
+        from_sketches = time.perf_counter() - start
+
+        start = time.perf_counter()
+        events = pd.DataFrame(store.fetch_events(since=since))
+        counts = events[2].value_counts().to_dict()
+        event_scores = drift_scores(reference, {"category": counts})
+        from_events = time.perf_counter() - start
+        assert sketch_scores["category"]["count"] == event_scores["category"]["count"]
+        assert np.isclose(
+            sketch_scores["category"]["psi"], event_scores["category"]["psi"]
+        )
+        print(
+            f"class drift over {window_minutes} min, {window_rows} predictions: "
+            f"sketches {from_sketches * 1000:.1f}ms ({len(rows)} rows), "
+            f"raw events {from_events * 1000:.1f}ms ({len(events)} rows)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--window-minutes", type=int, default=360)
+    parser.add_argument("--rows-per-minute", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.rows, args.window_minutes, args.rows_per_minute)
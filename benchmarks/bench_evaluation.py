@@ -0,0 +1,56 @@
+"""Evaluation benchmark.
+
+This script compares the file-based `FastTextModelWrapper.evaluate` path, which
+writes a test file and calls `model.test`, with the in-memory evaluation engine.
+
+    PYTHONPATH=src python benchmarks/bench_evaluation.py --rows 200000
+"""
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+
+from synthetic import generate_pos_data, train_benchmark_model
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.data.preprocessing import clean_texts, prepare_data_for_fasttext
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+
+
+def main(n_rows: int):
+    """Evaluate a synthetic model on the same test set with both paths."""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(workdir)
+        label_encoder = load_label_encoder(encoder_path)
+
+        test_df = generate_pos_data(n_rows, seed=2, noise=0.3)
+        test_df["product_description"] = clean_texts(test_df["product_description"])
+        test_df["label"] = label_encoder.transform(test_df["category"])
+
+        model = FastTextModelWrapper({"model_location": model_path})
+        model.load_model()
+
+        start = time.perf_counter()
+        test_file = str(workdir / "test.txt")
+        prepare_data_for_fasttext(test_df, test_file)
+        file_metrics = model.evaluate(test_file)
+        file_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = model.evaluate_dataframe(test_df, label_encoder.classes_)
+        memory_time = time.perf_counter() - start
+
+    print(f"rows: {n_rows}")
+    print(f"file-based (write + model.test): {file_time:.2f}s")
+    print(f"in-memory engine:                {memory_time:.2f}s")
+    for key in ("precision", "recall", "f1"):
+        print(f"{key}: file {file_metrics[key]:.4f}, in-memory {report[key]:.4f}")
+    print(f"macro F1: {report['macro_f1']:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,73 @@
+"""Incremental prediction benchmark.
+
+This script scores a synthetic batch from scratch, then a follow-up batch in
+which only a share of the descriptions is new, and compares full rescoring with
+incremental scoring through the prediction cache.
+
+    PYTHONPATH=src python benchmarks/bench_incremental_prediction.py --rows 500000 --new 0.1
+"""
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+
+import pandas as pd
+
+from synthetic import generate_pos_data, train_benchmark_model
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.prediction_cache import PredictionCache, model_version
+from pos_classifier.predict import predict_incremental
+
+
+def main(n_rows: int, new_share: float):
+    """Compare full and incremental scoring of a batch with few new descriptions."""
+    print(f"rows: {n_rows}, new descriptions: {new_share:.0%}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(tmp)
+        model = FastTextModelWrapper({"model_location": model_path})
+        model.load_model()
+        label_encoder = load_label_encoder(encoder_path)
+        version = model_version(model_path, encoder_path)
+
+        previous = generate_pos_data(n_rows, seed=1)
+        n_new = int(n_rows * new_share)
+        batch = pd.concat(
+            [previous.iloc[n_new:], generate_pos_data(n_new, seed=2)],
+            ignore_index=True,
+        )
+
+        cache = PredictionCache(tmp / "cache.db")
+        cache.set_model_version(version)
+        start = time.perf_counter()
+        predict_incremental(previous, model, label_encoder, cache)
+        cold = time.perf_counter() - start
+
+        full_cache = PredictionCache(tmp / "full.db")
+        full_cache.set_model_version(version)
+        start = time.perf_counter()
+        full, _ = predict_incremental(batch, model, label_encoder, full_cache)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        incremental, n_scored = predict_incremental(batch, model, label_encoder, cache)
+        incremental_time = time.perf_counter() - start
+
+    assert full.equals(incremental)
+    print(f"first run (empty cache): {cold:.2f}s")
+    print(f"full rescoring: {full_time:.2f}s")
+    print(
+        f"incremental: {incremental_time:.2f}s ({n_scored} descriptions scored), "
+        f"speedup {full_time / incremental_time:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--new", type=float, default=0.1)
+    args = parser.parse_args()
+    main(args.rows, args.new)
@@ -0,0 +1,68 @@
+"""Parallel preprocessing benchmark.
+
+This script measures how building the FastText training file scales with the
+number of preprocessing workers, for the in-memory and the streaming paths, and
+checks that every worker count produces the same file.
+
+    PYTHONPATH=src python benchmarks/bench_parallel_preprocessing.py --rows 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from pathlib import Path
+
+from synthetic import write_pos_csv
+from pos_classifier.data.data_loader import load_data
+from pos_classifier.data.preprocessing import (
+    prepare_data_for_fasttext,
+    preprocess_data,
+    stream_fasttext_training_file,
+)
+
+
+def main(n_rows: int, workers: list[int], chunksize: int):
+    """Time both preprocessing paths for every worker count."""
+    print(f"rows: {n_rows}, cpus: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data_path = tmp / "train.csv"
+        write_pos_csv(data_path, n_rows)
+
+        reference = None
+        for n_workers in workers:
+            in_memory_file = tmp / f"in_memory_{n_workers}.txt"
+            start = time.perf_counter()
+            df = preprocess_data(load_data(data_path), tmp / "e.pkl", n_workers)
+            prepare_data_for_fasttext(df, in_memory_file)
+            in_memory_time = time.perf_counter() - start
+            del df
+
+            streamed_file = tmp / f"streamed_{n_workers}.txt"
+            start = time.perf_counter()
+            stream_fasttext_training_file(
+                data_path, streamed_file, chunksize, tmp / "e.pkl", n_workers
+            )
+            streaming_time = time.perf_counter() - start
+
+            reference = reference or in_memory_file.read_bytes()
+            assert in_memory_file.read_bytes() == reference
+            assert streamed_file.read_bytes() == reference
+            print(
+                f"workers={n_workers}: in-memory {in_memory_time:.2f}s "
+                f"({n_rows / in_memory_time:,.0f} rows/s), "
+                f"streaming {streaming_time:.2f}s "
+                f"({n_rows / streaming_time:,.0f} rows/s)"
+            )
+    print("all worker counts produced identical training files")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+    main(args.rows, args.workers, args.chunksize)
@@ -0,0 +1,65 @@
+"""Prediction output benchmark.
+
+This script scores a synthetic batch with its top-k categories and compares
+writing and reading the predictions as CSV, the current output, with Parquet
+and Arrow IPC written in row groups, on file size and wall-clock time.
+
+    PYTHONPATH=src python benchmarks/bench_prediction_output.py --rows 1000000 --top-k 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from pathlib import Path
+
+from synthetic import generate_pos_data, train_benchmark_model
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.data.prediction_writer import (
+    OUTPUT_FORMATS,
+    PredictionWriter,
+    read_predictions,
+)
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.predict import predict_top_k
+
+
+def main(n_rows: int, top_k: int, row_group_size: int):
+    """Compare CSV, Parquet and Arrow IPC prediction output."""
+    print(f"rows: {n_rows}, top-k: {top_k}, row group size: {row_group_size}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(tmp)
+        model = FastTextModelWrapper({"model_location": model_path})
+        model.load_model()
+        label_encoder = load_label_encoder(encoder_path)
+        predictions = predict_top_k(
+            generate_pos_data(n_rows, seed=1), model, label_encoder, top_k
+        )
+
+        for output_format, extension in OUTPUT_FORMATS.items():
+            path = tmp / f"predictions{extension}"
+            start = time.perf_counter()
+            with PredictionWriter(
+                path, label_encoder.classes_, output_format, top_k, row_group_size
+            ) as writer:
+                writer.write(predictions)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_predictions(path)
+            read_time = time.perf_counter() - start
+            print(
+                f"{output_format}: {os.path.getsize(path) / 2**20:.1f} MB, "
+                f"write {write_time:.2f}s, read {read_time:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--row-group-size", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.rows, args.top_k, args.row_group_size)
@@ -0,0 +1,86 @@
+"""Request profiling overhead benchmark.
+
+This script serves the API with uvicorn on a synthetic model with profiling
+disabled, installed but not sampling, sampling 1% of the requests and
+profiling every request, and reports the /predict latency of each setting.
+
+    PYTHONPATH=src python benchmarks/bench_profiling_overhead.py --requests 2000
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from bench_api_cold_start import ROOT, request, wait_for
+from synthetic import generate_pos_data, train_benchmark_model
+
+SETTINGS = {
+    "disabled": {"API_PROFILING": "false"},
+    "installed, rate 0": {"API_PROFILING": "true", "API_PROFILING_SAMPLE_RATE": "0"},
+    "rate 0.01": {"API_PROFILING": "true", "API_PROFILING_SAMPLE_RATE": "0.01"},
+    "rate 1.0": {"API_PROFILING": "true", "API_PROFILING_SAMPLE_RATE": "1"},
+}
+
+
+def measure(env: dict, port: int, descriptions: list[str]) -> list[float]:
+    """Start the API in a subprocess and return the latency of every request."""
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.pos_api:app", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(f"{base}/readyz", 200, time.perf_counter())
+        latencies = []
+        for description in descriptions:
+            start = time.perf_counter()
+            status = request(f"{base}/predict", {"product_description": description})
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, f"/predict returned {status}"
+    finally:
+        server.terminate()
+        server.wait()
+    return latencies
+
+
+def main(n_requests: int, port: int):
+    """Compare the /predict latency with profiling disabled, sampled and always on."""
+    print(f"requests: {n_requests}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(tmp)
+        descriptions = generate_pos_data(n_requests, seed=1)[
+            "product_description"
+        ].tolist()
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)]),
+            "FASTTEXT_MODEL_PATH": model_path,
+            "LABEL_ENCODER_PATH": encoder_path,
+            "PROFILE_DIR": str(tmp / "profiles"),
+            "LOG_LEVEL": "WARNING",
+        }
+        for name, setting in SETTINGS.items():
+            latencies = measure({**env, **setting}, port, descriptions)
+            print(
+                f"{name}: median {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p95 {statistics.quantiles(latencies, n=20)[-1] * 1000:.2f}ms, "
+                f"profiles {len(list((tmp / 'profiles').glob('*.prof')))}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    main(args.requests, args.port)
@@ -0,0 +1,65 @@
+"""Pyfunc prediction benchmark.
+
+This script compares scoring a DataFrame through the MLflow pyfunc flavor, which
+makes one batched FastText call, with the previous row-by-row prediction loop.
+
+    PYTHONPATH=src python benchmarks/bench_pyfunc_predict.py --rows 100000
+"""
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+
+import mlflow
+
+from synthetic import generate_pos_data, train_benchmark_model
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.data.preprocessing import clean_text
+from pos_classifier.model.fasttext_wrapper import (
+    FastTextModelWrapper,
+    FastTextPyfuncModel,
+)
+
+
+def main(n_rows: int):
+    """Train a synthetic model, then time row-by-row and pyfunc DataFrame scoring."""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(workdir)
+        df = generate_pos_data(n_rows, seed=1)[["product_description"]]
+
+        wrapper = FastTextModelWrapper({"model_location": model_path})
+        wrapper.load_model()
+        label_encoder = load_label_encoder(encoder_path)
+        start = time.perf_counter()
+        for text in df["product_description"]:
+            label, _ = wrapper.predict(clean_text(text))
+            label_encoder.inverse_transform([int(label[0].replace("__label__", ""))])
+        loop_time = time.perf_counter() - start
+
+        mlflow.pyfunc.save_model(
+            path=str(workdir / "pyfunc"),
+            python_model=FastTextPyfuncModel(),
+            artifacts={
+                "fasttext_model_path": model_path,
+                "label_encoder_path": encoder_path,
+            },
+        )
+        pyfunc_model = mlflow.pyfunc.load_model(str(workdir / "pyfunc"))
+        start = time.perf_counter()
+        result = pyfunc_model.predict(df)
+        pyfunc_time = time.perf_counter() - start
+
+    assert len(result) == n_rows
+    print(f"rows: {n_rows}")
+    print(f"row-by-row loop: {loop_time:.2f}s ({n_rows / loop_time:,.0f} rows/s)")
+    print(f"pyfunc batched:  {pyfunc_time:.2f}s ({n_rows / pyfunc_time:,.0f} rows/s)")
+    print(f"speedup: {loop_time / pyfunc_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,140 @@
+"""Feedback retraining benchmark.
+
+This script trains a model on synthetic data, collects verified labels that
+introduce product words unseen in training, and compares a full retrain from
+scratch with the 'warm_start' and 'delta_replay' incremental retrains on
+wall-clock time and F1.
+
+    PYTHONPATH=src python benchmarks/bench_retraining.py --rows 500000 --feedback 5000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic import BRANDS, SIZES, generate_pos_data
+from pos_classifier.data.preprocessing import (
+    clean_texts,
+    prepare_data_for_fasttext,
+    preprocess_data,
+)
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.retrain import retrain_model
+
+NEW_WORDS = {
+    "Beverages": ["kombucha", "kvass", "horchata"],
+    "Dry Goods & Pantry Staples": ["quinoa", "farro", "couscous"],
+    "Fresh & Perishable Items": ["kefir", "burrata", "kale"],
+    "Household & Personal Care": ["shaver", "mouthwash", "dryer sheets"],
+    "Specialty & Miscellaneous": ["sparklers", "confetti", "incense"],
+}
+
+PARAMS = {"epoch": 5, "lr": 0.5, "wordNgrams": 2, "verbose": 0}
+
+
+def generate_feedback(n_rows: int, seed: int) -> pd.DataFrame:
+    """Generate verified labels of products named with words unseen in training."""
+    rng = np.random.default_rng(seed)
+    categories = list(NEW_WORDS)
+    rows = []
+    for category_id in rng.integers(0, len(categories), size=n_rows):
+        category = categories[category_id]
+        words = NEW_WORDS[category]
+        description = " ".join(
+            [
+                BRANDS[rng.integers(len(BRANDS))],
+                words[rng.integers(len(words))],
+                SIZES[rng.integers(len(SIZES))],
+            ]
+        )
+        rows.append((description, category))
+    return pd.DataFrame(rows, columns=["product_description", "category"])
+
+
+def evaluate(model_path: str, test_df: pd.DataFrame, class_names) -> float:
+    """Return the F1 of a saved model on a preprocessed test set."""
+    model = FastTextModelWrapper({"model_location": model_path})
+    model.load_model()
+    return model.evaluate_dataframe(test_df, class_names)["f1"]
+
+
+def main(n_rows: int, n_feedback: int, replay_size: int):
+    """Compare full and incremental retrains after collecting verified labels."""
+    print(f"rows: {n_rows}, feedback: {n_feedback}, replay: {replay_size}")
+    params = {**PARAMS, "thread": os.cpu_count() or 1}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        encoder_path = tmp / "label_encoder.pkl"
+        train_file = tmp / "train.txt"
+        base_model = str(tmp / "base.bin")
+        base = generate_pos_data(n_rows, seed=0)
+        prepare_data_for_fasttext(
+            preprocess_data(base.copy(), encoder_path), train_file
+        )
+        FastTextModelWrapper(
+            {**params, "input": str(train_file), "model_location": base_model}
+        ).train()
+        label_encoder = load_label_encoder(encoder_path)
+        class_names = list(label_encoder.classes_)
+
+        feedback = generate_feedback(n_feedback, seed=1)
+        test_df = pd.concat(
+            [generate_pos_data(5000, seed=2), generate_feedback(5000, seed=3)],
+            ignore_index=True,
+        )
+        test_df["product_description"] = clean_texts(test_df["product_description"])
+        test_df["label"] = label_encoder.transform(test_df["category"])
+
+        results = {"current model": (0.0, evaluate(base_model, test_df, class_names))}
+
+        start = time.perf_counter()
+        full_df = preprocess_data(
+            pd.concat([base, feedback], ignore_index=True), tmp / "full.pkl"
+        )
+        prepare_data_for_fasttext(full_df, tmp / "full.txt")
+        full_model = str(tmp / "full.bin")
+        FastTextModelWrapper(
+            {**params, "input": str(tmp / "full.txt"), "model_location": full_model}
+        ).train()
+        results["full retrain"] = (
+            time.perf_counter() - start,
+            evaluate(full_model, test_df, class_names),
+        )
+
+        for strategy in ("warm_start", "delta_replay"):
+            output = str(tmp / f"{strategy}.bin")
+            start = time.perf_counter()
+            retrain_model(
+                feedback,
+                base_model,
+                train_file,
+                output,
+                label_encoder,
+                params,
+                strategy=strategy,
+                replay_size=replay_size,
+                warm_start_epoch=2,
+            )
+            results[strategy] = (
+                time.perf_counter() - start,
+                evaluate(output, test_df, class_names),
+            )
+
+    for name, (elapsed, f1) in results.items():
+        print(f"{name}: {elapsed:.1f}s, f1 {f1:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--feedback", type=int, default=5000)
+    parser.add_argument("--replay", type=int, default=50_000)
+    args = parser.parse_args()
+    main(args.rows, args.feedback, args.replay)
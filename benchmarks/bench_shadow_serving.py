@@ -0,0 +1,118 @@
+"""Shadow serving benchmark.
+
+This script serves the API with uvicorn on a synthetic primary model, without a
+candidate and with a larger candidate model shadowing 10% and 100% of the
+traffic, and reports the primary-path /predict latency percentiles of each
+setting together with the number of sampled and dropped shadow predictions.
+
+    PYTHONPATH=src python benchmarks/bench_shadow_serving.py --requests 3000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from pathlib import Path
+
+import numpy as np
+
+from bench_api_cold_start import ROOT, request, wait_for
+from synthetic import generate_pos_data, train_benchmark_model
+
+SETTINGS = {
+    "no candidate": None,
+    "shadow 10%": "0.1",
+    "shadow 100%": "1.0",
+}
+
+
+def measure(env: dict, port: int, descriptions: list[str]) -> tuple[list, dict]:
+    """Start the API in a subprocess and return request latencies and its health."""
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.pos_api:app", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(f"{base}/readyz", 200, time.perf_counter())
+        if "CANDIDATE_MODEL_PATH" in env:
+            while request_health(base)["candidate"]["status"] not in (
+                "ready",
+                "failed",
+            ):
+                time.sleep(0.05)
+        latencies = []
+        for description in descriptions:
+            start = time.perf_counter()
+            status = request(f"{base}/predict", {"product_description": description})
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, f"/predict returned {status}"
+        health = request_health(base)
+    finally:
+        server.terminate()
+        server.wait()
+    return latencies, health
+
+
+def request_health(base: str) -> dict:
+    """Return the /healthz body of a running API."""
+    with urllib.request.urlopen(f"{base}/healthz", timeout=30) as response:
+        return json.loads(response.read())
+
+
+def main(n_requests: int, port: int):
+    """Compare primary-path latency without a candidate and with shadow scoring."""
+    print(f"requests: {n_requests}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "primary").mkdir()
+        (tmp / "candidate").mkdir()
+        model_path, encoder_path = train_benchmark_model(tmp / "primary")
+        candidate_path, _ = train_benchmark_model(
+            tmp / "candidate", seed=1, dim=300, wordNgrams=3
+        )
+        descriptions = generate_pos_data(n_requests, seed=2)[
+            "product_description"
+        ].tolist()
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)]),
+            "FASTTEXT_MODEL_PATH": model_path,
+            "LABEL_ENCODER_PATH": encoder_path,
+            "LOG_LEVEL": "WARNING",
+        }
+        for name, sample_rate in SETTINGS.items():
+            setting = {}
+            if sample_rate is not None:
+                setting = {
+                    "CANDIDATE_MODEL_PATH": candidate_path,
+                    "CANDIDATE_LABEL_ENCODER_PATH": encoder_path,
+                    "SHADOW_SAMPLE_RATE": sample_rate,
+                }
+            latencies, health = measure({**env, **setting}, port, descriptions)
+            p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+            shadow = health.get("candidate", {})
+            print(
+                f"{name}: p50 {p50:.2f}ms, p95 {p95:.2f}ms, p99 {p99:.2f}ms"
+                + (
+                    f", shadowed {shadow['submitted']}, dropped {shadow['dropped']}"
+                    if shadow
+                    else ""
+                )
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+    main(args.requests, args.port)
@@ -0,0 +1,110 @@
+"""Similarity index benchmark.
+
+This script embeds synthetic POS descriptions with a synthetic model into a
+similarity index, unpartitioned and with coarse k-means partitions, and reports
+the build time, the single and batched query latency of every setting and the
+recall of partitioned search against exhaustive search. Rows are stored in a
+different order per setting, so a neighbour counts as recalled when its score
+reaches the k-th exhaustive score.
+
+    PYTHONPATH=src python benchmarks/bench_similarity_index.py --rows 1000000
+"""
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+
+import numpy as np
+
+from synthetic import generate_pos_data, train_benchmark_model
+
+
+def query_latencies(index, queries, k: int, n_probe, batch_size: int) -> list[float]:
+    """Search the queries in batches and return the latency per query."""
+    latencies = []
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start : start + batch_size]
+        begin = time.perf_counter()
+        index.search(batch, k, n_probe)
+        latencies.append((time.perf_counter() - begin) / len(batch))
+    return latencies
+
+
+def main(
+    n_rows: int,
+    n_queries: int,
+    k: int,
+    n_partitions: int,
+    probes: list[int],
+    batch_size: int,
+):
+    """Build the index unpartitioned and partitioned and time its queries."""
+    from pos_classifier.data.preprocessing import clean_texts
+    from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+    from pos_classifier.model.similarity_index import (
+        SimilarityIndex,
+        build_similarity_index,
+    )
+
+    print(f"rows: {n_rows}, queries: {n_queries}, k: {k}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, _ = train_benchmark_model(tmp)
+        model = FastTextModelWrapper({"model_location": model_path})
+        model.load_model()
+        df = generate_pos_data(n_rows, seed=1)
+        texts = clean_texts(df["product_description"]).tolist()
+        labels = df["category"].astype("category").cat.codes.to_numpy()
+        categories = df["category"].astype("category").cat.categories
+        queries = model.sentence_vectors(
+            generate_pos_data(n_queries, seed=2)["product_description"].tolist()
+        )
+
+        exact_scores = None
+        for partitions in [0, n_partitions]:
+            index_dir = tmp / f"index_{partitions}"
+            start = time.perf_counter()
+            build_similarity_index(
+                model, texts, labels, categories, index_dir, n_partitions=partitions
+            )
+            size_mb = sum(p.stat().st_size for p in index_dir.iterdir()) / 2**20
+            print(
+                f"partitions {partitions}: build {time.perf_counter() - start:.1f}s, "
+                f"{size_mb:.0f} MB"
+            )
+            index = SimilarityIndex(index_dir)
+            index.search(queries[:1], k)
+            for n_probe in [None] if partitions == 0 else probes:
+                scores = index.search(queries, k, n_probe)[0]
+                if exact_scores is None:
+                    exact_scores = scores
+                recall = np.mean(scores >= exact_scores[:, -1:] - 1e-6)
+                single = np.array(query_latencies(index, queries, k, n_probe, 1))
+                batched = query_latencies(index, queries, k, n_probe, batch_size)
+                p50, p95 = np.percentile(single * 1000, [50, 95])
+                print(
+                    f"  n_probe {n_probe or 'all'}: single p50 {p50:.2f}ms, "
+                    f"p95 {p95:.2f}ms, batch of {batch_size} "
+                    f"{np.mean(batched) * 1000:.3f}ms/query, recall@{k} {recall:.3f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--partitions", type=int, default=1024)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    main(
+        args.rows,
+        args.queries,
+        args.k,
+        args.partitions,
+        args.probes,
+        args.batch_size,
+    )
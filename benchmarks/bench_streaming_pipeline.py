@@ -0,0 +1,78 @@
+"""Streaming pipeline benchmark.
+
+This script measures peak RSS and wall-clock time of building the FastText
+training file with the in-memory path of `train.main` and with the streaming
+path. Each path runs in a fresh subprocess so peak RSS is not shared.
+
+    PYTHONPATH=src python benchmarks/bench_streaming_pipeline.py --rows 2000000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from synthetic import write_pos_csv
+
+
+def run_path(mode: str, data_path: str, output_path: str, chunksize: int):
+    """Build the training file with one path and print its peak RSS in MB."""
+    from pos_classifier.data.data_loader import load_data
+    from pos_classifier.data.preprocessing import (
+        prepare_data_for_fasttext,
+        preprocess_data,
+        stream_fasttext_training_file,
+    )
+
+    encoder_path = f"{output_path}.pkl"
+    start = time.perf_counter()
+    if mode == "in-memory":
+        df = preprocess_data(load_data(data_path), encoder_path)
+        prepare_data_for_fasttext(df, output_path)
+    else:
+        stream_fasttext_training_file(data_path, output_path, chunksize, encoder_path)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak_mb:.0f}")
+
+
+def main(n_rows: int, chunksize: int):
+    """Generate a synthetic CSV and compare both paths in subprocesses."""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "train.csv"
+        write_pos_csv(data_path, n_rows)
+        print(f"rows: {n_rows}, csv size: {os.path.getsize(data_path) / 2**20:.0f} MB")
+
+        outputs = {}
+        for mode in ("in-memory", "streaming"):
+            output_path = Path(tmp) / f"{mode}.txt"
+            result = subprocess.run(
+                [sys.executable, __file__, "--run", mode, str(data_path)]
+                + [str(output_path), "--chunksize", str(chunksize)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            elapsed, peak_mb = result.stdout.split()[-2:]
+            outputs[mode] = output_path.read_bytes()
+            print(f"{mode:>9}: {elapsed}s, peak RSS {peak_mb} MB")
+
+        assert outputs["in-memory"] == outputs["streaming"]
+        print("training files are identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--run", nargs=3, metavar=("MODE", "DATA", "OUTPUT"))
+    args = parser.parse_args()
+    if args.run:
+        run_path(*args.run, args.chunksize)
+    else:
+        main(args.rows, args.chunksize)
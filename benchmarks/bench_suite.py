@@ -0,0 +1,290 @@
+"""Benchmark suite.
+
+This script measures every hot path of the classifier on seeded synthetic POS
+data: rows/sec, per-call latency percentiles and the peak RSS added by each
+stage. Each stage runs in a fresh subprocess, so peak RSS is not shared, and
+the results are compared with a stored baseline to flag regressions.
+
+    PYTHONPATH=src python benchmarks/bench_suite.py --rows 100000
+    PYTHONPATH=src python benchmarks/bench_suite.py --rows 100000 --update-baseline
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+import numpy as np
+
+from synthetic import generate_pos_data, train_benchmark_model
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+
+# Stages timed call by call run on at most this many rows.
+LATENCY_ROWS = {
+    "clean_text": None,
+    "predict": None,
+    "decode_fasttext_label": 2000,
+    "api_predict": 2000,
+}
+THROUGHPUT_ROWS = {
+    "prepare_data_for_fasttext": None,
+    "predict_batch": None,
+    "api_predict_batch": 20_000,
+}
+STAGES = list(LATENCY_ROWS) + list(THROUGHPUT_ROWS)
+
+
+def peak_rss_mb() -> float:
+    """Return the peak RSS of this process in MB, 0 if it cannot be measured."""
+    from pos_classifier.monitoring.telemetry import peak_rss_mb
+
+    return peak_rss_mb().get("peak_rss_mb", 0.0)
+
+
+def time_calls(func, items) -> list[float]:
+    """Call a function on every item and return the latency of each call."""
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def api_client(workdir: Path):
+    """Return a started test client of the API writing its state to a work dir."""
+    from fastapi.testclient import TestClient
+
+    import app.pos_api as pos_api
+    from pos_classifier.data.feedback_store import FeedbackStore
+    from pos_classifier.monitoring.metrics_store import MetricsStore
+    from pos_classifier.monitoring.metrics_stream import DeltaLog, MetricsBroadcaster
+
+    pos_api.metrics_store = MetricsStore(workdir / "metrics.db")
+    pos_api.metrics_broadcaster = MetricsBroadcaster(
+        pos_api.metrics_aggregator,
+        pos_api.METRICS_STREAM_INTERVAL,
+        DeltaLog(workdir / "metrics.db"),
+    )
+    pos_api.feedback_store = FeedbackStore(workdir / "feedback.db")
+    pos_api.OUTPUT_DIR = workdir
+    pos_api.get_prediction_output_path = lambda extension=".csv": (
+        workdir / f"predictions{extension}"
+    )
+    client = TestClient(pos_api.app)
+    client.__enter__()
+    pos_api.model_service.wait()
+    return client
+
+
+def run_stage(stage: str, n_rows: int, seed: int, workdir: Path, repeats: int) -> dict:
+    """Run one stage on synthetic rows and return the measurements of its best repeat."""
+    from pos_classifier.data.postprocessing import decode_fasttext_label
+    from pos_classifier.data.preprocessing import (
+        clean_text,
+        clean_texts,
+        prepare_data_for_fasttext,
+    )
+    from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+
+    limit = {**LATENCY_ROWS, **THROUGHPUT_ROWS}[stage]
+    df = generate_pos_data(min(n_rows, limit or n_rows), seed=seed)
+    descriptions = df["product_description"].tolist()
+    model = FastTextModelWrapper({"model_location": os.environ["FASTTEXT_MODEL_PATH"]})
+    model.load_model()
+    client = api_client(workdir) if stage.startswith("api_") else None
+    cleaned = df.assign(
+        product_description=clean_texts(df["product_description"]),
+        label=df["category"].astype("category").cat.codes,
+    )
+    labels = model.predict_batch(descriptions)[0]
+    csv = df[["product_description"]].to_csv(index=False).encode()
+    rss_before = peak_rss_mb()
+
+    def measure() -> tuple[float, list[float] | None]:
+        latencies = None
+        start = time.perf_counter()
+        if stage == "clean_text":
+            latencies = time_calls(clean_text, descriptions)
+        elif stage == "prepare_data_for_fasttext":
+            prepare_data_for_fasttext(cleaned, workdir / "train.txt")
+        elif stage == "predict":
+            latencies = time_calls(model.predict, descriptions)
+        elif stage == "predict_batch":
+            model.predict_batch(descriptions)
+        elif stage == "decode_fasttext_label":
+            latencies = time_calls(decode_fasttext_label, labels)
+        elif stage == "api_predict":
+            latencies = time_calls(
+                lambda text: client.post(
+                    "/predict", json={"product_description": text}
+                ),
+                descriptions,
+            )
+        elif stage == "api_predict_batch":
+            response = client.post(
+                "/predict_batch",
+                files={"file": ("batch.csv", io.BytesIO(csv), "text/csv")},
+            )
+            assert response.status_code == 200, response.text
+        return time.perf_counter() - start, latencies
+
+    # The fastest repeat is kept, it is the least disturbed by other processes.
+    elapsed, latencies = min((measure() for _ in range(repeats)), key=lambda m: m[0])
+
+    result = {
+        "rows": len(df),
+        "seconds": elapsed,
+        "rows_per_sec": len(df) / elapsed,
+        "peak_rss_delta_mb": peak_rss_mb() - rss_before,
+    }
+    if latencies is not None:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        result.update({"p50_ms": p50, "p95_ms": p95, "p99_ms": p99})
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return the regressions of the results against a baseline.
+
+    Throughput may not drop and p95 latency and peak RSS may not grow by more
+    than the tolerance; RSS changes below 10 MB are ignored as noise.
+    """
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get("stages", {}).get(stage)
+        if reference is None:
+            continue
+        if result["rows_per_sec"] < reference["rows_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: {result['rows_per_sec']:.0f} rows/s, "
+                f"baseline {reference['rows_per_sec']:.0f}"
+            )
+        if "p95_ms" in reference and result["p95_ms"] > reference["p95_ms"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{stage}: p95 {result['p95_ms']:.3f}ms, "
+                f"baseline {reference['p95_ms']:.3f}ms"
+            )
+        rss, reference_rss = result["peak_rss_delta_mb"], reference["peak_rss_delta_mb"]
+        if rss > reference_rss * (1 + tolerance) and rss - reference_rss > 10:
+            regressions.append(
+                f"{stage}: peak RSS +{rss:.0f} MB, baseline +{reference_rss:.0f} MB"
+            )
+    return regressions
+
+
+def main(
+    n_rows: int,
+    seed: int,
+    stages: list[str],
+    repeats: int,
+    tolerance: float,
+    update: bool,
+) -> int:
+    """Run the stages in subprocesses, print them and compare with the baseline."""
+    print(f"rows: {n_rows}, seed: {seed}, repeats: {repeats}, cpus: {os.cpu_count()}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, encoder_path = train_benchmark_model(tmp, seed=seed)
+        env = {
+            **os.environ,
+            "FASTTEXT_MODEL_PATH": model_path,
+            "LABEL_ENCODER_PATH": encoder_path,
+            "API_WARMUP_SAMPLES": "0",
+            "LOG_LEVEL": "WARNING",
+            "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)]),
+        }
+        for stage in stages:
+            completed = subprocess.run(
+                [sys.executable, __file__, "--run", stage, "--rows", str(n_rows)]
+                + ["--seed", str(seed + 1), "--repeats", str(repeats)]
+                + ["--workdir", str(tmp)],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=env,
+                cwd=ROOT,
+            )
+            results[stage] = json.loads(completed.stdout.strip().splitlines()[-1])
+            result = results[stage]
+            latency = (
+                f", p50 {result['p50_ms']:.3f}ms, p95 {result['p95_ms']:.3f}ms, "
+                f"p99 {result['p99_ms']:.3f}ms"
+                if "p50_ms" in result
+                else ""
+            )
+            print(
+                f"{stage}: {result['rows']} rows, {result['rows_per_sec']:.0f} rows/s"
+                f"{latency}, peak RSS +{result['peak_rss_delta_mb']:.0f} MB"
+            )
+
+    if update:
+        baseline = {
+            "rows": n_rows,
+            "seed": seed,
+            "repeats": repeats,
+            "machine": {
+                "cpus": os.cpu_count(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "stages": results,
+        }
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline written to {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("no baseline, run with --update-baseline to store one")
+        return 0
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if baseline["rows"] != n_rows:
+        print(f"baseline was measured on {baseline['rows']} rows, not comparable")
+        return 0
+    regressions = compare(results, baseline, tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"no regression beyond {tolerance:.0%} against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--run", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        result = run_stage(
+            args.run, args.rows, args.seed, Path(args.workdir), args.repeats
+        )
+        print(json.dumps(result))
+    else:
+        sys.exit(
+            main(
+                args.rows,
+                args.seed,
+                args.stages,
+                args.repeats,
+                args.tolerance,
+                args.update_baseline,
+            )
+        )
@@ -0,0 +1,105 @@
+"""Sweep logging benchmark.
+
+This script runs the experiment grid on synthetic data against a throwaway
+MLflow store, then logs and registers every losing trial's model as the sweep
+used to, and reports the disk usage and wall-clock time of both strategies.
+
+    PYTHONPATH=src python benchmarks/bench_sweep_logging.py --rows 50000 --keep 3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from unittest.mock import patch
+
+import mlflow
+
+from synthetic import generate_pos_data
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "experiments"))
+
+import run_experiment  # noqa: E402
+from pos_classifier.data.postprocessing import load_label_encoder  # noqa: E402
+from pos_classifier.data.preprocessing import (  # noqa: E402
+    prepare_data_for_fasttext,
+    preprocess_data,
+    split_data,
+)
+
+
+def directory_size(path: Path) -> int:
+    """Return the total size in bytes of the files below a directory."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def main(n_rows: int, keep_top_n: int):
+    """Compare the selective sweep with logging and registering every trial."""
+    print(f"rows: {n_rows}, trials: {len(run_experiment.param_combinations)}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        encoder_path = tmp / "label_encoder.pkl"
+        df = preprocess_data(generate_pos_data(n_rows), encoder_path)
+        train_df, test_df = split_data(df)
+        prepare_data_for_fasttext(train_df, tmp / "train.txt")
+        mlflow.set_tracking_uri((tmp / "mlruns").as_uri())
+
+        combinations = [
+            (*combo, os.cpu_count() or 1) for combo in run_experiment.param_combinations
+        ]
+        with (
+            patch.object(run_experiment, "param_combinations", combinations),
+            patch.object(
+                run_experiment, "param_keys", run_experiment.param_keys + ["thread"]
+            ),
+            patch.object(run_experiment, "FASTTEXT_TRAIN_FILE", tmp / "train.txt"),
+            patch.object(run_experiment, "LABEL_ENCODER_PATH", encoder_path),
+            patch.object(run_experiment, "EXPERIMENT_MODEL_PATH", str(tmp / "models")),
+            patch.object(
+                run_experiment,
+                "load_label_encoder",
+                lambda: load_label_encoder(encoder_path),
+            ),
+        ):
+            start = time.perf_counter()
+            run_experiment.run_experiments(
+                test_df, keep_top_n=len(combinations), selection_metric="f1"
+            )
+            sweep_time = time.perf_counter() - start
+            all_models = directory_size(tmp / "models")
+            store = directory_size(tmp / "mlruns")
+
+            runs = mlflow.search_runs(
+                experiment_names=[run_experiment.MLFLOW_EXPERIMENT_NAME],
+                order_by=["metrics.f1 DESC"],
+            )
+            top_n = sum(
+                os.path.getsize(path)
+                for path in runs["params.model_location"][:keep_top_n]
+            )
+            start = time.perf_counter()
+            for run_id, path in zip(
+                runs["run_id"][1:], runs["params.model_location"][1:]
+            ):
+                run_experiment.log_winner_model(run_id, path)
+            log_all_time = time.perf_counter() - start
+            store_all = directory_size(tmp / "mlruns")
+
+    print(f"sweep with winner registration: {sweep_time:.1f}s")
+    print(f"extra time to log every losing trial: {log_all_time:.1f}s")
+    print(f"artifact store: {store / 2**20:.1f} MB vs {store_all / 2**20:.1f} MB")
+    print(
+        f"model files: {top_n / 2**20:.1f} MB (top {keep_top_n}) "
+        f"vs {all_models / 2**20:.1f} MB (all)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.keep)
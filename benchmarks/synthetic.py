@@ -0,0 +1,245 @@
+"""Synthetic data file.
+
+This module provides seeded synthetic POS-style product descriptions for benchmarks.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_WORDS = {
+    "Beverages": [
+        "juice",
+        "water",
+        "sparkling",
+        "cola",
+        "tea",
+        "coffee",
+        "lemonade",
+        "soda",
+        "espresso",
+        "smoothie",
+        "energy",
+        "drink",
+        "mineral",
+        "tonic",
+    ],
+    "Dry Goods & Pantry Staples": [
+        "rice",
+        "pasta",
+        "flour",
+        "sugar",
+        "beans",
+        "lentils",
+        "oats",
+        "cereal",
+        "spaghetti",
+        "canned",
+        "tomatoes",
+        "noodles",
+        "crackers",
+        "honey",
+    ],
+    "Fresh & Perishable Items": [
+        "milk",
+        "eggs",
+        "salmon",
+        "chicken",
+        "yogurt",
+        "cheese",
+        "lettuce",
+        "apples",
+        "bananas",
+        "bread",
+        "butter",
+        "steak",
+        "berries",
+        "spinach",
+    ],
+    "Household & Personal Care": [
+        "toothpaste",
+        "shampoo",
+        "detergent",
+        "soap",
+        "tissues",
+        "deodorant",
+        "bleach",
+        "sponges",
+        "razor",
+        "lotion",
+        "conditioner",
+        "wipes",
+        "floss",
+    ],
+    "Specialty & Miscellaneous": [
+        "candles",
+        "gift",
+        "card",
+        "batteries",
+        "balloons",
+        "wrapping",
+        "party",
+        "charcoal",
+        "seeds",
+        "souvenir",
+        "novelty",
+        "lighter",
+        "puzzle",
+    ],
+}
+
+SHARED_WORDS = [
+    "organic",
+    "premium",
+    "fresh",
+    "classic",
+    "family",
+    "pack",
+    "value",
+    "original",
+    "natural",
+    "extra",
+    "large",
+    "small",
+    "light",
+    "the",
+    "with",
+]
+
+BRANDS = ["Acme", "Bluebird", "Cedar", "Dalton", "Evergreen", "Fjord", "Greenway"]
+
+SIZES = ["250ml", "500ml", "1L", "1.5L", "100g", "500g", "1kg", "6pk", "12ct"]
+
+
+def generate_pos_data(
+    n_rows: int, seed: int = 0, noise: float = 0.1, unique_ratio: float = 1.0
+) -> pd.DataFrame:
+    """Generate POS-style product descriptions with their categories.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows to generate.
+    seed : int
+        Random seed; the same seed always yields the same rows.
+    noise : float
+        Share of category words drawn from another category.
+    unique_ratio : float
+        Share of distinct descriptions; lower values repeat earlier rows.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with 'product_description' and 'category' columns.
+
+    """
+    rng = np.random.default_rng(seed)
+    categories = list(CATEGORY_WORDS)
+    n_unique = max(1, int(n_rows * unique_ratio))
+
+    category_ids = rng.integers(0, len(categories), size=n_unique)
+    descriptions = []
+    for category_id in category_ids:
+        words = CATEGORY_WORDS[categories[category_id]]
+        n_words = rng.integers(1, 4)
+        tokens = [BRANDS[rng.integers(len(BRANDS))]]
+        for _ in range(n_words):
+            if rng.random() < noise:
+                other = CATEGORY_WORDS[categories[rng.integers(len(categories))]]
+                tokens.append(other[rng.integers(len(other))])
+            else:
+                tokens.append(words[rng.integers(len(words))])
+        tokens.append(SHARED_WORDS[rng.integers(len(SHARED_WORDS))])
+        tokens.append(SIZES[rng.integers(len(SIZES))])
+        descriptions.append(" ".join(tokens))
+
+    rows = rng.integers(0, n_unique, size=n_rows) if n_unique < n_rows else None
+    descriptions = np.array(descriptions, dtype=object)
+    labels = np.array(categories, dtype=object)[category_ids]
+    if rows is not None:
+        descriptions, labels = descriptions[rows], labels[rows]
+    return pd.DataFrame({"product_description": descriptions, "category": labels})
+
+
+def train_benchmark_model(
+    workdir, n_rows: int = 50_000, seed: int = 0, **params
+) -> tuple[str, str]:
+    """Train a small FastText model on synthetic data for benchmarking.
+
+    Parameters
+    ----------
+    workdir : Path
+        Directory receiving the training file, model and label encoder.
+    n_rows : int
+        Number of synthetic training rows.
+    seed : int
+        Random seed of the synthetic data.
+    **params
+        FastText training parameters overriding the defaults.
+
+    Returns
+    -------
+    tuple[str, str]
+        Paths of the trained model and of the fitted label encoder.
+
+    """
+    import joblib
+    from sklearn.preprocessing import LabelEncoder
+
+    from pos_classifier.data.preprocessing import (
+        clean_text,
+        prepare_data_for_fasttext,
+    )
+    from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+
+    df = generate_pos_data(n_rows, seed=seed)
+    df["product_description"] = df["product_description"].apply(clean_text)
+    label_encoder = LabelEncoder()
+    df["label"] = label_encoder.fit_transform(df["category"])
+
+    train_file = str(workdir / "train.txt")
+    model_path = str(workdir / "model.bin")
+    encoder_path = str(workdir / "label_encoder.pkl")
+    prepare_data_for_fasttext(df, train_file)
+    joblib.dump(label_encoder, encoder_path)
+
+    model_params = {
+        "epoch": 5,
+        "lr": 0.5,
+        "wordNgrams": 2,
+        "verbose": 0,
+        "thread": os.cpu_count() or 1,
+    }
+    model_params.update(params)
+    model_params.update({"input": train_file, "model_location": model_path})
+    FastTextModelWrapper(model_params).train()
+    return model_path, encoder_path
+
+
+def write_pos_csv(
+    path, n_rows: int, seed: int = 0, chunksize: int = 1_000_000, **kwargs
+) -> None:
+    """Write synthetic rows to a CSV file shaped like Training_Data.csv.
+
+    Rows are generated and written one chunk at a time, so the file can be
+    larger than the available memory.
+
+    Parameters
+    ----------
+    path : Path
+        Output CSV path.
+    n_rows : int
+        Number of rows to write.
+    seed : int
+        Random seed; chunk i uses seed + i.
+    chunksize : int
+        Number of rows generated at once.
+    **kwargs
+        Extra arguments passed to `generate_pos_data`.
+
+    """
+    for i, start in enumerate(range(0, n_rows, chunksize)):
+        chunk = generate_pos_data(min(chunksize, n_rows - start), seed + i, **kwargs)
+        chunk.columns = ["Product Description", "Category"]
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
@@ -0,0 +1,219 @@
+"""Cross-validation file.
+
+This module provides parallel k-fold cross-validation of the FastText experiment grid.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mlflow
+import numpy as np
+
+from run_experiment import param_combinations, param_keys
+from pos_classifier.config.logging_config import setup_logging
+from pos_classifier.data.data_loader import load_data
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.data.preprocessing import (
+    preprocess_data,
+    read_fasttext_file,
+    write_kfold_files,
+)
+from pos_classifier.model.evaluation import flatten_metrics
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.train import load_params_section
+from pos_classifier.config.config import (
+    EXPERIMENT_CV_FOLDS,
+    EXPERIMENT_FOLDS_DIR,
+    EXPERIMENT_MODEL_PATH,
+    EXPERIMENT_THREAD_BUDGET,
+    MLFLOW_EXPERIMENT_NAME,
+    TRAIN_DATA_PATH,
+)
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+def prepare_folds(n_splits: int = EXPERIMENT_CV_FOLDS) -> list[tuple[str, str]]:
+    """Preprocess the training data and write the fold files once for all trials.
+
+    Parameters
+    ----------
+    n_splits : int
+        Number of folds.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Train and test file paths of every fold.
+
+    """
+    logger.info(f"Writing {n_splits} cross-validation folds")
+    df = load_data(TRAIN_DATA_PATH)
+    n_workers = load_params_section("preprocessing").get("n_workers", 1)
+    df = preprocess_data(df, n_workers=n_workers)
+    return write_kfold_files(df, EXPERIMENT_FOLDS_DIR, n_splits)
+
+
+def plan_concurrency(n_jobs: int, thread_budget: int) -> tuple[int, int]:
+    """Split a CPU thread budget between concurrent fold jobs.
+
+    Parameters
+    ----------
+    n_jobs : int
+        Number of (trial, fold) jobs to run.
+    thread_budget : int
+        Total number of FastText threads allowed at once.
+
+    Returns
+    -------
+    tuple[int, int]
+        Number of concurrent jobs and number of FastText threads per job.
+
+    """
+    concurrent = max(1, min(n_jobs, thread_budget))
+    return concurrent, max(1, thread_budget // concurrent)
+
+
+def train_and_evaluate_fold(params: dict, class_names: list[str]) -> dict:
+    """Train a model on one fold, evaluate it on the held-out file and delete it.
+
+    The held-out rows are evaluated in memory, like the trials of
+    `run_experiment.run_experiments`.
+
+    Parameters
+    ----------
+    params : dict
+        FastText parameters with 'input', 'test_input' and 'model_location'.
+    class_names : list[str]
+        Category name of every encoded label.
+
+    Returns
+    -------
+    dict
+        Scalar metrics of `FastTextModelWrapper.evaluate_dataframe`, including
+        per-class metrics, plus 'train_time'.
+
+    """
+    start = time.perf_counter()
+    model = FastTextModelWrapper(params)
+    model.train()
+    train_time = time.perf_counter() - start
+    report = model.evaluate_dataframe(
+        read_fasttext_file(params["test_input"]), class_names
+    )
+    metrics = flatten_metrics(report)
+    model.clear_model()
+    os.remove(params["model_location"])
+    return {**metrics, "train_time": train_time}
+
+
+def summarize_folds(fold_metrics: list[dict]) -> dict:
+    """Aggregate per-fold metrics into their mean and standard deviation.
+
+    Parameters
+    ----------
+    fold_metrics : list[dict]
+        Metrics of every fold.
+
+    Returns
+    -------
+    dict
+        'cv_mean_<metric>' and 'cv_std_<metric>' for every metric.
+
+    """
+    summary = {}
+    for key in fold_metrics[0]:
+        values = np.array([metrics[key] for metrics in fold_metrics], dtype=float)
+        summary[f"cv_mean_{key}"] = float(values.mean())
+        summary[f"cv_std_{key}"] = float(values.std())
+    return summary
+
+
+def run_cross_validation(
+    folds: list[tuple[str, str]], thread_budget: int = EXPERIMENT_THREAD_BUDGET
+) -> list[dict]:
+    """Cross-validate every hyperparameter combination with concurrent fold jobs.
+
+    All (trial, fold) jobs share one process pool sized from the thread budget,
+    so folds of different trials run side by side and the fold files are reused
+    by every trial. Each trial logs its mean/std metrics and per-fold metrics
+    (as steps) to one MLflow run.
+
+    Parameters
+    ----------
+    folds : list[tuple[str, str]]
+        Train and test file paths of every fold, from `prepare_folds`.
+    thread_budget : int
+        Total number of FastText threads allowed at once.
+
+    Returns
+    -------
+    list[dict]
+        Parameters and cross-validation summary of every trial.
+
+    """
+    class_names = list(load_label_encoder().classes_)
+    if not mlflow.get_experiment_by_name(MLFLOW_EXPERIMENT_NAME):
+        mlflow.create_experiment(MLFLOW_EXPERIMENT_NAME)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+    os.makedirs(EXPERIMENT_MODEL_PATH, exist_ok=True)
+
+    trials = [dict(zip(param_keys, combo)) for combo in param_combinations]
+    concurrent, threads = plan_concurrency(len(trials) * len(folds), thread_budget)
+    logger.info(
+        f"Cross-validating {len(trials)} trials on {len(folds)} folds: "
+        f"{concurrent} concurrent jobs with {threads} threads each"
+    )
+
+    results = []
+    start = time.perf_counter()
+    with (
+        tempfile.TemporaryDirectory(dir=EXPERIMENT_MODEL_PATH) as model_dir,
+        ProcessPoolExecutor(max_workers=concurrent) as executor,
+    ):
+        futures = [
+            [
+                executor.submit(
+                    train_and_evaluate_fold,
+                    {
+                        **trial,
+                        "input": train_path,
+                        "test_input": test_path,
+                        "thread": threads,
+                        "verbose": 0,
+                        "model_location": os.path.join(
+                            model_dir, f"trial{trial_index}_fold{fold_index}.bin"
+                        ),
+                    },
+                    class_names,
+                )
+                for fold_index, (train_path, test_path) in enumerate(folds)
+            ]
+            for trial_index, trial in enumerate(trials)
+        ]
+
+        for trial, trial_futures in zip(trials, futures):
+            fold_metrics = [future.result() for future in trial_futures]
+            summary = summarize_folds(fold_metrics)
+            logger.info(f"Trial {trial}: {summary}")
+            with mlflow.start_run(run_name="FastText Cross-Validation"):
+                mlflow.log_params({**trial, "cv_folds": len(folds)})
+                mlflow.log_metrics(summary)
+                for fold_index, metrics in enumerate(fold_metrics):
+                    mlflow.log_metrics(
+                        {f"fold_{key}": value for key, value in metrics.items()},
+                        step=fold_index,
+                    )
+            results.append({**trial, **summary})
+
+    logger.info(f"Cross-validation finished in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+if __name__ == "__main__":
+    run_cross_validation(prepare_folds())
@@ -6,13 +6,21 @@ This module provides MLflow experiments with FastText model for POS classificati
 import mlflow
 import os
 import logging
+import time
 from itertools import product
 from mlflow.models.signature import ModelSignature
 from mlflow.types.schema import Schema, ColSpec
 
-from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.fasttext_wrapper import (
+    FastTextModelWrapper,
+    FastTextPyfuncModel,
+)
 from pos_classifier.config.logging_config import setup_logging
+from pos_classifier.train import build_compactor, load_params_section
 from pos_classifier.data.data_loader import load_data
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.model.evaluation import flatten_metrics, metric_names
+from pos_classifier.monitoring.telemetry import RunTelemetry
 from pos_classifier.data.preprocessing import (
     preprocess_data,
     prepare_data_for_fasttext,
@@ -20,8 +28,11 @@ from pos_classifier.data.preprocessing import (
 )
 from pos_classifier.config.config import (
     FASTTEXT_TRAIN_FILE,
-    FASTTEXT_TEST_FILE,
+    EXPERIMENT_KEEP_TOP_N,
     EXPERIMENT_MODEL_PATH,
+    EXPERIMENT_REGISTERED_MODEL_NAME,
+    EXPERIMENT_SELECTION_METRIC,
+    LABEL_ENCODER_PATH,
     MLFLOW_TRACKING_URI,
     MLFLOW_EXPERIMENT_NAME,
     TRAIN_DATA_PATH,
@@ -38,38 +49,153 @@ param_keys = list(experiment_params.keys())
 
 
 def prepare_data_for_experiment():
-    """Preprocess, split and prepare data for experiments."""
+    """Preprocess, split and prepare data for experiments.
+
+    Stage timings are logged and written to a JSON report under TELEMETRY_DIR.
+
+    Returns
+    -------
+    pd.DataFrame
+        Preprocessed test split, evaluated in memory by `run_experiments`.
+
+    """
     logging.info("Preparing data for experiment")
-    df = load_data(TRAIN_DATA_PATH)
-    df = preprocess_data(df)
+    telemetry = RunTelemetry("experiment_data")
+    preprocessing = load_params_section("preprocessing")
+    n_workers = preprocessing.get("n_workers", 1)
+    compactor = build_compactor(preprocessing)
+    with telemetry.stage("load"):
+        df = load_data(TRAIN_DATA_PATH)
+    with telemetry.stage("clean"):
+        df = preprocess_data(df, n_workers=n_workers)
     train_df, test_df = split_data(df)
-    prepare_data_for_fasttext(train_df, FASTTEXT_TRAIN_FILE)
-    prepare_data_for_fasttext(test_df, FASTTEXT_TEST_FILE)
+    with telemetry.stage("write_fasttext_file"):
+        prepare_data_for_fasttext(train_df, FASTTEXT_TRAIN_FILE, compactor)
+    telemetry.record(n_workers=n_workers, train_lines=len(train_df))
+    if compactor is not None:
+        telemetry.record(**compactor.report())
+    telemetry.log()
+    telemetry.write_report()
+    return test_df
+
+
+def retain_top_models(retained: list[dict], trial: dict, keep_top_n: int) -> list[dict]:
+    """Add a finished trial to the retained ones and delete model files outside the top N.
 
+    Parameters
+    ----------
+    retained : list[dict]
+        Retained trials, best first, with 'score', 'run_id' and 'model_location'.
+    trial : dict
+        Finished trial with the same keys.
+    keep_top_n : int
+        Number of model files to keep on disk.
 
-def run_experiments():
+    Returns
+    -------
+    list[dict]
+        Retained trials, best first.
+
+    """
+    ranked = sorted(retained + [trial], key=lambda t: t["score"], reverse=True)
+    keep_top_n = max(1, keep_top_n)
+    for dropped in ranked[keep_top_n:]:
+        if os.path.exists(dropped["model_location"]):
+            os.remove(dropped["model_location"])
+    return ranked[:keep_top_n]
+
+
+def log_winner_model(run_id: str, model_location: str):
+    """Log the winning trial's model as a pyfunc artifact of its run and register it.
+
+    Parameters
+    ----------
+    run_id : str
+        MLflow run of the winning trial.
+    model_location : str
+        Path of the winning FastText model file.
+
+    """
+    input_schema = Schema([ColSpec("string", "product_description")])
+    output_schema = Schema(
+        [ColSpec("string", "predicted_label"), ColSpec("float", "probability")]
+    )
+    signature = ModelSignature(inputs=input_schema, outputs=output_schema)
+
+    with mlflow.start_run(run_id=run_id):
+        mlflow.set_tag("winner", "true")
+        mlflow.pyfunc.log_model(
+            artifact_path="fasttext_model",
+            artifacts={
+                "fasttext_model_path": model_location,
+                "label_encoder_path": str(LABEL_ENCODER_PATH),
+            },
+            python_model=FastTextPyfuncModel(),
+            signature=signature,
+            registered_model_name=EXPERIMENT_REGISTERED_MODEL_NAME,
+        )
+
+
+def run_experiments(
+    test_df,
+    keep_top_n: int = EXPERIMENT_KEEP_TOP_N,
+    selection_metric: str = EXPERIMENT_SELECTION_METRIC,
+) -> dict:
     """Run a series of FastText training experiments with different hyperparameter combinations, log results to MLflow, and register the best model.
 
     The function:
     - Creates or sets the MLflow experiment.
     - Iterates over predefined combinations of hyperparameters.
     - Trains a FastText model for each combination.
-    - Logs training parameters, metrics, and the model to MLflow.
-    - Registers the model with input/output schema and signature.
+    - Evaluates it on the in-memory test split, with per-class metrics, the
+      confusion matrix and a threshold sweep curve.
+    - Logs training parameters, metrics and telemetry (stage timings,
+      words/sec/thread, peak RSS, model size) to MLflow; model files are only kept
+      on disk for the top N trials by the selection metric.
+    - Logs the winner's model with input/output schema and signature to its run
+      and registers it.
+
+    Parameters
+    ----------
+    test_df : pd.DataFrame
+        Preprocessed test split with 'product_description' and 'label'.
+    keep_top_n : int, optional
+        Number of model files to keep in EXPERIMENT_MODEL_PATH.
+    selection_metric : str, optional
+        Logged metric used to rank the trials, higher is better.
+
+    Returns
+    -------
+    dict
+        The winning trial with its 'score', 'run_id' and 'model_location'.
+
+    Raises
+    ------
+    ValueError
+        If `selection_metric` is not one of the logged metrics, before any
+        trial is trained.
 
     """
+    class_names = list(load_label_encoder().classes_)
+    valid_metrics = metric_names(class_names)
+    if selection_metric not in valid_metrics:
+        raise ValueError(
+            f"Unknown selection metric '{selection_metric}', "
+            f"expected one of: {', '.join(valid_metrics)}"
+        )
     if not mlflow.get_experiment_by_name(MLFLOW_EXPERIMENT_NAME):
         mlflow.create_experiment(MLFLOW_EXPERIMENT_NAME)
     mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
     os.makedirs(EXPERIMENT_MODEL_PATH, exist_ok=True)
 
+    retained = []
+    model_bytes = 0
     for combo in param_combinations:
         logging.info(f"Running experiment with parameters: {combo[0]}")
         params = dict(zip(param_keys, combo))
         params.update(
             {
                 "input": str(FASTTEXT_TRAIN_FILE),
-                "test_input": str(FASTTEXT_TEST_FILE),
                 "verbose": 2,
                 "model_location": f"{EXPERIMENT_MODEL_PATH}/fasttext_model_e{params['epoch']}_lr{params['lr']}_wn{params['word_ngrams']}.bin",
             }
@@ -79,28 +205,57 @@ def run_experiments():
             mlflow.set_tag("run_id", run.info.run_id)
             mlflow.log_params(params)
 
+            telemetry = RunTelemetry("experiment_trial")
             model = FastTextModelWrapper(params)
-            model_location = model.train()
+            model_location = model.train(telemetry)
 
-            metrics = model.evaluate(params["test_input"])
+            with telemetry.stage("evaluate"):
+                report = model.evaluate_dataframe(test_df, class_names)
+            metrics = flatten_metrics(report)
             mlflow.log_metrics(metrics)
+            curve = report["threshold_curve"]
+            for i, threshold in enumerate(curve["threshold"]):
+                mlflow.log_metrics(
+                    {
+                        f"sweep_{key}": curve[key][i]
+                        for key in ("coverage", "precision", "recall")
+                    },
+                    step=round(threshold * 100),
+                )
+            mlflow.log_dict(report, "evaluation/report.json")
+            telemetry.log()
+            telemetry.log_to_mlflow()
+            model.clear_model()
+
+        model_bytes += os.path.getsize(model_location)
+        retained = retain_top_models(
+            retained,
+            {
+                "score": metrics[selection_metric],
+                "run_id": run.info.run_id,
+                "model_location": model_location,
+            },
+            keep_top_n,
+        )
 
-            input_schema = Schema([ColSpec("string", "product_description")])
-            output_schema = Schema(
-                [ColSpec("string", "predicted_label"), ColSpec("float", "probability")]
-            )
-            signature = ModelSignature(inputs=input_schema, outputs=output_schema)
+    winner = retained[0]
+    logging.info(
+        f"Best trial {winner['run_id']} with {selection_metric}={winner['score']:.4f}"
+    )
+    start = time.perf_counter()
+    log_winner_model(winner["run_id"], winner["model_location"])
+    log_time = time.perf_counter() - start
 
-            model.clear_model()
-            mlflow.pyfunc.log_model(
-                artifact_path="fasttext_model",
-                artifacts={"fasttext_model_path": model_location},
-                python_model=model,
-                signature=signature,
-                registered_model_name="fasttext_pyfunc_model",
-            )
+    kept_bytes = sum(os.path.getsize(t["model_location"]) for t in retained)
+    skipped = len(param_combinations) - 1
+    logging.info(
+        f"Kept {len(retained)} of {len(param_combinations)} model files "
+        f"({kept_bytes / 2**20:.1f} of {model_bytes / 2**20:.1f} MB). "
+        f"Skipped {skipped} model uploads and registrations "
+        f"(~{skipped * log_time:.1f}s at {log_time:.1f}s per logged model)."
+    )
+    return winner
 
 
 if __name__ == "__main__":
-    prepare_data_for_experiment()
-    run_experiments()
+    run_experiments(prepare_data_for_experiment())
@@ -18,6 +18,7 @@ SOURCE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 TRAIN_DATA_PATH = DATA_DIR / "Training_Data.csv"
 QUERY_VAL_DATA_PATH = DATA_DIR / "Query_and_Validation_Data.csv"
+FEEDBACK_DB_PATH = DATA_DIR / "feedback.db"
 
 # Processed data
 FASTTEXT_TRAIN_FILE = DATA_DIR / "fasttext_train.txt"
@@ -25,40 +26,90 @@ FASTTEXT_TEST_FILE = DATA_DIR / "fasttext_test.txt"
 
 # Model paths
 MODEL_DIR = BASE_DIR / "artifacts"
-FASTTEXT_MODEL_PATH = MODEL_DIR / "fasttext_model.bin"
-LABEL_ENCODER_PATH = MODEL_DIR / "label_encoder.pkl"
+FASTTEXT_MODEL_PATH = Path(
+    os.getenv("FASTTEXT_MODEL_PATH", MODEL_DIR / "fasttext_model.bin")
+)
+LABEL_ENCODER_PATH = Path(
+    os.getenv("LABEL_ENCODER_PATH", MODEL_DIR / "label_encoder.pkl")
+)
+DRIFT_REFERENCE_PATH = Path(
+    os.getenv("DRIFT_REFERENCE_PATH", MODEL_DIR / "drift_reference.json")
+)
+SIMILARITY_INDEX_DIR = Path(
+    os.getenv("SIMILARITY_INDEX_DIR", MODEL_DIR / "similarity_index")
+)
 
 # Output paths
 OUTPUT_DIR = BASE_DIR / "outputs"
 PREDICTION_PATH = OUTPUT_DIR / "predictions.csv"
+PREDICTION_CACHE_PATH = OUTPUT_DIR / "prediction_cache.db"
+PREDICTION_OUTPUT_FORMAT = os.getenv("PREDICTION_OUTPUT_FORMAT", "csv")
+PREDICTION_TOP_K = int(os.getenv("PREDICTION_TOP_K", "1"))
+PREDICTION_ROW_GROUP_SIZE = int(os.getenv("PREDICTION_ROW_GROUP_SIZE", "100000"))
 
 # Logging paths
 LOG_DIR = BASE_DIR / "logs"
 LOG_PATH = LOG_DIR / "app.log"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+TELEMETRY_DIR = LOG_DIR / "telemetry"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", LOG_DIR / "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
 
 # Config paths
 CONFIG_DIR = SOURCE_DIR / "config"
 PARAMS_PATH = CONFIG_DIR / "params.yaml"
 
+# API
+API_WARMUP_DATA_PATH = Path(os.getenv("API_WARMUP_DATA_PATH", QUERY_VAL_DATA_PATH))
+API_WARMUP_SAMPLES = int(os.getenv("API_WARMUP_SAMPLES", "200"))
+API_PROFILING = os.getenv("API_PROFILING", "false").lower() == "true"
+API_PROFILING_SAMPLE_RATE = float(os.getenv("API_PROFILING_SAMPLE_RATE", "0.0"))
+CANDIDATE_MODEL_PATH = os.getenv("CANDIDATE_MODEL_PATH")
+CANDIDATE_LABEL_ENCODER_PATH = Path(
+    os.getenv("CANDIDATE_LABEL_ENCODER_PATH", LABEL_ENCODER_PATH)
+)
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "100"))
+SIMILARITY_N_PROBE = int(os.getenv("SIMILARITY_N_PROBE", "8"))
+
 # Monitoring paths
 APP_DIR = BASE_DIR / "app"
 MONITORING_DIR = APP_DIR / "monitoring"
 MONITORING_PATH = MONITORING_DIR / "monitor.json"
+METRICS_DB_PATH = MONITORING_DIR / "metrics.db"
+METRICS_STREAM_INTERVAL = float(os.getenv("METRICS_STREAM_INTERVAL", "1.0"))
+METRICS_STREAM_URLS = [
+    url for url in os.getenv("METRICS_STREAM_URLS", "").split(",") if url.strip()
+]
 
 # Experiments
 MLFLOW_TRACKING_URI = "http://127.0.0.1:5001/"
 MLFLOW_EXPERIMENT_NAME = "POS Classification"
+TRAINING_MLFLOW_LOGGING = (
+    os.getenv("TRAINING_MLFLOW_LOGGING", "false").lower() == "true"
+)
+TRAINING_PROFILING = os.getenv("TRAINING_PROFILING", "false").lower() == "true"
 EXPERIMENT_DIR = BASE_DIR / "experiments"
 EXPERIMENT_MODEL_PATH = EXPERIMENT_DIR / "experiment_models"
+EXPERIMENT_FOLDS_DIR = DATA_DIR / "folds"
+EXPERIMENT_KEEP_TOP_N = int(os.getenv("EXPERIMENT_KEEP_TOP_N", "3"))
+EXPERIMENT_SELECTION_METRIC = os.getenv("EXPERIMENT_SELECTION_METRIC", "f1")
+EXPERIMENT_REGISTERED_MODEL_NAME = "fasttext_pyfunc_model"
+EXPERIMENT_CV_FOLDS = int(os.getenv("EXPERIMENT_CV_FOLDS", "5"))
+EXPERIMENT_THREAD_BUDGET = int(
+    os.getenv("EXPERIMENT_THREAD_BUDGET", str(os.cpu_count() or 1))
+)
 
 
-def get_prediction_output_path() -> Path:
+def get_prediction_output_path(extension: str = ".csv") -> Path:
     """Generate a timestamped file path for saving batch prediction results.
 
+    Args:
+        extension (str): File extension of the output format. Defaults to ".csv".
+
     Returns:
-        Path: A Path object pointing to the output CSV file within the OUTPUT_DIR.
+        Path: A Path object pointing to the output file within the OUTPUT_DIR.
 
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return OUTPUT_DIR / f"predictions_{timestamp}.csv"
+    return OUTPUT_DIR / f"predictions_{timestamp}{extension}"
@@ -1,11 +1,30 @@
 """Data loader file.
 
-This module provides method for data loading using .csv file.
+This module provides methods for data loading using .csv file.
 """
 
+from collections.abc import Iterator
+
 import pandas as pd
 
 
+def normalize_column_name(name: str) -> str:
+    """Convert a raw column name to the snake case name used in the pipeline.
+
+    Parameters
+    ----------
+    name : str
+        Raw column name (e.g.: 'Product Description')
+
+    Returns
+    -------
+    str
+        Normalized column name (e.g.: 'product_description')
+
+    """
+    return name.lower().replace(" ", "_")
+
+
 def load_data(path: str) -> pd.DataFrame:
     """Load the data and convert the column names.
 
@@ -20,5 +39,34 @@ def load_data(path: str) -> pd.DataFrame:
         Loaded data
 
     """
-    df = pd.read_csv(path).rename(columns=lambda x: x.lower().replace(" ", "_"))
+    df = pd.read_csv(path).rename(columns=normalize_column_name)
     return df
+
+
+def load_data_chunks(
+    path: str, chunksize: int = 100_000, columns: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """Lazily load the data in chunks and convert the column names.
+
+    Parameters
+    ----------
+    path : str
+        Path to data
+    chunksize : int
+        Number of rows per chunk
+    columns : list[str], optional
+        Normalized names of the columns to read. Defaults to all columns.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Next chunk of the data
+
+    """
+
+    def usecols(name: str) -> bool:
+        return columns is None or normalize_column_name(name) in columns
+
+    with pd.read_csv(path, chunksize=chunksize, usecols=usecols) as reader:
+        for chunk in reader:
+            yield chunk.rename(columns=normalize_column_name)
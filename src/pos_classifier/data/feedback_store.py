@@ -0,0 +1,148 @@
+"""Feedback store file.
+
+This module provides an append-only SQLite store of human verified labels.
+Every verified (description, category) pair received by the API is kept, and a
+retraining watermark records which labels were already used by a retrain.
+"""
+
+import os
+import sqlite3
+import time
+
+from contextlib import closing
+
+import pandas as pd
+
+from pos_classifier.config.config import FEEDBACK_DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    product_description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    predicted_category TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class FeedbackStore:
+    """Append-only store of human verified labels with a retraining watermark."""
+
+    def __init__(self, db_path=FEEDBACK_DB_PATH):
+        """Initialize the store and create the schema if needed.
+
+        Parameters
+        ----------
+        db_path : str or Path
+            Path to the SQLite database file.
+
+        """
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def add(
+        self,
+        descriptions: list[str],
+        categories: list[str],
+        predicted_categories: list[str] | None = None,
+    ) -> int:
+        """Append verified labels, skipping rows without a description or category.
+
+        Parameters
+        ----------
+        descriptions : list[str]
+            Raw product descriptions.
+        categories : list[str]
+            Human verified category per description.
+        predicted_categories : list[str], optional
+            Category predicted by the model per description.
+
+        Returns
+        -------
+        int
+            Number of appended labels.
+
+        """
+        if predicted_categories is None:
+            predicted_categories = [None] * len(descriptions)
+        now = time.time()
+        rows = [
+            (now, str(description), str(category), predicted)
+            for description, category, predicted in zip(
+                descriptions, categories, predicted_categories
+            )
+            if not pd.isna(description) and not pd.isna(category)
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO feedback (ts, product_description, category, predicted_category) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def watermark(self) -> int:
+        """Return the id of the last label used by a retrain, 0 if none was."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'retrained_up_to'"
+            ).fetchone()
+        return row[0] if row else 0
+
+    def count_new(self) -> int:
+        """Return the number of labels appended after the watermark."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM feedback WHERE id > ?", (self.watermark(),)
+            ).fetchone()[0]
+
+    def fetch(self, after_id: int = 0) -> pd.DataFrame:
+        """Fetch labels appended after an id, keeping the latest label per description.
+
+        Parameters
+        ----------
+        after_id : int
+            Only labels with a greater id are returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            'id', 'product_description' and 'category', ordered by id.
+
+        """
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                "SELECT id, product_description, category FROM feedback "
+                "WHERE id > ? ORDER BY id",
+                conn,
+                params=(after_id,),
+            )
+        return df.drop_duplicates("product_description", keep="last").reset_index(
+            drop=True
+        )
+
+    def mark_retrained(self, up_to_id: int):
+        """Move the watermark after a successful retrain.
+
+        Parameters
+        ----------
+        up_to_id : int
+            Id of the last label used by the retrain.
+
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('retrained_up_to', ?)",
+                (up_to_id,),
+            )
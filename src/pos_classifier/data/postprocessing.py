@@ -4,14 +4,21 @@ This module provides methods for postprocessing data from FastText model.
 """
 
 import joblib
+import numpy as np
 import os
+import pandas as pd
 
 from pos_classifier.config.config import LABEL_ENCODER_PATH
 
 
-def load_label_encoder() -> joblib:
+def load_label_encoder(path: str = LABEL_ENCODER_PATH) -> joblib:
     """Load the LabelEncoder from LABEL_ENCODER_PATH.
 
+    Parameters
+    ----------
+    path : str, optional
+        Path to the encoder file. Defaults to LABEL_ENCODER_PATH.
+
     Returns
     -------
     LabelEncoder
@@ -26,15 +33,13 @@ def load_label_encoder() -> joblib:
         If the file is not a .pkl file.
 
     """
-    if not os.path.exists(LABEL_ENCODER_PATH):
-        raise FileNotFoundError(
-            f"Label encoder file not found at: {LABEL_ENCODER_PATH}"
-        )
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Label encoder file not found at: {path}")
 
-    if not str(LABEL_ENCODER_PATH).endswith(".pkl"):
+    if not str(path).endswith(".pkl"):
         raise ValueError("Label encoder file must be a .pkl file.")
 
-    return joblib.load(LABEL_ENCODER_PATH)
+    return joblib.load(path)
 
 
 def decode_fasttext_label(predicted_label: list[str]) -> str:
@@ -55,3 +60,81 @@ def decode_fasttext_label(predicted_label: list[str]) -> str:
     label_id = predicted_label[0].replace("__label__", "")
     predicted_class = label_encoder.inverse_transform([int(label_id)])[0]
     return predicted_class
+
+
+def decode_fasttext_labels(
+    predicted_labels: list[list[str]], label_encoder
+) -> np.ndarray:
+    """Decode the top FastText labels of a batch back to original categories.
+
+    Parameters
+    ----------
+    predicted_labels : list[list[str]]
+        FastText labels per input text, as returned by a batched prediction
+    label_encoder : LabelEncoder
+        Encoder fitted during preprocessing
+
+    Returns
+    -------
+    np.ndarray
+        Original category label per input text
+
+    """
+    prefix_length = len("__label__")
+    label_ids = np.fromiter(
+        (int(labels[0][prefix_length:]) for labels in predicted_labels),
+        dtype=np.int64,
+        count=len(predicted_labels),
+    )
+    return label_encoder.inverse_transform(label_ids)
+
+
+def decode_fasttext_top_k(
+    predicted_labels: list[list[str]], probabilities, label_encoder, k: int
+) -> pd.DataFrame:
+    """Decode the top-k FastText labels of a batch back to original categories.
+
+    Parameters
+    ----------
+    predicted_labels : list[list[str]]
+        Up to k FastText labels per input text, as returned by a batched prediction
+    probabilities : list[np.ndarray]
+        Probability of each label per input text
+    label_encoder : LabelEncoder
+        Encoder fitted during preprocessing
+    k : int
+        Number of ranks to decode
+
+    Returns
+    -------
+    pd.DataFrame
+        'predicted_category' and 'probability' for the first rank and
+        'top<i>_category' and 'top<i>_probability' for ranks 2 to k; ranks the
+        model did not return are left empty
+
+    """
+    prefix_length = len("__label__")
+    classes = np.append(label_encoder.classes_.astype(object), None)
+    columns = {}
+    for rank in range(k):
+        label_ids = np.fromiter(
+            (
+                int(labels[rank][prefix_length:]) if len(labels) > rank else -1
+                for labels in predicted_labels
+            ),
+            dtype=np.int64,
+            count=len(predicted_labels),
+        )
+        rank_probabilities = np.fromiter(
+            (p[rank] if len(p) > rank else np.nan for p in probabilities),
+            dtype=np.float64,
+            count=len(probabilities),
+        )
+        names = (
+            ("predicted_category", "probability")
+            if rank == 0
+            else (f"top{rank + 1}_category", f"top{rank + 1}_probability")
+        )
+        columns[names[0]] = classes[label_ids]
+        columns[names[1]] = rank_probabilities
+    return pd.DataFrame(columns)
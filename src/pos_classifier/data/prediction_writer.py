@@ -0,0 +1,208 @@
+"""Prediction writer file.
+
+This module provides the writer of batch prediction output. Predictions are
+written as CSV, Parquet or Arrow IPC in row groups, so a large batch never has
+to be converted in one piece, and the columnar formats keep categories
+dictionary-encoded and probabilities as float32.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def top_k_columns(top_k: int) -> list[str]:
+    """Return the names of the extra columns holding the top-k predictions.
+
+    Parameters
+    ----------
+    top_k : int
+        Number of predictions per row; the first one is 'predicted_category'
+        and 'probability'.
+
+    Returns
+    -------
+    list[str]
+        'top<i>_category' and 'top<i>_probability' for ranks 2 to top_k.
+
+    """
+    return [
+        f"top{rank}_{field}"
+        for rank in range(2, top_k + 1)
+        for field in ("category", "probability")
+    ]
+
+
+def prediction_schema(categories, top_k: int = 1) -> pa.Schema:
+    """Build the Arrow schema of batch prediction output.
+
+    Parameters
+    ----------
+    categories : array-like
+        All category names, e.g. `label_encoder.classes_`.
+    top_k : int, optional
+        Number of predictions per row. Defaults to 1.
+
+    Returns
+    -------
+    pa.Schema
+        Description as string, categories as dictionary<int16, string> and
+        probabilities as float32.
+
+    """
+    category_type = pa.dictionary(pa.int16(), pa.string())
+    fields = [
+        pa.field("product_description", pa.string()),
+        pa.field("predicted_category", category_type),
+        pa.field("probability", pa.float32()),
+    ]
+    for name in top_k_columns(top_k):
+        dtype = category_type if name.endswith("_category") else pa.float32()
+        fields.append(pa.field(name, dtype))
+    return pa.schema(fields, metadata={"categories": "\n".join(map(str, categories))})
+
+
+class PredictionWriter:
+    """Write batch predictions to CSV, Parquet or Arrow IPC in row groups."""
+
+    def __init__(
+        self,
+        path,
+        categories,
+        output_format: str = "parquet",
+        top_k: int = 1,
+        row_group_size: int = 100_000,
+    ):
+        """Initialize the writer; the file is created by the first `write`.
+
+        Parameters
+        ----------
+        path : str or Path
+            Output file.
+        categories : array-like
+            All category names, so every row group shares one dictionary.
+        output_format : str, optional
+            'csv', 'parquet' or 'arrow'. Defaults to 'parquet'.
+        top_k : int, optional
+            Number of predictions per row. Defaults to 1.
+        row_group_size : int, optional
+            Maximum number of rows per row group. Defaults to 100000.
+
+        Raises
+        ------
+        ValueError
+            If the output format is not supported.
+
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unsupported output format '{output_format}', "
+                f"expected one of {sorted(OUTPUT_FORMATS)}."
+            )
+        self.path = str(path)
+        self.categories = [str(category) for category in categories]
+        self.output_format = output_format
+        self.row_group_size = row_group_size
+        self.schema = prediction_schema(self.categories, top_k)
+        self.rows_written = 0
+        self._writer = None
+
+    def __enter__(self):
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        """Close the writer, or remove the partial file if an error occurred."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _to_table(self, df: pd.DataFrame) -> pa.Table:
+        columns = {}
+        for field in self.schema:
+            values = df[field.name]
+            if pa.types.is_dictionary(field.type):
+                values = pd.Categorical(values, categories=self.categories)
+            columns[field.name] = pa.array(values, type=field.type)
+        return pa.Table.from_pydict(columns, schema=self.schema)
+
+    def _write_group(self, df: pd.DataFrame):
+        if self.output_format == "csv":
+            df[self.schema.names].to_csv(
+                self.path,
+                mode="a" if self.rows_written else "w",
+                header=not self.rows_written,
+                index=False,
+            )
+            return
+        table = self._to_table(df)
+        if self._writer is None:
+            if self.output_format == "parquet":
+                self._writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self._writer = ipc.new_file(self.path, self.schema)
+        if self.output_format == "parquet":
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def write(self, df: pd.DataFrame):
+        """Append predictions to the output file in row groups.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            'product_description', 'predicted_category', 'probability' and the
+            top-k columns of the schema.
+
+        """
+        for start in range(0, len(df), self.row_group_size):
+            self._write_group(df.iloc[start : start + self.row_group_size])
+            self.rows_written += min(self.row_group_size, len(df) - start)
+
+    def close(self):
+        """Finish the file, writing an empty one if no rows were written."""
+        if self.rows_written == 0:
+            self._write_group(pd.DataFrame(columns=self.schema.names))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def abort(self):
+        """Release the open file handle and remove the partially written file."""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            finally:
+                self._writer = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_predictions(path) -> pd.DataFrame:
+    """Read batch prediction output written by `PredictionWriter`.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV, Parquet or Arrow IPC file, recognized by its extension.
+
+    Returns
+    -------
+    pd.DataFrame
+        Predictions, with categorical category columns for columnar files.
+
+    """
+    path = str(path)
+    if path.endswith(OUTPUT_FORMATS["parquet"]):
+        return pq.read_table(path).to_pandas()
+    if path.endswith(OUTPUT_FORMATS["arrow"]):
+        with ipc.open_file(path) as reader:
+            return reader.read_all().to_pandas()
+    return pd.read_csv(path)
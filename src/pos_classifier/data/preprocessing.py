@@ -3,25 +3,45 @@
 This module provides methods for preprocessing data for FastText model.
 """
 
+import os
 import string
 import logging
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+import numpy as np
 import pandas as pd
 import joblib
 
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from nltk.corpus import stopwords
 import nltk
 
 from pos_classifier.config.config import (
     LABEL_ENCODER_PATH,
 )
+from pos_classifier.data.data_loader import load_data_chunks
 
 nltk.download("stopwords")
 
 logger = logging.getLogger(__name__)
 
 
+@cache
+def get_stop_words() -> frozenset[str]:
+    """Load the English stopwords once per process.
+
+    Returns
+    -------
+    frozenset[str]
+        English stopwords from NLTK
+
+    """
+    return frozenset(stopwords.words("english"))
+
+
 def clean_text(text: str) -> str:
     """Clean the text by lowering case, removing punctuation and stopwords.
 
@@ -38,18 +58,73 @@ def clean_text(text: str) -> str:
     """
     text = text.lower()
     text = text.translate(str.maketrans("", "", string.punctuation))
-    stop_words = set(stopwords.words("english"))
+    stop_words = get_stop_words()
     cleaned_text = " ".join([word for word in text.split() if word not in stop_words])
     return cleaned_text
 
 
-def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_texts(texts: pd.Series) -> pd.Series:
+    """Clean a series of texts with `clean_text`.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        Raw texts
+
+    Returns
+    -------
+    pd.Series
+        Cleaned texts with the same index
+
+    """
+    return texts.apply(clean_text)
+
+
+def clean_texts_parallel(
+    texts: pd.Series, n_workers: int = 1, shards_per_worker: int = 4
+) -> pd.Series:
+    """Clean a series of texts, sharding it across a process pool.
+
+    Shards are cleaned independently and concatenated in their original order,
+    so the result is identical to `clean_texts`.
+
+    Parameters
+    ----------
+    texts : pd.Series
+        Raw texts
+    n_workers : int
+        Number of worker processes; 1 cleans in the current process.
+    shards_per_worker : int
+        Number of shards per worker, to balance uneven shards.
+
+    Returns
+    -------
+    pd.Series
+        Cleaned texts with the same index
+
+    """
+    if n_workers <= 1 or len(texts) < n_workers:
+        return clean_texts(texts)
+    n_shards = min(len(texts), n_workers * shards_per_worker)
+    bounds = np.linspace(0, len(texts), n_shards + 1, dtype=int)
+    shards = [texts.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return pd.concat(executor.map(clean_texts, shards))
+
+
+def preprocess_data(
+    df: pd.DataFrame, label_encoder_path: str = LABEL_ENCODER_PATH, n_workers: int = 1
+) -> pd.DataFrame:
     """Preprocess training data and encode labels.
 
     Parameters
     ----------
     df : pd.DataFrame
         Raw training DataFrame
+    label_encoder_path : str, optional
+        Where to save the fitted label encoder. Defaults to LABEL_ENCODER_PATH.
+    n_workers : int, optional
+        Number of processes cleaning the descriptions. Defaults to 1.
 
     Returns
     -------
@@ -57,13 +132,73 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
         Preprocessed DataFrame with encoded labels
 
     """
-    df["product_description"] = df["product_description"].apply(clean_text)
+    df["product_description"] = clean_texts_parallel(
+        df["product_description"], n_workers
+    )
     label_encoder = LabelEncoder()
     df["label"] = label_encoder.fit_transform(df["category"])
-    joblib.dump(label_encoder, LABEL_ENCODER_PATH)
+    joblib.dump(label_encoder, label_encoder_path)
     return df
 
 
+def fit_label_encoder_streaming(
+    data_path: str,
+    chunksize: int = 100_000,
+    label_encoder_path: str = LABEL_ENCODER_PATH,
+) -> LabelEncoder:
+    """Fit the label encoder on the category vocabulary without loading all rows.
+
+    Only the category column is read, one chunk at a time. The classes are the
+    same as the ones `preprocess_data` would find on the full DataFrame.
+
+    Parameters
+    ----------
+    data_path : str
+        Path to the raw training CSV file
+    chunksize : int
+        Number of rows read per chunk
+    label_encoder_path : str, optional
+        Where to save the fitted label encoder. Defaults to LABEL_ENCODER_PATH.
+
+    Returns
+    -------
+    LabelEncoder
+        Label encoder fitted on all categories
+
+    """
+    categories = set()
+    for chunk in load_data_chunks(data_path, chunksize, columns=["category"]):
+        categories.update(chunk["category"].dropna().unique())
+    label_encoder = LabelEncoder().fit(sorted(categories))
+    joblib.dump(label_encoder, label_encoder_path)
+    return label_encoder
+
+
+def preprocess_chunks(
+    chunks: Iterable[pd.DataFrame], label_encoder: LabelEncoder
+) -> Iterator[pd.DataFrame]:
+    """Clean and label-encode raw training chunks lazily.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        Raw training chunks
+    label_encoder : LabelEncoder
+        Encoder fitted on all categories
+
+    Yields
+    ------
+    pd.DataFrame
+        Preprocessed chunk with encoded labels, without unlabeled rows
+
+    """
+    for chunk in chunks:
+        chunk = chunk[chunk["category"].notna()].copy()
+        chunk["product_description"] = clean_texts(chunk["product_description"])
+        chunk["label"] = label_encoder.transform(chunk["category"])
+        yield chunk
+
+
 def split_data(
     df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
@@ -90,7 +225,154 @@ def split_data(
     return train_df, test_df
 
 
-def prepare_data_for_fasttext(df: pd.DataFrame, output_path: str) -> None:
+def write_kfold_files(
+    df: pd.DataFrame, output_dir: str, n_splits: int = 5, random_state: int = 42
+) -> list[tuple[str, str]]:
+    """Write stratified k-fold train and test files in FastText format.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Preprocessed DataFrame
+    output_dir : str
+        Directory receiving 'fold_<i>_train.txt' and 'fold_<i>_test.txt'
+    n_splits : int
+        Number of folds
+    random_state : int
+        Random seed
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Train and test file paths of every fold
+
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    paths = []
+    for i, (train_index, test_index) in enumerate(folds.split(df, df["label"])):
+        train_path = os.path.join(output_dir, f"fold_{i}_train.txt")
+        test_path = os.path.join(output_dir, f"fold_{i}_test.txt")
+        prepare_data_for_fasttext(df.iloc[train_index], train_path)
+        prepare_data_for_fasttext(df.iloc[test_index], test_path)
+        paths.append((train_path, test_path))
+    return paths
+
+
+def read_fasttext_file(path: str) -> pd.DataFrame:
+    """Read every line of a FastText file back into a preprocessed DataFrame.
+
+    Parameters
+    ----------
+    path : str
+        File of '__label__<label> <text>' lines, e.g. a fold test file
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with 'product_description' and encoded 'label', in file order
+
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = pd.Series(f.read().splitlines(), dtype=object)
+    parts = lines[lines.str.startswith("__label__")].str.partition(" ")
+    return pd.DataFrame(
+        {
+            "product_description": parts[2].to_numpy(),
+            "label": parts[0].str[len("__label__") :].astype(np.int64).to_numpy(),
+        }
+    )
+
+
+class CorpusCompactor:
+    """Cap the number of identical training lines across the chunks of a corpus.
+
+    A line holds both the label and the cleaned text, so only exact duplicates
+    within a label are collapsed. The first `max_replicas` occurrences of a line
+    are kept in their original positions and later ones are dropped, so texts
+    repeated up to the cap keep their exact frequency and heavier duplicates
+    keep a capped weight.
+    """
+
+    def __init__(self, max_replicas: int):
+        """Initialize the compactor.
+
+        Parameters
+        ----------
+        max_replicas : int
+            Maximum number of copies of an identical line.
+
+        """
+        self.max_replicas = max(1, max_replicas)
+        self._seen = {}
+        self._labels_in = Counter()
+        self._labels_out = Counter()
+
+    def filter(self, lines: pd.Series) -> pd.Series:
+        """Drop the lines of a chunk that exceed the cap, counting earlier chunks.
+
+        Parameters
+        ----------
+        lines : pd.Series
+            FastText training lines of one chunk
+
+        Returns
+        -------
+        pd.Series
+            Kept lines, in their original order
+
+        """
+        counts = lines.value_counts(sort=False)
+        previous = pd.Series(
+            [self._seen.get(line, 0) for line in counts.index], index=counts.index
+        )
+        occurrence = lines.groupby(lines, sort=False).cumcount() + lines.map(previous)
+        for line, count in counts.items():
+            self._seen[line] = previous[line] + count
+        kept = lines[occurrence.to_numpy() < self.max_replicas]
+
+        self._labels_in.update(
+            lines.str.split(" ", n=1).str[0].value_counts().to_dict()
+        )
+        self._labels_out.update(
+            kept.str.split(" ", n=1).str[0].value_counts().to_dict()
+        )
+        return kept
+
+    def report(self) -> dict:
+        """Return the compaction statistics of the lines filtered so far.
+
+        Returns
+        -------
+        dict
+            Input, output and distinct line counts, the compression ratio and
+            the largest change of a label's share of the corpus.
+
+        """
+        lines_in = sum(self._labels_in.values())
+        lines_out = sum(self._labels_out.values())
+        share_shift = max(
+            (
+                abs(
+                    self._labels_out[label] / lines_out
+                    - self._labels_in[label] / lines_in
+                )
+                for label in self._labels_in
+            ),
+            default=0.0,
+        )
+        return {
+            "compaction_lines_in": lines_in,
+            "compaction_lines_out": lines_out,
+            "compaction_distinct_lines": len(self._seen),
+            "compaction_ratio": lines_in / lines_out if lines_out else 1.0,
+            "compaction_max_label_share_shift": share_shift,
+        }
+
+
+def prepare_data_for_fasttext(
+    df: pd.DataFrame, output_path: str, compactor: CorpusCompactor | None = None
+) -> int:
     """Save data in FastText format.
 
     Parameters
@@ -99,11 +381,192 @@ def prepare_data_for_fasttext(df: pd.DataFrame, output_path: str) -> None:
         DataFrame with 'product_description' and 'label'
     output_path : str
         Output .txt file path for FastText
+    compactor : CorpusCompactor, optional
+        Caps repeated lines; all lines are written if None.
+
+    Returns
+    -------
+    int
+        Number of written lines
 
     """
+    return write_fasttext_chunks([df], output_path, compactor)
+
+
+def format_fasttext_lines(df: pd.DataFrame) -> pd.Series:
+    """Format labeled rows as FastText training lines.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with 'product_description', 'category' and 'label'
+
+    Returns
+    -------
+    pd.Series
+        One '__label__<label> <text>' line per row with a category
+
+    """
+    df = df[df["category"].notna()]
+    text = df["product_description"].str.replace("\n", " ").str.strip()
+    return "__label__" + df["label"].astype(str) + " " + text + "\n"
+
+
+def write_fasttext_chunks(
+    chunks: Iterable[pd.DataFrame],
+    output_path: str,
+    compactor: CorpusCompactor | None = None,
+) -> int:
+    """Save preprocessed chunks in FastText format in a single streaming pass.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        Chunks with 'product_description', 'category' and 'label'
+    output_path : str
+        Output .txt file path for FastText
+    compactor : CorpusCompactor, optional
+        Caps repeated lines; all lines are written if None.
+
+    Returns
+    -------
+    int
+        Number of written lines
+
+    """
+    written = 0
     with open(output_path, "w", encoding="utf-8") as f:
-        for _, row in df.iterrows():
-            if pd.notna(row["category"]):
-                label = f"__label__{row['label']}"
-                text = row["product_description"].replace("\n", " ").strip()
-                f.write(f"{label} {text}\n")
+        for chunk in chunks:
+            lines = format_fasttext_lines(chunk)
+            if compactor is not None:
+                lines = compactor.filter(lines)
+            f.writelines(lines)
+            written += len(lines)
+    return written
+
+
+def format_fasttext_chunk(
+    chunk: pd.DataFrame, label_encoder: LabelEncoder
+) -> tuple[str, int]:
+    """Clean, label-encode and format one raw chunk as FastText training text.
+
+    Parameters
+    ----------
+    chunk : pd.DataFrame
+        Raw training chunk
+    label_encoder : LabelEncoder
+        Encoder fitted on all categories
+
+    Returns
+    -------
+    tuple[str, int]
+        FastText lines of the chunk and their count
+
+    """
+    lines = format_fasttext_lines(next(preprocess_chunks([chunk], label_encoder)))
+    return "".join(lines), len(lines)
+
+
+def write_fasttext_chunks_parallel(
+    chunks: Iterable[pd.DataFrame],
+    label_encoder: LabelEncoder,
+    output_path: str,
+    n_workers: int,
+    compactor: CorpusCompactor | None = None,
+) -> int:
+    """Preprocess raw chunks in a process pool and write them in input order.
+
+    At most two chunks per worker are in flight, so memory stays bounded by the
+    chunk size just like in the single-process streaming path.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        Raw training chunks
+    label_encoder : LabelEncoder
+        Encoder fitted on all categories
+    output_path : str
+        Output .txt file path for FastText
+    n_workers : int
+        Number of worker processes
+    compactor : CorpusCompactor, optional
+        Caps repeated lines in the parent process; all lines are written if None.
+
+    Returns
+    -------
+    int
+        Number of written lines
+
+    """
+    written = 0
+    pending = deque()
+    format_chunk = partial(format_fasttext_chunk, label_encoder=label_encoder)
+
+    def write_next():
+        text, count = pending.popleft().result()
+        if compactor is not None:
+            lines = compactor.filter(pd.Series(text.splitlines(keepends=True)))
+            text, count = "".join(lines), len(lines)
+        f.write(text)
+        return count
+
+    with (
+        ProcessPoolExecutor(max_workers=n_workers) as executor,
+        open(output_path, "w", encoding="utf-8") as f,
+    ):
+        for chunk in chunks:
+            pending.append(executor.submit(format_chunk, chunk))
+            if len(pending) >= 2 * n_workers:
+                written += write_next()
+        while pending:
+            written += write_next()
+    return written
+
+
+def stream_fasttext_training_file(
+    data_path: str,
+    output_path: str,
+    chunksize: int = 100_000,
+    label_encoder_path: str = LABEL_ENCODER_PATH,
+    n_workers: int = 1,
+    compactor: CorpusCompactor | None = None,
+) -> int:
+    """Build the FastText training file from the raw CSV with bounded memory.
+
+    A first pass over the category column fits the label encoder, then a second
+    pass loads, cleans, encodes and writes one chunk at a time. With several
+    workers, chunks are cleaned in a process pool and written in input order.
+
+    Parameters
+    ----------
+    data_path : str
+        Path to the raw training CSV file
+    output_path : str
+        Output .txt file path for FastText
+    chunksize : int
+        Number of rows held in memory at once
+    label_encoder_path : str, optional
+        Where to save the fitted label encoder. Defaults to LABEL_ENCODER_PATH.
+    n_workers : int, optional
+        Number of processes preprocessing chunks. Defaults to 1.
+    compactor : CorpusCompactor, optional
+        Caps repeated lines across chunks; all lines are written if None. Its
+        memory grows with the number of distinct lines.
+
+    Returns
+    -------
+    int
+        Number of written lines
+
+    """
+    label_encoder = fit_label_encoder_streaming(
+        data_path, chunksize, label_encoder_path
+    )
+    chunks = load_data_chunks(data_path, chunksize)
+    if n_workers > 1:
+        return write_fasttext_chunks_parallel(
+            chunks, label_encoder, output_path, n_workers, compactor
+        )
+    return write_fasttext_chunks(
+        preprocess_chunks(chunks, label_encoder), output_path, compactor
+    )
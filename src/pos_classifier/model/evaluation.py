@@ -0,0 +1,226 @@
+"""Evaluation file.
+
+This module provides vectorized evaluation of FastText predictions held in memory.
+"""
+
+import re
+
+import numpy as np
+
+DEFAULT_THRESHOLDS = np.round(np.arange(0.0, 1.0, 0.05), 2)
+
+
+def confusion_matrix(
+    y_true: np.ndarray, y_pred: np.ndarray, n_classes: int
+) -> np.ndarray:
+    """Count (true, predicted) label pairs in one bincount.
+
+    Parameters
+    ----------
+    y_true : np.ndarray
+        Encoded true labels
+    y_pred : np.ndarray
+        Encoded predicted labels
+    n_classes : int
+        Number of classes
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape (n_classes, n_classes), rows are true labels
+
+    """
+    pairs = y_true.astype(np.int64) * n_classes + y_pred.astype(np.int64)
+    return np.bincount(pairs, minlength=n_classes * n_classes).reshape(
+        n_classes, n_classes
+    )
+
+
+def per_class_metrics(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    """Compute per-class precision, recall and F1 from a confusion matrix.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        Confusion matrix, rows are true labels
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        'precision', 'recall', 'f1' and 'support' per class
+
+    """
+    true_positives = np.diag(matrix).astype(float)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(
+            precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0
+        )
+    return {"precision": precision, "recall": recall, "f1": f1, "support": support}
+
+
+def threshold_sweep(
+    correct: np.ndarray,
+    probabilities: np.ndarray,
+    thresholds: np.ndarray = DEFAULT_THRESHOLDS,
+) -> dict[str, np.ndarray]:
+    """Compute coverage, precision and recall of top-1 predictions per threshold.
+
+    A prediction is kept when its probability is at least the threshold. All
+    thresholds are evaluated from one sort and one cumulative sum.
+
+    Parameters
+    ----------
+    correct : np.ndarray
+        Whether each top-1 prediction is correct
+    probabilities : np.ndarray
+        Probability of each top-1 prediction
+    thresholds : np.ndarray
+        Thresholds to evaluate
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        'threshold', 'coverage', 'precision' and 'recall' per threshold
+
+    """
+    order = np.argsort(-probabilities, kind="stable")
+    sorted_probabilities = probabilities[order]
+    cumulative_correct = np.concatenate([[0], np.cumsum(correct[order])])
+
+    n_total = len(probabilities)
+    kept = np.searchsorted(-sorted_probabilities, -thresholds, side="right")
+    kept_correct = cumulative_correct[kept]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(kept > 0, kept_correct / kept, 0.0)
+    return {
+        "threshold": thresholds,
+        "coverage": kept / n_total if n_total else np.zeros(len(thresholds)),
+        "precision": precision,
+        "recall": kept_correct / n_total if n_total else np.zeros(len(thresholds)),
+    }
+
+
+def evaluate_predictions(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    probabilities: np.ndarray,
+    class_names: list[str],
+    threshold: float = 0.65,
+    thresholds: np.ndarray = DEFAULT_THRESHOLDS,
+) -> dict:
+    """Evaluate top-1 predictions against true labels.
+
+    'precision', 'recall' and 'f1' only count predictions with a probability of
+    at least `threshold`, which matches FastText `model.test(k=-1, threshold)`
+    for thresholds above 0.5, where at most one label can pass.
+
+    Parameters
+    ----------
+    y_true : np.ndarray
+        Encoded true labels
+    y_pred : np.ndarray
+        Encoded top-1 predicted labels
+    probabilities : np.ndarray
+        Probability of each top-1 prediction
+    class_names : list[str]
+        Category name of every encoded label
+    threshold : float, optional
+        Probability threshold of the headline metrics. Default is 0.65.
+    thresholds : np.ndarray, optional
+        Thresholds of the sweep curve.
+
+    Returns
+    -------
+    dict
+        Headline metrics, 'accuracy', 'macro_f1', 'per_class' metrics,
+        'confusion_matrix' and 'threshold_curve'.
+
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    probabilities = np.asarray(probabilities, dtype=float)
+    correct = y_true == y_pred
+
+    matrix = confusion_matrix(y_true, y_pred, len(class_names))
+    per_class = per_class_metrics(matrix)
+    curve = threshold_sweep(correct, probabilities, np.union1d(thresholds, [threshold]))
+    at_threshold = int(np.flatnonzero(curve["threshold"] == threshold)[0])
+    precision = float(curve["precision"][at_threshold])
+    recall = float(curve["recall"][at_threshold])
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        "num_test": len(y_true),
+        "precision": precision,
+        "recall": recall,
+        "f1": float(f1),
+        "accuracy": float(correct.mean()) if len(y_true) else 0.0,
+        "macro_f1": float(per_class["f1"].mean()),
+        "per_class": {
+            name: {metric: float(values[i]) for metric, values in per_class.items()}
+            for i, name in enumerate(class_names)
+        },
+        "confusion_matrix": matrix.tolist(),
+        "threshold_curve": {key: values.tolist() for key, values in curve.items()},
+    }
+
+
+def metric_key(name: str) -> str:
+    """Convert a category name to a string usable in an MLflow metric key.
+
+    Parameters
+    ----------
+    name : str
+        Category name (e.g.: 'Dry Goods & Pantry Staples')
+
+    Returns
+    -------
+    str
+        Metric key fragment (e.g.: 'dry_goods_pantry_staples')
+
+    """
+    return re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_")
+
+
+def flatten_metrics(report: dict) -> dict[str, float]:
+    """Collect the scalar metrics of an evaluation report for MLflow.
+
+    Parameters
+    ----------
+    report : dict
+        Report returned by `evaluate_predictions`
+
+    Returns
+    -------
+    dict[str, float]
+        Headline metrics and '<metric>_<category>' per-class metrics
+
+    """
+    metrics = {
+        key: value for key, value in report.items() if isinstance(value, int | float)
+    }
+    for name, values in report["per_class"].items():
+        for metric in ("precision", "recall", "f1"):
+            metrics[f"{metric}_{metric_key(name)}"] = values[metric]
+    return metrics
+
+
+def metric_names(class_names: list[str]) -> list[str]:
+    """List the metric keys `flatten_metrics` produces for a set of classes.
+
+    Parameters
+    ----------
+    class_names : list[str]
+        Category name of every encoded label
+
+    Returns
+    -------
+    list[str]
+        Sorted metric keys, e.g. to validate a selection metric before training
+
+    """
+    return sorted(flatten_metrics(evaluate_predictions([], [], [], class_names)))
@@ -1,15 +1,25 @@
 """FastText Wrapper class.
 
-This module provides FastText Model Wrapper.
+This module provides FastText Model Wrapper and its MLflow pyfunc flavor.
 """
 
+import os
+
 import fasttext
+import numpy as np
+import pandas as pd
 from mlflow.pyfunc import PythonModel
 
+from pos_classifier.data.postprocessing import (
+    decode_fasttext_labels,
+    load_label_encoder,
+)
 from pos_classifier.data.preprocessing import clean_text
+from pos_classifier.model.evaluation import evaluate_predictions
+from pos_classifier.monitoring.telemetry import RunTelemetry, fasttext_training_stats
 
 
-class FastTextModelWrapper(PythonModel):
+class FastTextModelWrapper:
     """A wrapper class for training, testing, and predicting with a FastText model."""
 
     def __init__(self, params):
@@ -34,23 +44,38 @@ class FastTextModelWrapper(PythonModel):
         """Clear the current model from memory."""
         self.model = None
 
-    def train(self):
+    def train(self, telemetry: RunTelemetry | None = None):
         """Train a FastText model using the parameters provided in `self.params`.
 
+        Parameters
+        ----------
+        telemetry : RunTelemetry, optional
+            Receives the 'train' and 'save' stage timings, the training
+            throughput and the model size.
+
         Returns
         -------
         str
             Path where the trained FastText model is saved.
 
         """
+        collect_stats = telemetry is not None
+        telemetry = telemetry or RunTelemetry("train")
         fasttext_params = {
             key: value
             for key, value in self.params.items()
             if key not in ["model_location", "test_input"]
         }
 
-        self.model = fasttext.train_supervised(**fasttext_params)
-        self.model.save_model(self.params["model_location"])
+        with telemetry.stage("train"):
+            self.model = fasttext.train_supervised(**fasttext_params)
+        with telemetry.stage("save"):
+            self.model.save_model(self.params["model_location"])
+        if collect_stats:
+            telemetry.record(
+                **fasttext_training_stats(self.model, telemetry.stages["train"]),
+                model_size_mb=os.path.getsize(self.params["model_location"]) / 2**20,
+            )
         return self.params["model_location"]
 
     def predict(self, text: str, threshold: float = 0.0, k: int = 1) -> tuple:
@@ -79,6 +104,67 @@ class FastTextModelWrapper(PythonModel):
         text = clean_text(text)
         return self.model.predict(text, k=k, threshold=threshold)
 
+    def predict_batch(
+        self, texts: list[str], threshold: float = 0.0, k: int = 1, clean: bool = True
+    ) -> tuple:
+        """Predict the label(s) for a batch of texts in one native FastText call.
+
+        Parameters
+        ----------
+        texts : list[str]
+            The input texts to classify.
+        threshold : float, optional
+            The probability threshold to filter predictions. Defaults to 0.0.
+        k : int, optional
+            The number of top predictions to return per text. Defaults to 1.
+        clean : bool, optional
+            Whether to apply `clean_text` first. Defaults to True.
+
+        Returns
+        -------
+        tuple
+            A tuple containing:
+            - List of predicted labels per text
+            - List of corresponding prediction probabilities per text
+
+        """
+        if not self.model:
+            raise ValueError("Model is not loaded. Please train or load a model first.")
+
+        if clean:
+            texts = [clean_text(text) for text in texts]
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.model.predict(texts, k=k, threshold=threshold)
+
+    def sentence_vectors(self, texts: list[str], clean: bool = True) -> np.ndarray:
+        """Embed texts as L2-normalised FastText sentence vectors.
+
+        Parameters
+        ----------
+        texts : list[str]
+            The input texts to embed.
+        clean : bool, optional
+            Whether to apply `clean_text` first. Defaults to True.
+
+        Returns
+        -------
+        np.ndarray
+            float32 matrix of shape (len(texts), dimension); texts without any
+            known word or n-gram are embedded as zero vectors.
+
+        """
+        if not self.model:
+            raise ValueError("Model is not loaded. Please train or load a model first.")
+
+        vectors = np.empty((len(texts), self.model.get_dimension()), dtype=np.float32)
+        for row, text in enumerate(texts):
+            if clean:
+                text = clean_text(text)
+            vectors[row] = self.model.get_sentence_vector(text.replace("\n", " "))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
     def evaluate(self, test_file: str, threshold: float = 0.65) -> dict:
         """Evaluate the model's performance on a labeled test dataset.
 
@@ -121,3 +207,112 @@ class FastTextModelWrapper(PythonModel):
             "recall": float(recall),
             "f1": float(f1_score),
         }
+
+    def evaluate_dataframe(
+        self, df: pd.DataFrame, class_names: list[str], threshold: float = 0.65
+    ) -> dict:
+        """Evaluate the model on a preprocessed in-memory dataset.
+
+        Predictions are made in one batched call, without writing a test file.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Preprocessed DataFrame with 'product_description' and 'label'.
+        class_names : list[str]
+            Category name of every encoded label, e.g. `label_encoder.classes_`.
+        threshold : float, optional
+            Probability threshold of the headline metrics. Default is 0.65.
+
+        Returns
+        -------
+        dict
+            Report of `evaluate_predictions`: the metrics of `evaluate` plus
+            accuracy, macro F1, per-class metrics, the confusion matrix and a
+            threshold sweep curve.
+
+        """
+        labels, probabilities = self.predict_batch(
+            df["product_description"].tolist(), clean=False
+        )
+        prefix_length = len("__label__")
+        y_pred = np.fromiter(
+            (int(label[0][prefix_length:]) for label in labels),
+            dtype=np.int64,
+            count=len(labels),
+        )
+        top_probabilities = np.fromiter(
+            (probability[0] for probability in probabilities),
+            dtype=np.float64,
+            count=len(probabilities),
+        )
+        return evaluate_predictions(
+            df["label"].to_numpy(),
+            y_pred,
+            top_probabilities,
+            list(class_names),
+            threshold=threshold,
+        )
+
+
+class FastTextPyfuncModel(PythonModel):
+    """MLflow pyfunc flavor of a trained FastText model.
+
+    The model and label encoder are loaded once from the logged artifacts and a
+    whole `product_description` column is scored in a single batched call.
+    """
+
+    def __init__(self):
+        """Initialize an empty pyfunc model; artifacts are loaded in `load_context`."""
+        self.fasttext_model = None
+        self.label_encoder = None
+
+    def __getstate__(self):
+        """Exclude loaded artifacts from pickling; `load_context` restores them."""
+        return {**self.__dict__, "fasttext_model": None, "label_encoder": None}
+
+    def load_context(self, context):
+        """Load the FastText model and label encoder from the logged artifacts.
+
+        Parameters
+        ----------
+        context : mlflow.pyfunc.PythonModelContext
+            Context with 'fasttext_model_path' and 'label_encoder_path' artifacts.
+
+        """
+        self.fasttext_model = FastTextModelWrapper(
+            {"model_location": context.artifacts["fasttext_model_path"]}
+        )
+        self.fasttext_model.load_model()
+        self.label_encoder = load_label_encoder(context.artifacts["label_encoder_path"])
+
+    def predict(self, context, model_input, params=None):
+        """Predict the category of every product description in the input.
+
+        Parameters
+        ----------
+        context : mlflow.pyfunc.PythonModelContext
+            Context the model was loaded with.
+        model_input : pd.DataFrame
+            Input with a 'product_description' column.
+        params : dict, optional
+            Unused inference parameters.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with 'predicted_label' and 'probability' columns.
+
+        """
+        texts = model_input["product_description"].fillna("").astype(str).tolist()
+        labels, probabilities = self.fasttext_model.predict_batch(texts)
+        return pd.DataFrame(
+            {
+                "predicted_label": decode_fasttext_labels(labels, self.label_encoder),
+                "probability": np.array(
+                    [probability[0] for probability in probabilities],
+                    dtype=np.float32,
+                ),
+            },
+            index=model_input.index,
+        )
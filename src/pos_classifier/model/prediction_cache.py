@@ -0,0 +1,196 @@
+"""Prediction cache file.
+
+This module provides a SQLite index of already-scored product descriptions for
+incremental batch prediction. Rows are keyed by a content hash of the raw
+description and tied to the version of the model that scored them, so the
+whole cache is invalidated when the model artifacts change.
+"""
+
+import hashlib
+import sqlite3
+import time
+
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from pos_classifier.config.config import PREDICTION_CACHE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    description_hash INTEGER PRIMARY KEY,
+    predicted_category TEXT NOT NULL,
+    probability REAL NOT NULL,
+    scored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def hash_descriptions(descriptions: pd.Series) -> np.ndarray:
+    """Hash raw product descriptions to stable 64-bit keys.
+
+    Parameters
+    ----------
+    descriptions : pd.Series
+        Raw product descriptions.
+
+    Returns
+    -------
+    np.ndarray
+        Signed 64-bit hash per description, equal across runs and processes.
+
+    """
+    return np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(str(text).encode(), digest_size=8).digest(),
+                "little",
+                signed=True,
+            )
+            for text in descriptions
+        ),
+        dtype=np.int64,
+        count=len(descriptions),
+    )
+
+
+def model_version(*paths) -> str:
+    """Fingerprint model artifacts by their content.
+
+    Parameters
+    ----------
+    *paths : str or Path
+        Artifact files, e.g. the FastText model and the label encoder.
+
+    Returns
+    -------
+    str
+        Hex digest changing whenever any of the files changes.
+
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            while block := f.read(1 << 20):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Scored predictions of one model version, keyed by description hash."""
+
+    def __init__(self, db_path=PREDICTION_CACHE_PATH):
+        """Initialize the cache and create the schema if needed.
+
+        Parameters
+        ----------
+        db_path : str or Path
+            Path to the SQLite database file.
+
+        """
+        self.db_path = str(db_path)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def model_version(self) -> str | None:
+        """Return the model version of the cached predictions, if any."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'model_version'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_model_version(self, version: str) -> bool:
+        """Bind the cache to a model version, dropping predictions of another one.
+
+        Parameters
+        ----------
+        version : str
+            Version of the model about to score, from `model_version`.
+
+        Returns
+        -------
+        bool
+            Whether cached predictions were invalidated.
+
+        """
+        previous = self.model_version()
+        if previous == version:
+            return False
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM predictions")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('model_version', ?)",
+                (version,),
+            )
+        return previous is not None
+
+    def lookup(self, hashes: np.ndarray) -> pd.DataFrame:
+        """Fetch the cached predictions of the given description hashes.
+
+        Parameters
+        ----------
+        hashes : np.ndarray
+            Description hashes from `hash_descriptions`.
+
+        Returns
+        -------
+        pd.DataFrame
+            'description_hash', 'predicted_category' and 'probability' of the
+            hashes found in the cache.
+
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TEMP TABLE wanted (description_hash INTEGER)")
+            conn.executemany(
+                "INSERT INTO wanted VALUES (?)", ((int(h),) for h in np.unique(hashes))
+            )
+            rows = conn.execute(
+                "SELECT p.description_hash, p.predicted_category, p.probability "
+                "FROM predictions p JOIN wanted w USING (description_hash)"
+            ).fetchall()
+        return pd.DataFrame(
+            rows, columns=["description_hash", "predicted_category", "probability"]
+        ).astype({"description_hash": np.int64, "probability": float})
+
+    def store(
+        self, hashes: np.ndarray, categories: np.ndarray, probabilities: np.ndarray
+    ):
+        """Insert or replace the predictions of newly scored descriptions.
+
+        Parameters
+        ----------
+        hashes : np.ndarray
+            Description hashes.
+        categories : np.ndarray
+            Predicted category per hash.
+        probabilities : np.ndarray
+            Probability of the predicted category per hash.
+
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions "
+                "(description_hash, predicted_category, probability, scored_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (int(h), str(c), float(p), now)
+                    for h, c, p in zip(hashes, categories, probabilities)
+                ),
+            )
+
+    def reset(self):
+        """Remove all cached predictions and the model version."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM predictions")
+            conn.execute("DELETE FROM meta")
@@ -0,0 +1,385 @@
+"""Similarity index file.
+
+This module provides a nearest-neighbour index of the training products over
+FastText sentence vectors. The cleaned training descriptions are embedded once
+at training time and stored as a float32 matrix that is memory-mapped when
+queried, next to an Arrow file holding the description and category of every
+row. Queries are scored with batched matrix products against blocks of the
+matrix; with coarse k-means partitions, the rows are stored grouped by
+partition and only the partitions closest to a query are scored.
+"""
+
+import json
+import logging
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+ITEMS_FILE = "items.arrow"
+CENTROIDS_FILE = "centroids.npy"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "meta.json"
+
+
+def read_fasttext_training_lines(path) -> tuple[list[str], np.ndarray]:
+    """Read the distinct lines of a FastText training file.
+
+    Parameters
+    ----------
+    path : str or Path
+        File of '__label__<label> <text>' lines.
+
+    Returns
+    -------
+    tuple[list[str], np.ndarray]
+        Cleaned text and encoded label of every distinct line, in file order.
+
+    """
+    prefix_length = len("__label__")
+    seen = set()
+    texts = []
+    labels = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.startswith("__label__") or line in seen:
+                continue
+            seen.add(line)
+            label, _, text = line.partition(" ")
+            texts.append(text)
+            labels.append(int(label[prefix_length:]))
+    return texts, np.array(labels, dtype=np.int64)
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, n_clusters: int, n_iter: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Cluster L2-normalised vectors by cosine similarity.
+
+    Parameters
+    ----------
+    vectors : np.ndarray
+        float32 matrix of unit vectors.
+    n_clusters : int
+        Number of clusters.
+    n_iter : int, optional
+        Number of Lloyd iterations. Defaults to 10.
+    seed : int, optional
+        Random seed of the initial centroids. Defaults to 0.
+
+    Returns
+    -------
+    np.ndarray
+        float32 matrix of unit centroids, one row per cluster.
+
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty clusters restart from random vectors instead of staying unused.
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def assign_partitions(
+    vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 100_000
+) -> np.ndarray:
+    """Return the index of the closest centroid of every vector, block by block."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        block = vectors[start : start + chunk_size]
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def build_similarity_index(
+    model: FastTextModelWrapper,
+    texts: list[str],
+    labels: np.ndarray,
+    categories,
+    index_dir,
+    n_partitions: int = 0,
+    chunk_size: int = 100_000,
+    sample_size: int = 100_000,
+    seed: int = 0,
+) -> dict:
+    """Embed product descriptions and write them as a similarity index.
+
+    Parameters
+    ----------
+    model : FastTextModelWrapper
+        Loaded model producing the sentence vectors.
+    texts : list[str]
+        Cleaned product descriptions.
+    labels : np.ndarray
+        Encoded category of every description.
+    categories : array-like
+        Category name of every encoded label, e.g. `label_encoder.classes_`.
+    index_dir : str or Path
+        Directory receiving the index files.
+    n_partitions : int, optional
+        Number of coarse k-means partitions; 0 stores the rows unpartitioned
+        and every query scores all of them. Defaults to 0.
+    chunk_size : int, optional
+        Number of descriptions embedded and written at a time. Defaults to 100000.
+    sample_size : int, optional
+        Number of vectors the partitions are fitted on. Defaults to 100000.
+    seed : int, optional
+        Random seed of the partitioning. Defaults to 0.
+
+    Returns
+    -------
+    dict
+        Number of rows, vector dimension and number of partitions.
+
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    n_rows = len(texts)
+    n_partitions = min(n_partitions, n_rows)
+    dimension = model.model.get_dimension()
+
+    # Unpartitioned rows are embedded straight into the final file, partitioned
+    # ones into a scratch file that is then copied in partition order.
+    vectors_path = index_dir / VECTORS_FILE
+    scratch_path = index_dir / f"unsorted_{VECTORS_FILE}"
+    vectors = np.lib.format.open_memmap(
+        scratch_path if n_partitions else vectors_path,
+        mode="w+",
+        dtype=np.float32,
+        shape=(n_rows, dimension),
+    )
+    for start in range(0, n_rows, chunk_size):
+        vectors[start : start + chunk_size] = model.sentence_vectors(
+            texts[start : start + chunk_size], clean=False
+        )
+
+    order = np.arange(n_rows)
+    if n_partitions:
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(n_rows, min(sample_size, n_rows), replace=False))
+        centroids = spherical_kmeans(vectors[sample], n_partitions, seed=seed)
+        assignment = assign_partitions(vectors, centroids, chunk_size)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(n_partitions + 1))
+        sorted_vectors = np.lib.format.open_memmap(
+            vectors_path, mode="w+", dtype=np.float32, shape=(n_rows, dimension)
+        )
+        for start in range(0, n_rows, chunk_size):
+            sorted_vectors[start : start + chunk_size] = vectors[
+                order[start : start + chunk_size]
+            ]
+        sorted_vectors.flush()
+        del vectors, sorted_vectors
+        scratch_path.unlink()
+        np.save(index_dir / CENTROIDS_FILE, centroids)
+        np.save(index_dir / OFFSETS_FILE, offsets)
+    else:
+        vectors.flush()
+        del vectors
+
+    categories = pa.array([str(category) for category in categories])
+    items = pa.table(
+        {
+            "product_description": pa.array(texts).take(pa.array(order)),
+            "category": pa.DictionaryArray.from_arrays(
+                pa.array(labels[order].astype(np.int16)), categories
+            ),
+        }
+    )
+    with ipc.new_file(index_dir / ITEMS_FILE, items.schema) as writer:
+        writer.write_table(items, max_chunksize=chunk_size)
+
+    meta = {"rows": n_rows, "dimension": dimension, "partitions": n_partitions}
+    (index_dir / META_FILE).write_text(json.dumps(meta))
+    logger.info(f"Similarity index written to {index_dir}: {meta}")
+    return meta
+
+
+def top_k_positions(scores: np.ndarray, k: int, ordered: bool = False) -> np.ndarray:
+    """Return the positions of the k highest scores of every row.
+
+    Parameters
+    ----------
+    scores : np.ndarray
+        Scores of shape (queries, candidates).
+    k : int
+        Number of positions kept per row.
+    ordered : bool, optional
+        Whether the positions are sorted by decreasing score. Defaults to False.
+
+    Returns
+    -------
+    np.ndarray
+        Positions of shape (queries, min(k, candidates)).
+
+    """
+    if scores.shape[1] > k:
+        positions = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        positions = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    if ordered:
+        top_scores = np.take_along_axis(scores, positions, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        positions = np.take_along_axis(positions, order, axis=1)
+    return positions
+
+
+class SimilarityIndex:
+    """Memory-mapped nearest-neighbour index of the training products."""
+
+    def __init__(self, index_dir, block_size: int = 65_536):
+        """Open an index written by `build_similarity_index`.
+
+        Parameters
+        ----------
+        index_dir : str or Path
+            Directory of the index files.
+        block_size : int, optional
+            Number of rows scored per matrix product. Defaults to 65536.
+
+        """
+        index_dir = Path(index_dir)
+        self.meta = json.loads((index_dir / META_FILE).read_text())
+        self.vectors = np.load(index_dir / VECTORS_FILE, mmap_mode="r")
+        self.items = ipc.open_file(
+            pa.memory_map(str(index_dir / ITEMS_FILE))
+        ).read_all()
+        self.block_size = block_size
+        self.centroids = None
+        self.offsets = None
+        if self.meta["partitions"]:
+            self.centroids = np.load(index_dir / CENTROIDS_FILE)
+            self.offsets = np.load(index_dir / OFFSETS_FILE)
+
+    def __len__(self) -> int:
+        """Return the number of indexed products."""
+        return self.meta["rows"]
+
+    @property
+    def dimension(self) -> int:
+        """Dimension of the indexed vectors."""
+        return self.meta["dimension"]
+
+    def search(
+        self, queries: np.ndarray, k: int = 5, n_probe: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the most similar indexed products of query vectors.
+
+        Parameters
+        ----------
+        queries : np.ndarray
+            L2-normalised query vectors of shape (queries, dimension).
+        k : int, optional
+            Number of neighbours per query. Defaults to 5.
+        n_probe : int, optional
+            Number of partitions scored per query in a partitioned index; None
+            or a value above the number of partitions scores every row.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Cosine similarities and index rows of shape (queries, k), best
+            first; missing neighbours have a similarity of -inf and row -1.
+
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        n_partitions = self.meta["partitions"]
+        if not n_partitions or n_probe is None or n_probe >= n_partitions:
+            ranges = [(np.arange(len(queries)), 0, len(self))]
+        else:
+            probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)
+            probes = probes[:, :n_probe]
+            # Every probed partition is read once and scored for all the
+            # queries probing it.
+            ranges = [
+                (
+                    np.flatnonzero((probes == partition).any(axis=1)),
+                    self.offsets[partition],
+                    self.offsets[partition + 1],
+                )
+                for partition in np.unique(probes)
+            ]
+
+        # The top k of every block are kept unsorted and merged once at the end.
+        blocks = []
+        widths = np.zeros(len(queries), dtype=np.int64)
+        for query_rows, begin, end in ranges:
+            block_queries = queries[query_rows]
+            for start in range(begin, end, self.block_size):
+                stop = min(start + self.block_size, end)
+                scores = block_queries @ self.vectors[start:stop].T
+                positions = top_k_positions(scores, k)
+                blocks.append(
+                    (
+                        query_rows,
+                        np.take_along_axis(scores, positions, axis=1),
+                        positions + start,
+                    )
+                )
+                widths[query_rows] += positions.shape[1]
+
+        width = max(int(widths.max(initial=0)), k)
+        candidate_scores = np.full((len(queries), width), -np.inf, dtype=np.float32)
+        candidate_indices = np.full((len(queries), width), -1, dtype=np.int64)
+        filled = np.zeros(len(queries), dtype=np.int64)
+        for query_rows, scores, indices in blocks:
+            columns = filled[query_rows, None] + np.arange(scores.shape[1])
+            candidate_scores[query_rows[:, None], columns] = scores
+            candidate_indices[query_rows[:, None], columns] = indices
+            filled[query_rows] += scores.shape[1]
+        top = top_k_positions(candidate_scores, k, ordered=True)
+        return (
+            np.take_along_axis(candidate_scores, top, axis=1),
+            np.take_along_axis(candidate_indices, top, axis=1),
+        )
+
+    def neighbours(
+        self, queries: np.ndarray, k: int = 5, n_probe: int | None = None
+    ) -> list[pd.DataFrame]:
+        """Return the most similar indexed products of query vectors.
+
+        Parameters
+        ----------
+        queries : np.ndarray
+            L2-normalised query vectors of shape (queries, dimension).
+        k : int, optional
+            Number of neighbours per query. Defaults to 5.
+        n_probe : int, optional
+            Number of partitions scored per query, see `search`.
+
+        Returns
+        -------
+        list[pd.DataFrame]
+            Per query, 'product_description', 'category' and 'similarity' of
+            its neighbours, best first.
+
+        """
+        scores, indices = self.search(queries, k, n_probe)
+        results = []
+        for query_scores, query_indices in zip(scores, indices):
+            found = query_indices >= 0
+            rows = self.items.take(pa.array(query_indices[found])).to_pandas()
+            results.append(
+                rows.assign(
+                    category=rows["category"].astype(str),
+                    similarity=query_scores[found].astype(float),
+                )
+            )
+        return results
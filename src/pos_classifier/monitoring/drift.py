@@ -0,0 +1,308 @@
+"""Drift file.
+
+This module provides streaming drift sketches of the prediction traffic. Every
+batch of predictions is reduced in one vectorized pass to three histograms:
+predicted categories, confidence of the top category and description length.
+The histograms have fixed bins, so sketches of different batches and minutes
+are merged by adding counts. They are compared with a reference sketch of
+training descriptions captured when the model is trained, using the
+Population Stability Index (PSI) and the Kullback-Leibler divergence.
+
+The reference and the traffic are sketched on the same text: the raw
+descriptions the model scores, with missing descriptions as empty strings.
+"""
+
+import bisect
+import json
+import logging
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from pos_classifier.config.config import DRIFT_REFERENCE_PATH
+from pos_classifier.data.data_loader import load_data_chunks
+from pos_classifier.data.postprocessing import decode_fasttext_labels
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("category", "confidence", "length")
+# Lower edges of the bins; the last length bin is open-ended.
+CONFIDENCE_EDGES = np.linspace(0.0, 1.0, 11)[:-1]
+LENGTH_EDGES = np.array([0, 10, 20, 30, 40, 50, 60, 80, 100, 150])
+# Share given to bins that are empty on one side, so PSI and KL stay finite.
+EPSILON = 1e-4
+
+
+def histogram(values: np.ndarray, edges: np.ndarray) -> dict[str, int]:
+    """Count values per bin, keyed by the index of the bin."""
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 1)
+    counts = np.bincount(bins, minlength=len(edges))
+    return {str(b): int(counts[b]) for b in np.flatnonzero(counts)}
+
+
+def sketch_batch(categories, probabilities, descriptions) -> dict[str, dict[str, int]]:
+    """Reduce a batch of predictions to its drift histograms.
+
+    Parameters
+    ----------
+    categories : array-like
+        Predicted category per description.
+    probabilities : array-like
+        Probability of the predicted category per description.
+    descriptions : array-like
+        Raw product descriptions, with missing ones as empty strings.
+
+    Returns
+    -------
+    dict[str, dict[str, int]]
+        Count per category, per confidence bin and per length bin.
+
+    """
+    lengths = pd.Series(descriptions, dtype="string").str.len().fillna(0)
+    counts = pd.Series(categories, dtype="string").value_counts()
+    return {
+        "category": {str(key): int(count) for key, count in counts.items()},
+        "confidence": histogram(
+            np.asarray(probabilities, dtype=np.float64), CONFIDENCE_EDGES
+        ),
+        "length": histogram(lengths.to_numpy(dtype=np.int64), LENGTH_EDGES),
+    }
+
+
+def sketch_prediction(
+    category: str, probability: float, description: str
+) -> dict[str, dict[str, int]]:
+    """Sketch a single prediction, without the overhead of a vectorized pass.
+
+    Parameters
+    ----------
+    category : str
+        Predicted category.
+    probability : float
+        Probability of the predicted category.
+    description : str
+        Raw product description.
+
+    Returns
+    -------
+    dict[str, dict[str, int]]
+        Same histograms as `sketch_batch` for a batch of one.
+
+    """
+    bins = []
+    for value, edges in (
+        (probability, CONFIDENCE_EDGES),
+        (len(description), LENGTH_EDGES),
+    ):
+        bins.append(min(max(bisect.bisect_right(edges, value) - 1, 0), len(edges) - 1))
+    return {
+        "category": {category: 1},
+        "confidence": {str(bins[0]): 1},
+        "length": {str(bins[1]): 1},
+    }
+
+
+def merge_sketches(rows) -> dict[str, dict[str, int]]:
+    """Add up stored sketch counts.
+
+    Parameters
+    ----------
+    rows : iterable of tuple
+        Rows of (feature, key, count), e.g. the last three fields of
+        `MetricsStore.fetch_drift_sketches`.
+
+    Returns
+    -------
+    dict[str, dict[str, int]]
+        Total count per key of every feature.
+
+    """
+    sketch = {feature: {} for feature in FEATURES}
+    for feature, key, count in rows:
+        counts = sketch.setdefault(feature, {})
+        counts[key] = counts.get(key, 0) + count
+    return sketch
+
+
+def distributions(expected: dict, actual: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Align two histograms on the union of their keys and normalise them."""
+    keys = sorted(set(expected) | set(actual))
+    shares = []
+    for counts in (expected, actual):
+        values = np.array([counts.get(key, 0) for key in keys], dtype=np.float64)
+        values = np.maximum(values / max(values.sum(), 1), EPSILON)
+        shares.append(values / values.sum())
+    return shares[0], shares[1]
+
+
+def psi(expected: dict, actual: dict) -> float:
+    """Return the Population Stability Index of a histogram against a reference.
+
+    Parameters
+    ----------
+    expected : dict
+        Reference count per key.
+    actual : dict
+        Observed count per key.
+
+    Returns
+    -------
+    float
+        PSI; below 0.1 is usually read as stable and above 0.25 as drifted.
+
+    """
+    p, q = distributions(expected, actual)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def kl_divergence(expected: dict, actual: dict) -> float:
+    """Return the Kullback-Leibler divergence of a histogram from a reference.
+
+    Parameters
+    ----------
+    expected : dict
+        Reference count per key.
+    actual : dict
+        Observed count per key.
+
+    Returns
+    -------
+    float
+        KL(actual || expected) in nats.
+
+    """
+    p, q = distributions(expected, actual)
+    return float(np.sum(q * np.log(q / p)))
+
+
+def drift_scores(reference: dict, sketch: dict) -> dict[str, dict]:
+    """Compare a sketch with the reference sketch, feature by feature.
+
+    Parameters
+    ----------
+    reference : dict
+        Reference from `build_reference` or `load_reference`.
+    sketch : dict
+        Sketch of the traffic, e.g. from `merge_sketches`.
+
+    Returns
+    -------
+    dict[str, dict]
+        'count', 'psi' and 'kl' per feature with observations.
+
+    """
+    scores = {}
+    for feature in FEATURES:
+        counts = sketch.get(feature) or {}
+        if not counts:
+            continue
+        expected = reference["sketch"].get(feature, {})
+        scores[feature] = {
+            "count": sum(counts.values()),
+            "psi": psi(expected, counts),
+            "kl": kl_divergence(expected, counts),
+        }
+    return scores
+
+
+def sample_descriptions(
+    path, n_rows: int, seed: int = 0, chunksize: int = 100_000
+) -> pd.Series:
+    """Draw a uniform sample of product descriptions from a CSV, chunk by chunk.
+
+    Every row gets a random key and the rows with the smallest keys are kept,
+    so the whole file never has to be loaded.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV file with a 'Product Description' column.
+    n_rows : int
+        Sample size.
+    seed : int, optional
+        Random seed. Defaults to 0.
+    chunksize : int, optional
+        Number of rows read at a time. Defaults to 100000.
+
+    Returns
+    -------
+    pd.Series
+        Sampled raw descriptions, with missing ones as empty strings.
+
+    """
+    rng = np.random.default_rng(seed)
+    sample = pd.DataFrame({"key": [], "product_description": []})
+    for chunk in load_data_chunks(path, chunksize, columns=["product_description"]):
+        chunk = chunk.assign(key=rng.random(len(chunk)))
+        sample = pd.concat([sample, chunk]).nsmallest(n_rows, "key")
+    return sample["product_description"].fillna("").astype(str)
+
+
+def build_reference(model, label_encoder, descriptions: pd.Series) -> dict:
+    """Sketch the predictions of a model on reference descriptions.
+
+    Parameters
+    ----------
+    model : FastTextModelWrapper
+        Loaded model.
+    label_encoder : LabelEncoder
+        Encoder of the model labels.
+    descriptions : pd.Series
+        Raw reference descriptions, e.g. a sample of the training data.
+
+    Returns
+    -------
+    dict
+        Creation time, number of rows and sketch of the reference.
+
+    """
+    labels, probabilities = model.predict_batch(descriptions.tolist())
+    sketch = sketch_batch(
+        decode_fasttext_labels(labels, label_encoder),
+        [probability[0] for probability in probabilities],
+        descriptions,
+    )
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(descriptions),
+        "sketch": sketch,
+    }
+
+
+def save_reference(reference: dict, path=DRIFT_REFERENCE_PATH):
+    """Write a reference sketch as JSON.
+
+    Parameters
+    ----------
+    reference : dict
+        Reference from `build_reference`.
+    path : str or Path, optional
+        Output file. Defaults to DRIFT_REFERENCE_PATH.
+
+    """
+    with open(path, "w") as f:
+        json.dump(reference, f, indent=2)
+    logger.info(f"Drift reference of {reference['rows']} rows written to {path}")
+
+
+def load_reference(path=DRIFT_REFERENCE_PATH) -> dict | None:
+    """Read a reference sketch.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        Reference file. Defaults to DRIFT_REFERENCE_PATH.
+
+    Returns
+    -------
+    dict or None
+        Reference, or None if the file does not exist.
+
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
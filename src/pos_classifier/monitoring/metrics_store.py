@@ -0,0 +1,455 @@
+"""Metrics store file.
+
+This module provides a time-windowed SQLite store for real-time monitoring.
+Predictions are buffered in memory and written in batches, by the recording
+call once a batch is full and by a background flusher while traffic is idle.
+Raw events are kept
+for a short retention window (latency percentiles), while per-minute rollups
+are kept longer (throughput and class distribution over time). Comparisons of
+the primary model with a shadow candidate are kept as per-minute rollups too,
+and so are the drift sketches of the traffic: per-minute counts of predicted
+categories, confidence bins and description length bins.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+from contextlib import closing
+
+from pos_classifier.config.config import METRICS_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+RAW_RETENTION_SECONDS = 6 * 60 * 60
+ROLLUP_RETENTION_SECONDS = 30 * 24 * 60 * 60
+COMPACTION_INTERVAL_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    category TEXT NOT NULL,
+    latency REAL NOT NULL,
+    correct INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    minute INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_latency REAL NOT NULL,
+    max_latency REAL NOT NULL,
+    labeled INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (minute, category)
+);
+CREATE TABLE IF NOT EXISTS shadow_rollups (
+    minute INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    agreed INTEGER NOT NULL,
+    total_latency REAL NOT NULL,
+    candidate_total_latency REAL NOT NULL,
+    candidate_max_latency REAL NOT NULL,
+    PRIMARY KEY (minute, category)
+);
+CREATE TABLE IF NOT EXISTS drift_sketches (
+    minute INTEGER NOT NULL,
+    feature TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (minute, feature, key)
+);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (minute, category, count, total_latency, max_latency, labeled, correct)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (minute, category) DO UPDATE SET
+    count = count + excluded.count,
+    total_latency = total_latency + excluded.total_latency,
+    max_latency = MAX(max_latency, excluded.max_latency),
+    labeled = labeled + excluded.labeled,
+    correct = correct + excluded.correct
+"""
+
+UPSERT_SHADOW_ROLLUP = """
+INSERT INTO shadow_rollups (minute, category, count, agreed, total_latency,
+    candidate_total_latency, candidate_max_latency)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (minute, category) DO UPDATE SET
+    count = count + excluded.count,
+    agreed = agreed + excluded.agreed,
+    total_latency = total_latency + excluded.total_latency,
+    candidate_total_latency = candidate_total_latency + excluded.candidate_total_latency,
+    candidate_max_latency = MAX(candidate_max_latency, excluded.candidate_max_latency)
+"""
+
+UPSERT_DRIFT_SKETCH = """
+INSERT INTO drift_sketches (minute, feature, key, count)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (minute, feature, key) DO UPDATE SET
+    count = count + excluded.count
+"""
+
+
+class MetricsStore:
+    """Buffered, time-windowed store of prediction events backed by SQLite."""
+
+    def __init__(
+        self,
+        db_path=METRICS_DB_PATH,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        raw_retention: float = RAW_RETENTION_SECONDS,
+        rollup_retention: float = ROLLUP_RETENTION_SECONDS,
+    ):
+        """Initialize the store and create the schema if needed.
+
+        Parameters
+        ----------
+        db_path : str or Path
+            Path to the SQLite database file.
+        batch_size : int
+            Number of buffered events that triggers a write.
+        flush_interval : float
+            Maximum number of seconds buffered events wait before they are written,
+            once the background flusher is started.
+        raw_retention : float
+            Number of seconds raw events are kept before compaction.
+        rollup_retention : float
+            Number of seconds per-minute rollups are kept before compaction.
+
+        """
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self._buffer = []
+        self._shadow_buffer = []
+        self._sketch_buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self._last_compaction = 0.0
+        self._stop = threading.Event()
+        self._flusher = None
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def start(self):
+        """Start a daemon thread writing the buffer every `flush_interval` seconds.
+
+        Without it, buffered events are only written by a later recording call,
+        so the last events of a burst would stay in memory while traffic is idle.
+
+        Returns
+        -------
+        MetricsStore
+            The started store itself.
+
+        """
+        if self._flusher is None or not self._flusher.is_alive():
+            self._stop.clear()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="metrics-flusher", daemon=True
+            )
+            self._flusher.start()
+        return self
+
+    def close(self):
+        """Stop the background flusher and write the remaining buffered events."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Periodic metrics flush failed: {e}")
+
+    def record(
+        self,
+        category: str,
+        latency: float,
+        correct: bool | None = None,
+        ts: float | None = None,
+    ):
+        """Buffer a single prediction event, writing the buffer when it is due.
+
+        Parameters
+        ----------
+        category : str
+            Predicted category.
+        latency : float
+            Prediction time in seconds.
+        correct : bool, optional
+            Whether the prediction matched a human verified label, if one was given.
+        ts : float, optional
+            Event timestamp in seconds since the epoch. Defaults to now.
+
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._buffer.append(
+                (ts, category, latency, None if correct is None else int(correct))
+            )
+            due = (
+                len(self._buffer) >= self.batch_size
+                or ts - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def record_shadow(
+        self,
+        category: str,
+        candidate_category: str,
+        latency: float,
+        candidate_latency: float,
+        ts: float | None = None,
+    ):
+        """Buffer a comparison of the primary and the candidate model on one input.
+
+        Comparisons are written with the prediction events, by the next due
+        recording call or by the background flusher of `start`.
+
+        Parameters
+        ----------
+        category : str
+            Category predicted by the primary model.
+        candidate_category : str
+            Category predicted by the candidate model.
+        latency : float
+            Prediction time of the primary model in seconds.
+        candidate_latency : float
+            Prediction time of the candidate model in seconds.
+        ts : float, optional
+            Event timestamp in seconds since the epoch. Defaults to now.
+
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._shadow_buffer.append(
+                (ts, category, candidate_category, latency, candidate_latency)
+            )
+            due = (
+                len(self._buffer) + len(self._shadow_buffer) >= self.batch_size
+                or ts - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def record_sketch(self, sketch: dict[str, dict[str, int]], ts: float | None = None):
+        """Buffer the drift sketch of a batch of predictions.
+
+        Parameters
+        ----------
+        sketch : dict[str, dict[str, int]]
+            Count per key of every feature, e.g. from `drift.sketch_batch`.
+        ts : float, optional
+            Batch timestamp in seconds since the epoch. Defaults to now.
+
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._sketch_buffer.append((ts, sketch))
+            due = ts - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered events and their per-minute rollups in one transaction."""
+        with self._lock:
+            events, self._buffer = self._buffer, []
+            comparisons, self._shadow_buffer = self._shadow_buffer, []
+            sketches, self._sketch_buffer = self._sketch_buffer, []
+            self._last_flush = time.time()
+        if not events and not comparisons and not sketches:
+            return
+
+        rollups = {}
+        for ts, category, latency, correct in events:
+            key = (int(ts // 60), category)
+            count, total, peak, labeled, hits = rollups.get(key, (0, 0.0, 0.0, 0, 0))
+            rollups[key] = (
+                count + 1,
+                total + latency,
+                max(peak, latency),
+                labeled + (correct is not None),
+                hits + (correct or 0),
+            )
+
+        shadow_rollups = {}
+        for ts, category, candidate_category, latency, candidate_latency in comparisons:
+            key = (int(ts // 60), category)
+            count, agreed, total, candidate_total, candidate_peak = shadow_rollups.get(
+                key, (0, 0, 0.0, 0.0, 0.0)
+            )
+            shadow_rollups[key] = (
+                count + 1,
+                agreed + (category == candidate_category),
+                total + latency,
+                candidate_total + candidate_latency,
+                max(candidate_peak, candidate_latency),
+            )
+
+        sketch_counts = {}
+        for ts, sketch in sketches:
+            minute = int(ts // 60)
+            for feature, counts in sketch.items():
+                for key, count in counts.items():
+                    sketch_key = (minute, feature, key)
+                    sketch_counts[sketch_key] = sketch_counts.get(sketch_key, 0) + count
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO predictions (ts, category, latency, correct) VALUES (?, ?, ?, ?)",
+                events,
+            )
+            conn.executemany(
+                UPSERT_ROLLUP, [key + value for key, value in rollups.items()]
+            )
+            conn.executemany(
+                UPSERT_SHADOW_ROLLUP,
+                [key + value for key, value in shadow_rollups.items()],
+            )
+            conn.executemany(
+                UPSERT_DRIFT_SKETCH,
+                [key + (count,) for key, count in sketch_counts.items()],
+            )
+
+        if self._last_flush - self._last_compaction >= COMPACTION_INTERVAL_SECONDS:
+            self.compact(now=self._last_flush)
+
+    def compact(self, now: float | None = None):
+        """Drop raw events and rollups that are older than their retention window.
+
+        Parameters
+        ----------
+        now : float, optional
+            Reference timestamp in seconds since the epoch. Defaults to now.
+
+        """
+        now = time.time() if now is None else now
+        self._last_compaction = now
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM predictions WHERE ts < ?", (now - self.raw_retention,)
+            )
+            for table in ("rollups", "shadow_rollups", "drift_sketches"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE minute < ?",
+                    (int((now - self.rollup_retention) // 60),),
+                )
+
+    def fetch_events(self, after_id: int = 0, since: float = 0.0) -> list[tuple]:
+        """Fetch raw events newer than the last one already seen by the caller.
+
+        Parameters
+        ----------
+        after_id : int
+            Only events with a greater id are returned.
+        since : float
+            Only events with a timestamp at or after this value are returned.
+
+        Returns
+        -------
+        list[tuple]
+            Rows of (id, ts, category, latency, correct) ordered by id.
+
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT id, ts, category, latency, correct FROM predictions "
+                "WHERE id > ? AND ts >= ? ORDER BY id",
+                (after_id, since),
+            ).fetchall()
+
+    def fetch_rollups(self, since_minute: int = 0) -> list[tuple]:
+        """Fetch per-minute rollups starting at the given minute.
+
+        Parameters
+        ----------
+        since_minute : int
+            First minute (seconds since the epoch divided by 60) to return.
+
+        Returns
+        -------
+        list[tuple]
+            Rows of (minute, category, count, total_latency, max_latency, labeled, correct).
+
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT minute, category, count, total_latency, max_latency, labeled, correct "
+                "FROM rollups WHERE minute >= ? ORDER BY minute",
+                (since_minute,),
+            ).fetchall()
+
+    def fetch_shadow_rollups(self, since_minute: int = 0) -> list[tuple]:
+        """Fetch per-minute comparisons with the candidate model starting at a minute.
+
+        Parameters
+        ----------
+        since_minute : int
+            First minute (seconds since the epoch divided by 60) to return.
+
+        Returns
+        -------
+        list[tuple]
+            Rows of (minute, category, count, agreed, total_latency,
+            candidate_total_latency, candidate_max_latency), where category is
+            the one predicted by the primary model.
+
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT minute, category, count, agreed, total_latency, "
+                "candidate_total_latency, candidate_max_latency "
+                "FROM shadow_rollups WHERE minute >= ? ORDER BY minute",
+                (since_minute,),
+            ).fetchall()
+
+    def fetch_drift_sketches(self, since_minute: int = 0) -> list[tuple]:
+        """Fetch per-minute drift sketch counts starting at a minute.
+
+        Parameters
+        ----------
+        since_minute : int
+            First minute (seconds since the epoch divided by 60) to return.
+
+        Returns
+        -------
+        list[tuple]
+            Rows of (minute, feature, key, count).
+
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT minute, feature, key, count FROM drift_sketches "
+                "WHERE minute >= ? ORDER BY minute",
+                (since_minute,),
+            ).fetchall()
+
+    def reset(self):
+        """Remove all buffered and stored events."""
+        with self._lock:
+            self._buffer = []
+            self._shadow_buffer = []
+            self._sketch_buffer = []
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM predictions")
+            conn.execute("DELETE FROM rollups")
+            conn.execute("DELETE FROM shadow_rollups")
+            conn.execute("DELETE FROM drift_sketches")
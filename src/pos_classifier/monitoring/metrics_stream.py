@@ -0,0 +1,430 @@
+"""Metrics stream file.
+
+This module provides push-based live metrics for the monitoring dashboard.
+Every API worker aggregates its predictions in memory and drains the delta
+since the previous tick at a fixed cadence. Workers of one host publish their
+deltas to a shared SQLite log, so a WebSocket subscriber reaches the deltas of
+every worker behind the port, whichever worker accepted the connection. The
+dashboard merges deltas from any number of hosts, so it does not need access
+to the API filesystem.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from collections import deque
+from contextlib import closing
+
+from websockets.sync.client import connect
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+def latency_percentile(histogram: list[int], quantile: float) -> float:
+    """Estimate a latency percentile from bucket counts.
+
+    Parameters
+    ----------
+    histogram : list[int]
+        Counts per bucket of LATENCY_BUCKETS, plus one overflow bucket.
+    quantile : float
+        Quantile to estimate, between 0 and 1.
+
+    Returns
+    -------
+    float
+        Upper bound of the bucket holding the quantile, or 0.0 without samples.
+
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0.0
+    rank = quantile * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS + [float("inf")], histogram):
+        seen += count
+        if seen >= rank:
+            return bound if bound != float("inf") else LATENCY_BUCKETS[-1]
+    return LATENCY_BUCKETS[-1]
+
+
+class MetricsAggregator:
+    """Thread-safe accumulator of prediction metrics since the last drain."""
+
+    def __init__(self, worker_id: str | None = None):
+        """Initialize an empty aggregator.
+
+        Parameters
+        ----------
+        worker_id : str, optional
+            Identifier of the API worker. Defaults to '<hostname>:<pid>'.
+
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._reset()
+
+    def _reset(self):
+        self._categories = {}
+        self._requests = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+        self._total_predictions = 0
+        self._correct_predictions = 0
+        self._histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, category: str, latency: float, correct: bool | None = None):
+        """Add a single prediction to the current delta.
+
+        Parameters
+        ----------
+        category : str
+            Predicted category.
+        latency : float
+            Prediction time in seconds.
+        correct : bool, optional
+            Whether the prediction matched a human verified label, if one was given.
+
+        """
+        with self._lock:
+            self._categories[category] = self._categories.get(category, 0) + 1
+            self._requests += 1
+            self._total_time += latency
+            self._max_time = max(self._max_time, latency)
+            self._histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            if correct is not None:
+                self._total_predictions += 1
+                self._correct_predictions += int(correct)
+
+    def drain(self) -> dict:
+        """Return the metrics recorded since the previous drain and start a new delta.
+
+        Returns
+        -------
+        dict
+            JSON-serializable delta tagged with the worker id and a sequence number.
+
+        """
+        with self._lock:
+            self._seq += 1
+            delta = {
+                "worker_id": self.worker_id,
+                "seq": self._seq,
+                "ts": time.time(),
+                "categories": self._categories,
+                "requests": self._requests,
+                "total_time": self._total_time,
+                "max_time": self._max_time,
+                "total_predictions": self._total_predictions,
+                "correct_predictions": self._correct_predictions,
+                "latency_histogram": self._histogram,
+            }
+            self._reset()
+        return delta
+
+
+DELTA_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metric_deltas_ts ON metric_deltas (ts);
+"""
+
+
+class DeltaLog:
+    """SQLite log through which the workers of one host exchange their deltas."""
+
+    def __init__(self, db_path, retention: float = 60.0):
+        """Initialize the log and create its table if needed.
+
+        Parameters
+        ----------
+        db_path : str or Path
+            SQLite database shared by the workers, e.g. METRICS_DB_PATH.
+        retention : float
+            Number of seconds deltas are kept for workers that read them late.
+
+        """
+        self.db_path = str(db_path)
+        self.retention = retention
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(DELTA_LOG_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def publish(self, delta: dict):
+        """Append a delta and drop the deltas older than the retention window.
+
+        Parameters
+        ----------
+        delta : dict
+            Delta produced by `MetricsAggregator.drain`.
+
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO metric_deltas (ts, payload) VALUES (?, ?)",
+                (delta["ts"], json.dumps(delta)),
+            )
+            conn.execute(
+                "DELETE FROM metric_deltas WHERE ts < ?",
+                (delta["ts"] - self.retention,),
+            )
+
+    def last_id(self) -> int:
+        """Return the id of the newest delta, or 0 if the log is empty."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT MAX(id) FROM metric_deltas").fetchone()[0] or 0
+
+    def fetch(self, after_id: int) -> tuple[int, list[dict]]:
+        """Fetch the deltas of all workers published after the given id.
+
+        Parameters
+        ----------
+        after_id : int
+            Only deltas with a greater id are returned.
+
+        Returns
+        -------
+        tuple[int, list[dict]]
+            Id of the newest returned delta (or `after_id`) and the deltas in
+            publication order.
+
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM metric_deltas WHERE id > ? ORDER BY id",
+                (after_id,),
+            ).fetchall()
+        if not rows:
+            return after_id, []
+        return rows[-1][0], [json.loads(payload) for _, payload in rows]
+
+
+class MetricsBroadcaster:
+    """Drain an aggregator at a fixed cadence and fan the deltas out to subscribers.
+
+    Without a delta log, subscribers receive the deltas of this worker only.
+    With one, every worker publishes its deltas to the log and pushes the
+    deltas of all workers to its own subscribers.
+    """
+
+    def __init__(
+        self,
+        aggregator: MetricsAggregator,
+        interval: float = 1.0,
+        delta_log: DeltaLog | None = None,
+    ):
+        """Initialize the broadcaster.
+
+        Parameters
+        ----------
+        aggregator : MetricsAggregator
+            Aggregator to drain.
+        interval : float
+            Number of seconds between two pushed deltas.
+        delta_log : DeltaLog, optional
+            Log shared with the other workers of the host.
+
+        """
+        self.aggregator = aggregator
+        self.interval = interval
+        self.delta_log = delta_log
+        self._subscribers = set()
+        self._task = None
+        self._last_id = 0
+
+    def start(self):
+        """Start the broadcast loop, so deltas are published without subscribers.
+
+        Must be called from a running event loop, e.g. the API lifespan. Only
+        needed with a delta log: other workers relay the published deltas.
+        """
+        if self._task is None or self._task.done():
+            if self.delta_log is not None:
+                self._last_id = self.delta_log.last_id()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the broadcast loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber and start the broadcast loop if it is not running.
+
+        Returns
+        -------
+        asyncio.Queue
+            Queue receiving every delta pushed after the subscription.
+
+        """
+        queue = asyncio.Queue(maxsize=100)
+        self._subscribers.add(queue)
+        self.start()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber registered with `subscribe`."""
+        self._subscribers.discard(queue)
+
+    def _exchange(self, delta: dict) -> list[dict]:
+        self.delta_log.publish(delta)
+        self._last_id, deltas = self.delta_log.fetch(self._last_id)
+        return deltas
+
+    async def _run(self):
+        while self._subscribers or self.delta_log is not None:
+            await asyncio.sleep(self.interval)
+            delta = self.aggregator.drain()
+            if self.delta_log is None:
+                deltas = [delta]
+            else:
+                try:
+                    deltas = await asyncio.to_thread(self._exchange, delta)
+                except Exception as e:
+                    logger.warning(f"Metrics delta log unavailable: {e}")
+                    deltas = [delta]
+            for pushed in deltas:
+                for queue in list(self._subscribers):
+                    if queue.full():
+                        logger.warning("Dropping metrics delta for a slow subscriber.")
+                        queue.get_nowait()
+                    queue.put_nowait(pushed)
+
+    async def serve(self, websocket):
+        """Push deltas to a connected WebSocket until the client disconnects.
+
+        Parameters
+        ----------
+        websocket : fastapi.WebSocket
+            Accepted WebSocket connection.
+
+        """
+        queue = self.subscribe()
+        try:
+            while True:
+                await websocket.send_json(await queue.get())
+        finally:
+            self.unsubscribe(queue)
+
+
+class MetricsFeed:
+    """Subscribe to the metrics streams of one or more API hosts and merge them."""
+
+    def __init__(self, urls: list[str], history: int = 600):
+        """Initialize the feed without connecting.
+
+        Parameters
+        ----------
+        urls : list[str]
+            WebSocket URLs of the API hosts, e.g. 'ws://host:8000/ws/metrics'.
+            One URL per host is enough, its stream relays all of its workers.
+        history : int
+            Number of recent deltas kept for time series charts.
+
+        """
+        self.urls = urls
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._last_seq = {}
+        self.history = deque(maxlen=history)
+        self._threads = []
+
+    def start(self):
+        """Start one background subscriber thread per URL.
+
+        Returns
+        -------
+        MetricsFeed
+            The started feed itself.
+
+        """
+        for url in self.urls:
+            thread = threading.Thread(target=self._listen, args=(url,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _listen(self, url: str):
+        while True:
+            try:
+                with connect(url) as websocket:
+                    logger.info(f"Subscribed to metrics stream at {url}")
+                    for message in websocket:
+                        self.apply(json.loads(message))
+            except Exception as e:
+                logger.warning(f"Metrics stream {url} unavailable: {e}")
+                time.sleep(2)
+
+    def apply(self, delta: dict):
+        """Merge a delta into the running totals, ignoring duplicates.
+
+        Parameters
+        ----------
+        delta : dict
+            Delta produced by `MetricsAggregator.drain`.
+
+        """
+        with self._lock:
+            worker_id = delta["worker_id"]
+            if delta["seq"] <= self._last_seq.get(worker_id, 0):
+                return
+            self._last_seq[worker_id] = delta["seq"]
+
+            totals = self._totals
+            for category, count in delta["categories"].items():
+                totals[category] = totals.get(category, 0) + count
+            for key in ("total_predictions", "correct_predictions"):
+                totals[key] = totals.get(key, 0) + delta[key]
+            totals["total_requests"] = (
+                totals.get("total_requests", 0) + delta["requests"]
+            )
+            totals["total_time"] = totals.get("total_time", 0.0) + delta["total_time"]
+            totals["max_time"] = max(totals.get("max_time", 0.0), delta["max_time"])
+            totals["avg_time"] = (
+                totals["total_time"] / totals["total_requests"]
+                if totals["total_requests"]
+                else 0.0
+            )
+            self.history.append(delta)
+
+    def reset(self):
+        """Clear the merged totals and history while staying subscribed."""
+        with self._lock:
+            self._totals = {}
+            self.history.clear()
+
+    def totals(self) -> dict:
+        """Return merged totals with the same keys as the monitoring JSON file."""
+        with self._lock:
+            return dict(self._totals)
+
+    def recent(self) -> list[dict]:
+        """Return the recent deltas of all workers, oldest first."""
+        with self._lock:
+            return list(self.history)
+
+    def workers(self) -> list[str]:
+        """Return the ids of the workers that pushed at least one delta."""
+        with self._lock:
+            return sorted(self._last_seq)
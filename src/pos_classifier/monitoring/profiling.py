@@ -0,0 +1,246 @@
+"""Profiling file.
+
+This module provides opt-in cProfile profiling of API requests and training
+stages. Profiles are written as `.prof` files to a directory that keeps only the
+most recent ones, and can be inspected with `python -m pstats` or snakeviz.
+
+For the API, an ASGI middleware decides which requests are profiled (a request
+header, a sampling rate and an on/off toggle) and endpoints decorated with
+`profile_endpoint` run under the request's profiler, also when FastAPI executes
+them in its threadpool. Neither is installed unless profiling is enabled.
+"""
+
+import cProfile
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from pos_classifier.config.config import PROFILE_DIR, PROFILE_MAX_FILES
+
+logger = logging.getLogger(__name__)
+
+current_profile: ContextVar[cProfile.Profile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+class ProfileStore:
+    """Directory of profiles that keeps only the most recent files."""
+
+    def __init__(self, directory=PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        """Initialize the store.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Directory receiving the `.prof` files.
+        max_files : int
+            Number of most recent profiles kept; older ones are deleted.
+
+        """
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, profile: cProfile.Profile, name: str) -> Path:
+        """Write a profile and delete the oldest ones beyond `max_files`.
+
+        Parameters
+        ----------
+        profile : cProfile.Profile
+            Stopped profiler.
+        name : str
+            Prefix of the file name, e.g. the route or the training stage.
+
+        Returns
+        -------
+        Path
+            Path of the written profile.
+
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = self.directory / f"{name}_{timestamp}.prof"
+        profile.dump_stats(path)
+        self.rotate()
+        logger.info(f"Profile written to {path}")
+        return path
+
+    def rotate(self):
+        """Delete the oldest profiles beyond `max_files`."""
+        profiles = sorted(
+            self.directory.glob("*.prof"), key=lambda path: path.stat().st_mtime
+        )
+        for path in profiles[: max(len(profiles) - self.max_files, 0)]:
+            path.unlink(missing_ok=True)
+
+    def names(self) -> list[str]:
+        """Return the names of the stored profiles, newest first."""
+        if not self.directory.exists():
+            return []
+        profiles = sorted(
+            self.directory.glob("*.prof"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        return [path.name for path in profiles]
+
+
+class RequestProfiler:
+    """Decide which API requests are profiled and store their profiles."""
+
+    def __init__(
+        self,
+        store: ProfileStore | None = None,
+        sample_rate: float = 0.0,
+        header: str = "X-Profile",
+    ):
+        """Initialize the profiler.
+
+        Parameters
+        ----------
+        store : ProfileStore, optional
+            Store of the request profiles. Defaults to a ProfileStore in PROFILE_DIR.
+        sample_rate : float, optional
+            Share of requests profiled at random. Defaults to 0.0.
+        header : str, optional
+            Request header forcing a profile unless set to '0' or 'false'.
+            Defaults to 'X-Profile'.
+
+        """
+        self.store = store or ProfileStore()
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode()
+        self.enabled = True
+
+    def should_profile(self, scope: dict) -> bool:
+        """Return whether a request is profiled.
+
+        Parameters
+        ----------
+        scope : dict
+            ASGI scope of the request.
+
+        Returns
+        -------
+        bool
+            True if profiling is enabled and the request carries the header or
+            is sampled.
+
+        """
+        if not self.enabled:
+            return False
+        for key, value in scope.get("headers", ()):
+            if key == self.header:
+                return value.lower() not in (b"0", b"false")
+        return random.random() < self.sample_rate
+
+    def settings(self) -> dict:
+        """Return the toggle, sampling rate and stored profiles."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "profiles": self.store.names(),
+        }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests selected by a RequestProfiler."""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        """Wrap an ASGI app.
+
+        Parameters
+        ----------
+        app : ASGI app
+            Application to wrap.
+        profiler : RequestProfiler
+            Decides which requests are profiled and stores the profiles.
+
+        """
+        self.app = app
+        self.profiler = profiler
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        """Run the request, under a profiler if it is selected."""
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        # cProfile allows one active profiler at a time, concurrent requests
+        # selected while another one is profiled run unprofiled.
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        profile = cProfile.Profile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            self._lock.release()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            route = scope["path"].strip("/").replace("/", "_") or "root"
+            self.profiler.store.save(profile, f"{route}_{elapsed_ms:.0f}ms")
+
+
+def profile_endpoint(enabled: bool = True):
+    """Decorate an endpoint to run under the profiler of the current request.
+
+    Sync endpoints are profiled exactly. An async endpoint keeps the profiler
+    enabled on the event loop thread across its awaits, so its profile also
+    contains whatever other requests run on the loop meanwhile, and misses work
+    it hands to other threads, e.g. with `asyncio.to_thread`. Since one thread
+    holds a single profiler, a concurrent profiled async request takes the loop
+    over and ends both profiles early. Profile async endpoints one request at a
+    time, with the `X-Profile` header rather than sampling.
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        Whether profiling is installed; if False the endpoint is returned
+        unchanged. Defaults to True.
+
+    Returns
+    -------
+    Callable
+        Decorator for sync and async endpoints.
+
+    """
+
+    def decorator(func):
+        if not enabled:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                profile = current_profile.get()
+                if profile is None:
+                    return await func(*args, **kwargs)
+                profile.enable()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profile.disable()
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = current_profile.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            return profile.runcall(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,196 @@
+"""Telemetry file.
+
+This module provides per-stage timings and resource metrics of training runs.
+They are written to the log, to the active MLflow run and to a JSON run report,
+so slower runs can be traced back to data growth, thread settings or
+hyperparameters. Stages can also be profiled with cProfile.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import time
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import mlflow
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from pos_classifier.config.config import TELEMETRY_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> dict[str, float]:
+    """Return the peak resident set size of this process and of its waited children.
+
+    Returns
+    -------
+    dict[str, float]
+        'peak_rss_mb' and 'peak_rss_children_mb', empty if `resource` is unavailable.
+
+    """
+    if resource is None:
+        return {}
+    return {
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_rss_children_mb": (
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        ),
+    }
+
+
+def fasttext_training_stats(model, train_time: float) -> dict[str, float]:
+    """Compute the training throughput of a trained FastText model.
+
+    Parameters
+    ----------
+    model : fasttext.FastText._FastText
+        Trained model.
+    train_time : float
+        Seconds spent in `fasttext.train_supervised`.
+
+    Returns
+    -------
+    dict[str, float]
+        Thread count, epochs, tokens per epoch and words/sec/thread, as in the
+        FastText progress line.
+
+    """
+    args = model.f.getArgs()
+    _, word_counts = model.get_words(include_freq=True)
+    _, label_counts = model.get_labels(include_freq=True)
+    tokens = int(word_counts.sum() + label_counts.sum())
+    return {
+        "thread": args.thread,
+        "epoch": args.epoch,
+        "tokens_per_epoch": tokens,
+        "words_per_sec_per_thread": (
+            args.epoch * tokens / (train_time * args.thread) if train_time else 0.0
+        ),
+    }
+
+
+class RunTelemetry:
+    """Collect stage timings and metrics of one training run."""
+
+    def __init__(self, name: str, profile_store=None):
+        """Initialize an empty telemetry record.
+
+        Parameters
+        ----------
+        name : str
+            Name of the run, used for the report file name (e.g. 'train').
+        profile_store : ProfileStore, optional
+            Store receiving a cProfile profile of every stage. Stages are not
+            profiled by default.
+
+        """
+        self.name = name
+        self.profile_store = profile_store
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stages = {}
+        self.metrics = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage; repeated stages add up.
+
+        Parameters
+        ----------
+        name : str
+            Stage name (e.g. 'load', 'clean', 'write_fasttext_file', 'train').
+
+        """
+        profile = cProfile.Profile() if self.profile_store is not None else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            logger.info(f"[{self.name}] stage '{name}' took {elapsed:.2f}s")
+            if profile is not None:
+                profile.disable()
+                self.profile_store.save(profile, f"{self.name}_{name}")
+
+    def record(self, **metrics):
+        """Add scalar metrics to the record (e.g. model_size_mb=12.5)."""
+        self.metrics.update(metrics)
+
+    def report(self) -> dict:
+        """Return the JSON-serializable run report.
+
+        Returns
+        -------
+        dict
+            Run name, start time, stage timings, total time, metrics and peak RSS.
+
+        """
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "stages": dict(self.stages),
+            "total_time": sum(self.stages.values()),
+            "metrics": {**self.metrics, **peak_rss_mb()},
+        }
+
+    def flat_metrics(self) -> dict[str, float]:
+        """Return the report as flat MLflow metrics ('time_<stage>' and metrics)."""
+        report = self.report()
+        metrics = {f"time_{stage}": value for stage, value in report["stages"].items()}
+        metrics["time_total"] = report["total_time"]
+        metrics.update(
+            {
+                key: value
+                for key, value in report["metrics"].items()
+                if isinstance(value, int | float)
+            }
+        )
+        return metrics
+
+    def log(self):
+        """Write a one-line summary of the run to the log."""
+        summary = ", ".join(
+            f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in self.flat_metrics().items()
+        )
+        logger.info(f"[{self.name}] telemetry: {summary}")
+
+    def log_to_mlflow(self):
+        """Log the metrics and the JSON report to the active MLflow run, if any."""
+        if mlflow.active_run() is None:
+            return
+        mlflow.log_metrics(self.flat_metrics())
+        mlflow.log_dict(self.report(), "telemetry/report.json")
+
+    def write_report(self, report_dir=TELEMETRY_DIR) -> Path:
+        """Write the run report to '<report_dir>/<name>_<timestamp>.json'.
+
+        Parameters
+        ----------
+        report_dir : Path, optional
+            Directory of the reports. Defaults to TELEMETRY_DIR.
+
+        Returns
+        -------
+        Path
+            Path of the written report.
+
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        timestamp = self.started_at.replace(":", "").replace("-", "")
+        path = Path(report_dir) / f"{self.name}_{timestamp}.json"
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"[{self.name}] telemetry report written to {path}")
+        return path
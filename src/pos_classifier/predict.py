@@ -0,0 +1,222 @@
+"""Predict file.
+
+This module provides scheduled batch prediction of a CSV file. By default only
+descriptions that were not scored by the current model yet are sent to FastText;
+the others are read from the prediction cache and merged into the output. The
+output is written as CSV, Parquet or Arrow IPC, optionally with the top-k
+categories of every row.
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from pos_classifier.config.logging_config import setup_logging
+from pos_classifier.config.config import (
+    FASTTEXT_MODEL_PATH,
+    LABEL_ENCODER_PATH,
+    OUTPUT_DIR,
+    PREDICTION_OUTPUT_FORMAT,
+    PREDICTION_ROW_GROUP_SIZE,
+    PREDICTION_TOP_K,
+    QUERY_VAL_DATA_PATH,
+    get_prediction_output_path,
+)
+from pos_classifier.data.data_loader import load_data
+from pos_classifier.data.postprocessing import (
+    decode_fasttext_labels,
+    decode_fasttext_top_k,
+    load_label_encoder,
+)
+from pos_classifier.data.prediction_writer import OUTPUT_FORMATS, PredictionWriter
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.prediction_cache import (
+    PredictionCache,
+    hash_descriptions,
+    model_version,
+)
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+def predict_incremental(
+    df: pd.DataFrame,
+    model: FastTextModelWrapper,
+    label_encoder,
+    cache: PredictionCache,
+) -> tuple[pd.DataFrame, int]:
+    """Score the descriptions missing from the cache and merge them with cached ones.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input data with a 'product_description' column.
+    model : FastTextModelWrapper
+        Loaded model, of the version the cache is bound to.
+    label_encoder : LabelEncoder
+        Encoder fitted during preprocessing.
+    cache : PredictionCache
+        Cache of the predictions of earlier runs.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, int]
+        'product_description', 'predicted_category' and 'probability' for every
+        input row, and the number of distinct descriptions scored by the model.
+
+    """
+    descriptions = df["product_description"].fillna("").astype(str)
+    hashes = hash_descriptions(descriptions)
+    cached = cache.lookup(hashes)
+
+    new = ~np.isin(hashes, cached["description_hash"].to_numpy())
+    new_hashes, first = np.unique(hashes[new], return_index=True)
+    scored = cached
+    if len(new_hashes):
+        texts = descriptions.to_numpy()[new][first].tolist()
+        labels, probabilities = model.predict_batch(texts)
+        categories = decode_fasttext_labels(labels, label_encoder)
+        top_probabilities = np.fromiter(
+            (probability[0] for probability in probabilities),
+            dtype=np.float64,
+            count=len(probabilities),
+        )
+        cache.store(new_hashes, categories, top_probabilities)
+        scored = pd.concat(
+            [
+                cached,
+                pd.DataFrame(
+                    {
+                        "description_hash": new_hashes,
+                        "predicted_category": categories,
+                        "probability": top_probabilities,
+                    }
+                ),
+            ],
+            ignore_index=True,
+        )
+
+    scored = scored.set_index("description_hash").loc[hashes]
+    result = pd.DataFrame(
+        {
+            "product_description": df["product_description"].to_numpy(),
+            "predicted_category": scored["predicted_category"].to_numpy(),
+            "probability": scored["probability"].to_numpy(),
+        }
+    )
+    return result, len(new_hashes)
+
+
+def predict_top_k(
+    df: pd.DataFrame, model: FastTextModelWrapper, label_encoder, top_k: int
+) -> pd.DataFrame:
+    """Score every distinct description once and keep its top-k categories.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input data with a 'product_description' column.
+    model : FastTextModelWrapper
+        Loaded model.
+    label_encoder : LabelEncoder
+        Encoder fitted during preprocessing.
+    top_k : int
+        Number of categories kept per row.
+
+    Returns
+    -------
+    pd.DataFrame
+        'product_description', 'predicted_category', 'probability' and the
+        'top<i>_category' and 'top<i>_probability' columns for every input row.
+
+    """
+    descriptions = df["product_description"].fillna("").astype(str)
+    codes, uniques = pd.factorize(descriptions)
+    labels, probabilities = model.predict_batch(uniques.tolist(), k=top_k)
+    scored = decode_fasttext_top_k(labels, probabilities, label_encoder, top_k)
+    result = scored.iloc[codes].reset_index(drop=True)
+    result.insert(0, "product_description", df["product_description"].to_numpy())
+    return result
+
+
+def main(
+    input_path=QUERY_VAL_DATA_PATH,
+    incremental: bool = True,
+    output_format: str = PREDICTION_OUTPUT_FORMAT,
+    top_k: int = PREDICTION_TOP_K,
+) -> str:
+    """Score a CSV file and save the predictions to a timestamped output file.
+
+    Parameters
+    ----------
+    input_path : str or Path, optional
+        CSV file with a 'Product Description' column. Defaults to QUERY_VAL_DATA_PATH.
+    incremental : bool, optional
+        Reuse predictions of earlier runs of the same model. Defaults to True;
+        False clears the cache and rescores every row.
+    output_format : str, optional
+        'csv', 'parquet' or 'arrow'. Defaults to PREDICTION_OUTPUT_FORMAT.
+    top_k : int, optional
+        Number of categories per row. Defaults to PREDICTION_TOP_K. The cache
+        only holds the top category, so every row is scored when top_k > 1.
+
+    Returns
+    -------
+    str
+        Path of the output file.
+
+    """
+    df = load_data(input_path)
+    logger.info(f"Loaded {len(df)} rows from {input_path}.")
+
+    model = FastTextModelWrapper({"model_location": str(FASTTEXT_MODEL_PATH)})
+    model.load_model()
+    label_encoder = load_label_encoder()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cache = PredictionCache()
+    if not incremental:
+        cache.reset()
+    if cache.set_model_version(model_version(FASTTEXT_MODEL_PATH, LABEL_ENCODER_PATH)):
+        logger.info("Model version changed, cached predictions were invalidated.")
+
+    if top_k > 1:
+        result_df = predict_top_k(df, model, label_encoder, top_k)
+        logger.info(f"Scored {len(result_df)} rows with their top {top_k} categories.")
+    else:
+        result_df, n_scored = predict_incremental(df, model, label_encoder, cache)
+        logger.info(
+            f"Scored {n_scored} new descriptions, "
+            f"the other predictions of {len(result_df)} rows came from the cache."
+        )
+
+    output_path = get_prediction_output_path(OUTPUT_FORMATS[output_format])
+    with PredictionWriter(
+        output_path,
+        label_encoder.classes_,
+        output_format,
+        top_k,
+        PREDICTION_ROW_GROUP_SIZE,
+    ) as writer:
+        writer.write(result_df)
+    logger.info(f"Batch prediction completed. Results saved to {output_path}.")
+    return str(output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=str(QUERY_VAL_DATA_PATH))
+    parser.add_argument(
+        "--full", action="store_true", help="Rescore every row, ignoring the cache."
+    )
+    parser.add_argument(
+        "--format", choices=sorted(OUTPUT_FORMATS), default=PREDICTION_OUTPUT_FORMAT
+    )
+    parser.add_argument("--top-k", type=int, default=PREDICTION_TOP_K)
+    args = parser.parse_args()
+    main(args.input, not args.full, args.format, args.top_k)
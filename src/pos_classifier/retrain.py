@@ -0,0 +1,287 @@
+"""Retrain file.
+
+This module provides incremental retraining of the FastText model from human
+verified labels collected in the feedback store. A retrain only runs once
+enough new labels have accumulated, and it starts from the word vectors of the
+current model instead of from scratch.
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+
+import pandas as pd
+
+from pos_classifier.config.logging_config import setup_logging
+from pos_classifier.config.config import (
+    FASTTEXT_MODEL_PATH,
+    FASTTEXT_TRAIN_FILE,
+    TELEMETRY_DIR,
+)
+from pos_classifier.data.feedback_store import FeedbackStore
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.data.preprocessing import clean_texts, format_fasttext_lines
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.monitoring.telemetry import RunTelemetry
+from pos_classifier.train import read_params_file
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("warm_start", "delta_replay")
+
+
+def export_word_vectors(model, path) -> int:
+    """Write the word vectors of a FastText model in the .vec text format.
+
+    The file can be passed as `pretrainedVectors` to warm-start a new model.
+    Only the word rows are exported; the word n-gram buckets start from scratch.
+
+    Parameters
+    ----------
+    model : fasttext.FastText._FastText
+        Trained model.
+    path : str or Path
+        Output .vec file path.
+
+    Returns
+    -------
+    int
+        Number of exported words.
+
+    """
+    words = model.get_words()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{len(words)} {model.get_dimension()}\n")
+        for word in words:
+            vector = " ".join(f"{value:.6g}" for value in model.get_word_vector(word))
+            f.write(f"{word} {vector}\n")
+    return len(words)
+
+
+def sample_lines(path, n_lines: int, seed: int = 0) -> list[str]:
+    """Draw a uniform sample of lines from a file in one pass with bounded memory.
+
+    Parameters
+    ----------
+    path : str or Path
+        Text file to sample from.
+    n_lines : int
+        Sample size; the whole file is returned if it has fewer lines.
+    seed : int
+        Random seed of the reservoir sampling.
+
+    Returns
+    -------
+    list[str]
+        Sampled lines, in file order.
+
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    with open(path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i < n_lines:
+                reservoir.append((i, line))
+            elif (j := rng.randint(0, i)) < n_lines:
+                reservoir[j] = (i, line)
+    return [line for _, line in sorted(reservoir)]
+
+
+def format_feedback_lines(feedback: pd.DataFrame, label_encoder) -> pd.Series:
+    """Clean, label-encode and format verified labels as FastText training lines.
+
+    Categories unknown to the label encoder are skipped, since a new class
+    needs a full retrain with a refitted encoder.
+
+    Parameters
+    ----------
+    feedback : pd.DataFrame
+        Verified labels with 'product_description' and 'category'.
+    label_encoder : LabelEncoder
+        Encoder of the current model.
+
+    Returns
+    -------
+    pd.Series
+        One '__label__<label> <text>' line per usable label
+
+    """
+    known = feedback["category"].isin(label_encoder.classes_)
+    if not known.all():
+        unknown = sorted(feedback.loc[~known, "category"].unique())
+        logger.warning(f"Skipping {(~known).sum()} labels of unknown classes {unknown}")
+    df = feedback[known].copy()
+    df["product_description"] = clean_texts(df["product_description"])
+    df = df[df["product_description"].str.strip() != ""]
+    df["label"] = label_encoder.transform(df["category"])
+    return format_fasttext_lines(df)
+
+
+def retrain_model(
+    feedback: pd.DataFrame,
+    current_model_path,
+    train_file,
+    output_path,
+    label_encoder,
+    params: dict,
+    strategy: str = "delta_replay",
+    replay_size: int = 100_000,
+    warm_start_epoch: int = 5,
+    seed: int = 0,
+    report_dir=TELEMETRY_DIR,
+) -> dict:
+    """Train a new model from verified labels, warm-started from the current one.
+
+    - 'warm_start' trains on the full training file plus the feedback for
+      `warm_start_epoch` epochs.
+    - 'delta_replay' trains on the feedback plus `replay_size` lines sampled
+      from the training file, with the epochs of `params`.
+
+    Both initialize the word vectors from the current model (`pretrainedVectors`)
+    and keep its label encoding.
+
+    Parameters
+    ----------
+    feedback : pd.DataFrame
+        Deduplicated verified labels with 'product_description' and 'category'.
+    current_model_path : str or Path
+        Model to warm-start from.
+    train_file : str or Path
+        FastText training file of the current model.
+    output_path : str or Path
+        Where to save the new model; replaced only once training succeeded.
+    label_encoder : LabelEncoder
+        Encoder of the current model.
+    params : dict
+        FastText training parameters.
+    strategy : str
+        'warm_start' or 'delta_replay'.
+    replay_size : int
+        Number of training file lines replayed by 'delta_replay'.
+    warm_start_epoch : int
+        Number of epochs of 'warm_start'.
+    seed : int
+        Random seed of the replay sample.
+    report_dir : str or Path
+        Directory of the telemetry report. Defaults to TELEMETRY_DIR.
+
+    Returns
+    -------
+    dict
+        Telemetry report of the retrain.
+
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown retraining strategy '{strategy}'.")
+    telemetry = RunTelemetry(f"retrain_{strategy}")
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as workdir:
+        current = FastTextModelWrapper({"model_location": str(current_model_path)})
+        current.load_model()
+        vectors_path = os.path.join(workdir, "current.vec")
+        with telemetry.stage("export_vectors"):
+            export_word_vectors(current.model, vectors_path)
+        dim = current.model.get_dimension()
+        current.clear_model()
+
+        input_path = os.path.join(workdir, "retrain.txt")
+        with telemetry.stage("write_fasttext_file"):
+            feedback_lines = format_feedback_lines(feedback, label_encoder)
+            with open(input_path, "w", encoding="utf-8") as f:
+                if strategy == "warm_start":
+                    with open(train_file, encoding="utf-8") as source:
+                        shutil.copyfileobj(source, f)
+                    replay_lines = 0
+                else:
+                    replayed = sample_lines(train_file, replay_size, seed)
+                    f.writelines(replayed)
+                    replay_lines = len(replayed)
+                f.writelines(feedback_lines)
+        telemetry.record(feedback_lines=len(feedback_lines), replay_lines=replay_lines)
+
+        retrain_params = {
+            **params,
+            "input": input_path,
+            "model_location": os.path.join(workdir, "model.bin"),
+            "pretrainedVectors": vectors_path,
+            "dim": dim,
+        }
+        if strategy == "warm_start":
+            retrain_params["epoch"] = warm_start_epoch
+        FastTextModelWrapper(retrain_params).train(telemetry)
+        os.replace(retrain_params["model_location"], output_path)
+
+    telemetry.log()
+    telemetry.write_report(report_dir)
+    return telemetry.report()
+
+
+def main(strategy: str | None = None, force: bool = False) -> dict | None:
+    """Retrain the served model from the feedback store when enough labels are new.
+
+    Parameters
+    ----------
+    strategy : str, optional
+        'warm_start' or 'delta_replay'. Defaults to `retraining.strategy`.
+    force : bool, optional
+        Retrain even if fewer than `retraining.min_new_labels` labels are new.
+
+    Returns
+    -------
+    dict or None
+        Telemetry report of the retrain, None if it was skipped.
+
+    """
+    config = read_params_file()
+    options = config.get("retraining") or {}
+    strategy = strategy or options.get("strategy", "delta_replay")
+    store = FeedbackStore()
+
+    new_labels = store.count_new()
+    min_new_labels = options.get("min_new_labels", 1000)
+    if new_labels < min_new_labels and not force:
+        logger.info(
+            f"Skipping retrain: {new_labels} new verified labels, "
+            f"{min_new_labels} required."
+        )
+        return None
+
+    # Only the labels added since the last retrain are trained on, the same
+    # ones counted by the min_new_labels gate.
+    feedback = store.fetch(store.watermark())
+    if feedback.empty:
+        logger.info("Skipping retrain: no new verified labels.")
+        return None
+    logger.info(
+        f"Retraining with strategy '{strategy}' on {len(feedback)} distinct new "
+        f"verified labels ({new_labels} appended)."
+    )
+    report = retrain_model(
+        feedback,
+        FASTTEXT_MODEL_PATH,
+        FASTTEXT_TRAIN_FILE,
+        FASTTEXT_MODEL_PATH,
+        load_label_encoder(),
+        config["parameters"],
+        strategy=strategy,
+        replay_size=options.get("replay_size", 100_000),
+        warm_start_epoch=options.get("warm_start_epoch", 5),
+    )
+    store.mark_retrained(int(feedback["id"].max()))
+    logger.info(f"Model saved to {FASTTEXT_MODEL_PATH}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strategy", choices=STRATEGIES)
+    parser.add_argument(
+        "--force", action="store_true", help="Retrain regardless of min_new_labels."
+    )
+    args = parser.parse_args()
+    main(args.strategy, args.force)
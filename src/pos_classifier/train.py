@@ -3,27 +3,71 @@
 This module provides methods for training FastText model.
 """
 
+import mlflow
 import yaml
 import logging
 import os
 
+from contextlib import nullcontext
+
 from pos_classifier.config.logging_config import setup_logging
 from pos_classifier.config.config import (
     FASTTEXT_MODEL_PATH,
+    LABEL_ENCODER_PATH,
+    MLFLOW_EXPERIMENT_NAME,
+    MLFLOW_TRACKING_URI,
     PARAMS_PATH,
+    TRAINING_MLFLOW_LOGGING,
+    TRAINING_PROFILING,
     TRAIN_DATA_PATH,
     FASTTEXT_TRAIN_FILE,
     MODEL_DIR,
+    SIMILARITY_INDEX_DIR,
 )
 from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.similarity_index import (
+    build_similarity_index,
+    read_fasttext_training_lines,
+)
 from pos_classifier.data.data_loader import load_data
-from pos_classifier.data.preprocessing import prepare_data_for_fasttext, preprocess_data
+from pos_classifier.data.postprocessing import load_label_encoder
+from pos_classifier.monitoring.drift import (
+    build_reference,
+    sample_descriptions,
+    save_reference,
+)
+from pos_classifier.monitoring.profiling import ProfileStore
+from pos_classifier.monitoring.telemetry import RunTelemetry
+from pos_classifier.data.preprocessing import (
+    CorpusCompactor,
+    prepare_data_for_fasttext,
+    preprocess_data,
+    stream_fasttext_training_file,
+)
 
 setup_logging()
 
 logger = logging.getLogger(__name__)
 
 
+def read_params_file(yaml_path=PARAMS_PATH) -> dict:
+    """Read every section of a YAML configuration file.
+
+    Parameters
+    ----------
+    yaml_path : str
+        Path to the YAML configuration file.
+
+    Returns
+    -------
+    dict
+        Parsed configuration, one entry per section.
+
+    """
+    with open(yaml_path) as f:
+        return yaml.safe_load(f) or {}
+
+
 def load_params(yaml_path=PARAMS_PATH):
     """Load model parameters from a YAML configuration file.
 
@@ -38,31 +82,161 @@ def load_params(yaml_path=PARAMS_PATH):
         Dictionary of parameters to be used for training.
 
     """
-    with open(yaml_path) as f:
-        config = yaml.safe_load(f)
-    return config["parameters"]
+    return read_params_file(yaml_path)["parameters"]
 
 
-def main():
-    """Load data and train FastText model."""
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    params = load_params()
-    params.update(
-        {"input": str(FASTTEXT_TRAIN_FILE), "model_location": str(FASTTEXT_MODEL_PATH)}
-    )
+def load_params_section(section: str, yaml_path=PARAMS_PATH) -> dict:
+    """Load the options of one section of a YAML configuration file.
 
-    logger.info("Loading and preprocessing training data...")
-    df = load_data(TRAIN_DATA_PATH)
-    train_df = preprocess_data(df)
+    Parameters
+    ----------
+    section : str
+        Section name, e.g. 'preprocessing' or 'retraining'.
+    yaml_path : str
+        Path to the YAML configuration file.
 
-    logger.info("Saving FastText formatted training data...")
-    prepare_data_for_fasttext(train_df, FASTTEXT_TRAIN_FILE)
+    Returns
+    -------
+    dict
+        Dictionary of options, empty if the section is missing.
+
+    """
+    return read_params_file(yaml_path).get(section) or {}
+
+
+def build_compactor(preprocessing: dict) -> CorpusCompactor | None:
+    """Create the corpus compactor configured in the preprocessing options.
+
+    Parameters
+    ----------
+    preprocessing : dict
+        Preprocessing options, the 'preprocessing' section of params.yaml.
+
+    Returns
+    -------
+    CorpusCompactor or None
+        Compactor capping repeated lines, None if compaction is disabled.
+
+    """
+    max_replicas = preprocessing.get("compact_max_replicas")
+    return CorpusCompactor(max_replicas) if max_replicas else None
+
+
+def start_mlflow_run():
+    """Start an MLflow run for the training telemetry when it is enabled.
+
+    Returns
+    -------
+    ContextManager
+        Active MLflow run if TRAINING_MLFLOW_LOGGING is set, else a no-op context.
 
-    logger.info("Training FastText model...")
-    model = FastTextModelWrapper(params)
-    model.train()
+    """
+    if not TRAINING_MLFLOW_LOGGING:
+        return nullcontext()
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+    return mlflow.start_run(run_name="FastText Training")
+
+
+def main():
+    """Load data and train FastText model, recording per-stage telemetry.
 
-    logger.info(f"Model saved to {FASTTEXT_MODEL_PATH}")
+    With TRAINING_PROFILING set, every stage is also profiled to PROFILE_DIR.
+    With `similarity.build_index` set, the distinct training lines are embedded
+    into the similarity index in SIMILARITY_INDEX_DIR after training.
+    With `drift.reference_rows` set, the predictions of the model on a sample of
+    the training data are sketched to DRIFT_REFERENCE_PATH for drift monitoring.
+    """
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    config = read_params_file()
+    params = {
+        **config["parameters"],
+        "input": str(FASTTEXT_TRAIN_FILE),
+        "model_location": str(FASTTEXT_MODEL_PATH),
+    }
+    preprocessing = config.get("preprocessing") or {}
+    n_workers = preprocessing.get("n_workers", 1)
+    compactor = build_compactor(preprocessing)
+    telemetry = RunTelemetry("train", ProfileStore() if TRAINING_PROFILING else None)
+    telemetry.record(n_workers=n_workers)
+
+    if preprocessing.get("streaming", False):
+        logger.info("Streaming FastText formatted training data...")
+        # Loading, cleaning and writing are interleaved chunk by chunk.
+        with telemetry.stage("write_fasttext_file"):
+            written = stream_fasttext_training_file(
+                TRAIN_DATA_PATH,
+                FASTTEXT_TRAIN_FILE,
+                chunksize=preprocessing.get("chunksize", 100_000),
+                n_workers=n_workers,
+                compactor=compactor,
+            )
+        logger.info(f"Wrote {written} training lines.")
+    else:
+        logger.info("Loading and preprocessing training data...")
+        with telemetry.stage("load"):
+            df = load_data(TRAIN_DATA_PATH)
+        with telemetry.stage("clean"):
+            train_df = preprocess_data(df, n_workers=n_workers)
+
+        logger.info("Saving FastText formatted training data...")
+        with telemetry.stage("write_fasttext_file"):
+            written = prepare_data_for_fasttext(
+                train_df, FASTTEXT_TRAIN_FILE, compactor
+            )
+        logger.info(f"Wrote {written} training lines.")
+    telemetry.record(train_lines=written)
+    if compactor is not None:
+        report = compactor.report()
+        logger.info(
+            f"Compacted {report['compaction_lines_in']} training lines to "
+            f"{report['compaction_lines_out']} "
+            f"(ratio {report['compaction_ratio']:.2f})."
+        )
+        telemetry.record(**report)
+
+    with start_mlflow_run() as run:
+        if run is not None:
+            mlflow.log_params(params)
+        logger.info("Training FastText model...")
+        model = FastTextModelWrapper(params)
+        model.train(telemetry)
+        logger.info(f"Model saved to {FASTTEXT_MODEL_PATH}")
+
+        similarity = config.get("similarity") or {}
+        if similarity.get("build_index", False):
+            logger.info("Building similarity index...")
+            with telemetry.stage("similarity_index"):
+                texts, labels = read_fasttext_training_lines(FASTTEXT_TRAIN_FILE)
+                index = build_similarity_index(
+                    model,
+                    texts,
+                    labels,
+                    load_label_encoder(LABEL_ENCODER_PATH).classes_,
+                    SIMILARITY_INDEX_DIR,
+                    n_partitions=similarity.get("n_partitions", 0),
+                )
+            telemetry.record(similarity_index_rows=index["rows"])
+
+        reference_rows = (config.get("drift") or {}).get("reference_rows")
+        if reference_rows:
+            logger.info("Capturing drift reference...")
+            with telemetry.stage("drift_reference"):
+                descriptions = sample_descriptions(
+                    TRAIN_DATA_PATH,
+                    reference_rows,
+                    chunksize=preprocessing.get("chunksize", 100_000),
+                )
+                save_reference(
+                    build_reference(
+                        model, load_label_encoder(LABEL_ENCODER_PATH), descriptions
+                    )
+                )
+
+        telemetry.log()
+        telemetry.write_report()
+        telemetry.log_to_mlflow()
+    return telemetry.report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,369 @@
+"""Test API file.
+
+This file provides tests for the model service and health endpoints of the API.
+"""
+
+import io
+import json
+import time
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sklearn.preprocessing import LabelEncoder
+
+import app.monitoring.json_monitor as json_monitor
+import app.pos_api as pos_api
+from app.model_service import ModelService
+from app.shadow_scorer import ShadowScorer
+from pos_classifier.data.feedback_store import FeedbackStore
+from pos_classifier.data.prediction_writer import read_predictions
+from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.monitoring.drift import (
+    merge_sketches,
+    sample_descriptions,
+    sketch_batch,
+)
+from pos_classifier.monitoring.metrics_store import MetricsStore
+from pos_classifier.monitoring.metrics_stream import DeltaLog, MetricsBroadcaster
+from pos_classifier.model.similarity_index import (
+    build_similarity_index,
+    read_fasttext_training_lines,
+)
+from pos_classifier.monitoring.profiling import ProfileStore, RequestProfiler
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    """Fixture that trains a tiny model and saves its label encoder."""
+    import joblib
+
+    train_file = tmp_path / "train.txt"
+    train_file.write_text("__label__0 cola soda\n__label__1 milk eggs\n" * 50)
+    model_path = tmp_path / "model.bin"
+    FastTextModelWrapper(
+        {
+            "input": str(train_file),
+            "model_location": str(model_path),
+            "minCount": 1,
+            "thread": 1,
+            "verbose": 0,
+        }
+    ).train()
+    encoder_path = tmp_path / "label_encoder.pkl"
+    joblib.dump(LabelEncoder().fit(["Beverages", "Fresh"]), encoder_path)
+    return model_path, encoder_path
+
+
+@pytest.fixture(autouse=True)
+def api_stores(monkeypatch, tmp_path):
+    """Fixture that points the SQLite-backed stores of the API at a temporary directory."""
+    monkeypatch.setattr(
+        pos_api, "metrics_store", MetricsStore(tmp_path / "m.db", flush_interval=0.05)
+    )
+    monkeypatch.setattr(pos_api, "feedback_store", FeedbackStore(tmp_path / "f.db"))
+    monkeypatch.setattr(
+        pos_api,
+        "metrics_broadcaster",
+        MetricsBroadcaster(
+            pos_api.metrics_aggregator,
+            pos_api.METRICS_STREAM_INTERVAL,
+            DeltaLog(tmp_path / "m.db"),
+        ),
+    )
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, model_files):
+    """Fixture that serves the API with a tiny model."""
+    service = ModelService(*model_files, warmup_samples=5)
+    monkeypatch.setattr(pos_api, "model_service", service)
+    with TestClient(pos_api.app) as client:
+        assert service.wait(timeout=30)
+        yield client
+
+
+def test_model_service_reports_ready_after_warmup(model_files):
+    """Test that the service loads, warms up and predicts."""
+    service = ModelService(*model_files, warmup_samples=3)
+    assert not service.ready
+    assert service.health()["status"] == "starting"
+
+    service.start()
+
+    assert service.wait(timeout=30)
+    assert set(service.health()["timings"]) == {"load", "warmup"}
+    category, probability = service.predict("Cola soda")
+    assert category == "Beverages"
+    assert 0.0 < probability <= 1.0
+
+
+def test_model_service_reports_missing_artifact(tmp_path):
+    """Test that a missing model fails the service instead of the import."""
+    service = ModelService(tmp_path / "missing.bin", tmp_path / "missing.pkl")
+
+    service.start()
+
+    assert not service.wait(timeout=10)
+    assert service.health()["status"] == "failed"
+    assert service.health()["error"]
+
+
+def test_readyz_and_predict_wait_for_the_model(monkeypatch, tmp_path):
+    """Test that readiness and predictions return 503 until the model is ready."""
+    monkeypatch.setattr(
+        pos_api, "model_service", ModelService(tmp_path / "missing.bin")
+    )
+    test_client = TestClient(pos_api.app)
+
+    assert test_client.get("/healthz").status_code == 200
+    assert test_client.get("/readyz").status_code == 503
+    response = test_client.post("/predict", json={"product_description": "Cola"})
+    assert response.status_code == 503
+
+
+def test_predict_after_ready(client):
+    """Test that the API serves predictions once ready."""
+    assert client.get("/readyz").json()["status"] == "ready"
+
+    response = client.post("/predict", json={"product_description": "Milk eggs"})
+
+    assert response.status_code == 200
+    assert response.json()["prediction"] == "Fresh"
+
+
+def test_predict_batch_writes_columnar_output_with_top_k(monkeypatch, tmp_path, client):
+    """Test that batch predictions are written as Parquet row groups with top-k."""
+    monkeypatch.setattr(json_monitor, "MONITORING_PATH", tmp_path / "monitor.json")
+    monkeypatch.setattr(pos_api, "PREDICTION_OUTPUT_FORMAT", "parquet")
+    monkeypatch.setattr(pos_api, "PREDICTION_TOP_K", 2)
+    monkeypatch.setattr(pos_api, "PREDICTION_ROW_GROUP_SIZE", 2)
+    monkeypatch.setattr(pos_api, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(
+        pos_api,
+        "get_prediction_output_path",
+        lambda extension: tmp_path / f"predictions{extension}",
+    )
+    service = pos_api.model_service
+    scored_groups = []
+    predict_top_k = service.predict_top_k
+
+    def count_top_k(descriptions, k):
+        scored_groups.append(len(descriptions))
+        return predict_top_k(descriptions, k)
+
+    monkeypatch.setattr(service, "predict_top_k", count_top_k)
+    monkeypatch.setattr(service, "predict", None)
+    csv = b"product_description\nCola soda\nMilk eggs\nCola\n"
+
+    response = client.post(
+        "/predict_batch", files={"file": ("batch.csv", io.BytesIO(csv), "text/csv")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["rows_processed"] == 3
+    assert scored_groups == [2, 1]
+    result = read_predictions(response.json()["output_file"])
+    assert result["predicted_category"].tolist()[:2] == ["Beverages", "Fresh"]
+    assert result["top2_category"].tolist()[:2] == ["Fresh", "Beverages"]
+
+
+def test_predict_batch_removes_partial_output_on_error(monkeypatch, tmp_path, client):
+    """Test that a failing batch leaves no truncated output file behind."""
+    monkeypatch.setattr(json_monitor, "MONITORING_PATH", tmp_path / "monitor.json")
+    monkeypatch.setattr(pos_api, "PREDICTION_OUTPUT_FORMAT", "parquet")
+    monkeypatch.setattr(pos_api, "PREDICTION_ROW_GROUP_SIZE", 1)
+    monkeypatch.setattr(pos_api, "OUTPUT_DIR", tmp_path)
+    output_path = tmp_path / "predictions.parquet"
+    monkeypatch.setattr(
+        pos_api, "get_prediction_output_path", lambda extension: output_path
+    )
+    service = pos_api.model_service
+    predict_top_k = service.predict_top_k
+
+    def fail_second_group(descriptions, k):
+        if output_path.exists():
+            raise RuntimeError("model crashed")
+        return predict_top_k(descriptions, k)
+
+    monkeypatch.setattr(service, "predict_top_k", fail_second_group)
+    csv = b"product_description\nCola soda\nMilk eggs\n"
+
+    response = client.post(
+        "/predict_batch", files={"file": ("batch.csv", io.BytesIO(csv), "text/csv")}
+    )
+
+    assert response.status_code == 500
+    assert not output_path.exists()
+
+
+def wait_for_sketch(n_predictions: int, timeout: float = 5.0) -> dict:
+    """Wait until the API metrics store holds the sketch of n predictions."""
+    deadline = time.monotonic() + timeout
+    while True:
+        sketch = merge_sketches(
+            row[1:] for row in pos_api.metrics_store.fetch_drift_sketches()
+        )
+        if sum(sketch["category"].values()) >= n_predictions:
+            return sketch
+        assert time.monotonic() < deadline, sketch
+        time.sleep(0.01)
+
+
+def test_predict_drift_sketch_is_flushed_without_more_traffic(client):
+    """Test that the sketch of a single prediction is written while traffic is idle."""
+    response = client.post("/predict", json={"product_description": "Cola soda"})
+
+    assert response.status_code == 200
+    sketch = wait_for_sketch(1)
+    assert sketch["category"] == {"Beverages": 1}
+    assert sketch["length"] == {"0": 1}
+
+
+def test_predict_batch_records_drift_sketch_once_per_batch(
+    monkeypatch, tmp_path, client
+):
+    """Test that a batch updates the monitoring counters and drift sketch at once."""
+    monkeypatch.setattr(json_monitor, "MONITORING_PATH", tmp_path / "monitor.json")
+    monkeypatch.setattr(pos_api, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(
+        pos_api,
+        "get_prediction_output_path",
+        lambda extension: tmp_path / f"predictions{extension}",
+    )
+    csv = (
+        b"product_description,HUMAN_VERIFIED_Category\n"
+        b"Cola soda,Beverages\nMilk eggs,Beverages\nCola,\n"
+    )
+
+    response = client.post(
+        "/predict_batch", files={"file": ("batch.csv", io.BytesIO(csv), "text/csv")}
+    )
+
+    assert response.status_code == 200
+    monitor = json.loads((tmp_path / "monitor.json").read_text())
+    assert monitor["Beverages"] == 2
+    assert monitor["Fresh"] == 1
+    assert monitor["total_predictions"] == 2
+    assert monitor["correct_predictions"] == 1
+    assert monitor["total_requests"] == 3
+    sketch = wait_for_sketch(3)
+    assert sketch["category"] == {"Beverages": 2, "Fresh": 1}
+    assert sum(sketch["confidence"].values()) == 3
+    assert sketch["length"] == {"0": 3}
+
+
+def test_predict_batch_sketches_blank_descriptions_like_the_reference(
+    monkeypatch, tmp_path, client
+):
+    """Test that a batch sketches the same description lengths as the reference."""
+    monkeypatch.setattr(json_monitor, "MONITORING_PATH", tmp_path / "monitor.json")
+    monkeypatch.setattr(pos_api, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(
+        pos_api,
+        "get_prediction_output_path",
+        lambda extension: tmp_path / f"predictions{extension}",
+    )
+    path = tmp_path / "batch.csv"
+    path.write_text("product_description,store\n,A\nSparkling mineral water bottle,B\n")
+
+    response = client.post(
+        "/predict_batch",
+        files={"file": ("batch.csv", io.BytesIO(path.read_bytes()), "text/csv")},
+    )
+
+    assert response.status_code == 200
+    reference = sketch_batch(["Fresh"] * 2, [1.0] * 2, sample_descriptions(path, 2))
+    assert wait_for_sketch(2)["length"] == reference["length"] == {"0": 1, "3": 1}
+
+
+def test_admin_profiling_toggle(monkeypatch, tmp_path):
+    """Test that the profiling toggle is unavailable until profiling is installed."""
+    test_client = TestClient(pos_api.app)
+    monkeypatch.setattr(pos_api, "request_profiler", None)
+    assert test_client.get("/admin/profiling").status_code == 404
+
+    profiler = RequestProfiler(ProfileStore(tmp_path))
+    monkeypatch.setattr(pos_api, "request_profiler", profiler)
+    response = test_client.put(
+        "/admin/profiling", json={"enabled": False, "sample_rate": 0.05}
+    )
+
+    assert response.json() == {"enabled": False, "sample_rate": 0.05, "profiles": []}
+    assert (
+        test_client.put("/admin/profiling", json={"sample_rate": 2}).status_code == 422
+    )
+
+
+def test_shadow_scorer_records_candidate_comparisons(
+    monkeypatch, tmp_path, model_files, client
+):
+    """Test that sampled traffic is scored by the candidate off the response path."""
+    store = MetricsStore(tmp_path / "shadow.db", flush_interval=0.05).start()
+    candidate = ModelService(*model_files, warmup_samples=0)
+    scorer = ShadowScorer(candidate, store, sample_rate=1.0)
+    scorer.start()
+    assert candidate.wait(timeout=30)
+    monkeypatch.setattr(pos_api, "shadow_scorer", scorer)
+
+    for text in ["Cola soda", "Milk eggs", "Cola"]:
+        response = client.post("/predict", json={"product_description": text})
+        assert response.status_code == 200
+    assert client.get("/healthz").json()["candidate"]["submitted"] == 3
+
+    # Comparisons reach the store by the periodic flush, without more traffic.
+    deadline = time.monotonic() + 5
+    while sum(r[2] for r in store.fetch_shadow_rollups()) < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    rollups = store.fetch_shadow_rollups()
+    assert sum(rollup[3] for rollup in rollups) == 3
+    scorer.close()
+    store.close()
+
+
+def test_shadow_scorer_drops_samples_when_queue_is_full(tmp_path, model_files):
+    """Test that samples are dropped instead of queued beyond max_pending."""
+    candidate = ModelService(*model_files, warmup_samples=0)
+    candidate.start()
+    assert candidate.wait(timeout=30)
+    scorer = ShadowScorer(
+        candidate, MetricsStore(tmp_path / "m.db"), sample_rate=1.0, max_pending=0
+    )
+
+    assert not scorer.submit(["Cola"], ["Beverages"], [0.001])
+    assert scorer.health()["dropped"] == 1
+    scorer.close()
+
+
+def test_similar_returns_nearest_training_products(monkeypatch, tmp_path, model_files):
+    """Test that /similar answers from the index built on the training file."""
+    model = FastTextModelWrapper({"model_location": str(model_files[0])})
+    model.load_model()
+    texts, labels = read_fasttext_training_lines(tmp_path / "train.txt")
+    build_similarity_index(
+        model, texts, labels, ["Beverages", "Fresh"], tmp_path / "index"
+    )
+    service = ModelService(
+        *model_files, warmup_samples=0, similarity_index_dir=tmp_path / "index"
+    )
+    monkeypatch.setattr(pos_api, "model_service", service)
+
+    with TestClient(pos_api.app) as test_client:
+        assert service.wait(timeout=30)
+        response = test_client.post(
+            "/similar", json={"product_description": "Cola!", "k": 2}
+        )
+
+    assert response.status_code == 200
+    neighbours = response.json()["neighbours"]
+    assert [n["product_description"] for n in neighbours] == ["cola soda", "milk eggs"]
+    assert neighbours[0]["category"] == "Beverages"
+    assert neighbours[0]["similarity"] > neighbours[1]["similarity"]
+
+
+def test_similar_without_index_returns_404(client):
+    """Test that /similar reports a missing index instead of failing."""
+    response = client.post("/similar", json={"product_description": "Cola"})
+
+    assert response.status_code == 404
@@ -5,10 +5,28 @@ This file provides tests for data module in pos classifier package.
 
 import pytest
 import pandas as pd
+import pyarrow.parquet as pq
 
+from sklearn.preprocessing import LabelEncoder
 
-from pos_classifier.data.data_loader import load_data
-from pos_classifier.data.preprocessing import clean_text, split_data
+from pos_classifier.data.data_loader import load_data, load_data_chunks
+from pos_classifier.data.feedback_store import FeedbackStore
+from pos_classifier.data.postprocessing import (
+    decode_fasttext_labels,
+    decode_fasttext_top_k,
+)
+from pos_classifier.data.prediction_writer import PredictionWriter, read_predictions
+from pos_classifier.data.preprocessing import (
+    CorpusCompactor,
+    clean_text,
+    clean_texts_parallel,
+    prepare_data_for_fasttext,
+    preprocess_data,
+    split_data,
+    stream_fasttext_training_file,
+    write_fasttext_chunks,
+    write_kfold_files,
+)
 
 
 @pytest.fixture
@@ -23,6 +41,23 @@ def sample_csv(tmp_path):
     return str(file_path)
 
 
+@pytest.fixture
+def training_csv(tmp_path):
+    """Fixture that creates a temporary training CSV file with an unlabeled row."""
+    content = (
+        "Product Description,Category\n"
+        "Apple JUICE!!,Beverages\n"
+        "Toothpaste...,Household & Personal Care\n"
+        "Mystery item,\n"
+        "Fresh Salmon,Fresh & Perishable Items\n"
+        "Orange juice,Beverages\n"
+        "Basmati rice,Dry Goods & Pantry Staples\n"
+    )
+    file_path = tmp_path / "training.csv"
+    file_path.write_text(content)
+    return str(file_path)
+
+
 @pytest.fixture
 def sample_dataframe():
     """Fixture returning a sample dataframe for testing."""
@@ -56,6 +91,13 @@ def test_load_data(sample_csv):
     assert len(df) == 2
 
 
+def test_load_data_chunks(training_csv):
+    """Test that load_data_chunks yields renamed chunks of the requested columns."""
+    chunks = list(load_data_chunks(training_csv, chunksize=2, columns=["category"]))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+    assert list(chunks[0].columns) == ["category"]
+
+
 @pytest.mark.parametrize(
     "text,expected",
     [
@@ -74,3 +116,214 @@ def test_split_data(sample_dataframe):
     train_df, test_df = split_data(sample_dataframe, test_size=0.4)
     assert len(train_df) == 3
     assert len(test_df) == 2
+
+
+def test_decode_fasttext_labels():
+    """Test that decode_fasttext_labels maps top labels back to categories."""
+    label_encoder = LabelEncoder().fit(["Beverages", "Household & Personal Care"])
+    decoded = decode_fasttext_labels(
+        [["__label__1", "__label__0"], ["__label__0"]], label_encoder
+    )
+    assert decoded.tolist() == ["Household & Personal Care", "Beverages"]
+
+
+def test_stream_fasttext_training_file_matches_in_memory_path(training_csv, tmp_path):
+    """Test that the streaming pipeline writes the same file as the in-memory one."""
+    in_memory_file = tmp_path / "in_memory.txt"
+    df = load_data(training_csv).dropna(subset=["category"])
+    prepare_data_for_fasttext(
+        preprocess_data(df, tmp_path / "in_memory.pkl"), in_memory_file
+    )
+
+    streamed_file = tmp_path / "streamed.txt"
+    written = stream_fasttext_training_file(
+        training_csv, streamed_file, chunksize=2, label_encoder_path=tmp_path / "s.pkl"
+    )
+
+    assert written == 5
+    assert streamed_file.read_text() == in_memory_file.read_text()
+    assert streamed_file.read_text().splitlines()[0] == "__label__0 apple juice"
+
+
+def test_clean_texts_parallel_preserves_order(sample_dataframe):
+    """Test that sharded cleaning returns the same series as serial cleaning."""
+    texts = pd.concat([sample_dataframe["product_description"]] * 3)
+    result = clean_texts_parallel(texts, n_workers=2, shards_per_worker=2)
+    pd.testing.assert_series_equal(result, texts.apply(clean_text))
+
+
+def test_stream_fasttext_training_file_parallel(training_csv, tmp_path):
+    """Test that parallel streaming writes the same file as serial streaming."""
+    serial_file, parallel_file = tmp_path / "serial.txt", tmp_path / "parallel.txt"
+    stream_fasttext_training_file(
+        training_csv, serial_file, chunksize=1, label_encoder_path=tmp_path / "s.pkl"
+    )
+    written = stream_fasttext_training_file(
+        training_csv,
+        parallel_file,
+        chunksize=1,
+        label_encoder_path=tmp_path / "p.pkl",
+        n_workers=2,
+    )
+
+    assert written == 5
+    assert parallel_file.read_text() == serial_file.read_text()
+
+
+def test_write_kfold_files(tmp_path):
+    """Test that every row is held out exactly once across the fold test files."""
+    df = pd.DataFrame(
+        {
+            "product_description": [f"product {i}" for i in range(9)],
+            "category": ["Beverages", "Household & Personal Care", "Fresh"] * 3,
+            "label": [0, 1, 2] * 3,
+        }
+    )
+
+    paths = write_kfold_files(df, tmp_path / "folds", n_splits=3)
+
+    assert len(paths) == 3
+    held_out = [
+        line for _, test_path in paths for line in open(test_path).read().splitlines()
+    ]
+    assert sorted(held_out) == sorted(f"__label__{i % 3} product {i}" for i in range(9))
+    for train_path, _ in paths:
+        assert len(open(train_path).read().splitlines()) == 6
+
+
+def test_feedback_store_deduplicates_and_tracks_watermark(tmp_path):
+    """Test that verified labels are appended, deduplicated and watermarked."""
+    store = FeedbackStore(tmp_path / "feedback.db")
+
+    added = store.add(
+        ["Cola", "Milk", None, "Cola"],
+        ["Beverages", "Beverages", "Beverages", float("nan")],
+    )
+    store.add(["Milk"], ["Fresh & Perishable Items"])
+
+    assert added == 2
+    assert store.count_new() == 3
+    feedback = store.fetch()
+    assert feedback["product_description"].tolist() == ["Cola", "Milk"]
+    assert feedback["category"].tolist() == ["Beverages", "Fresh & Perishable Items"]
+
+    store.mark_retrained(int(feedback["id"].max()))
+    store.add(["Eggs"], ["Fresh & Perishable Items"])
+    assert store.count_new() == 1
+
+
+def test_corpus_compactor_caps_duplicates_across_chunks(tmp_path):
+    """Test that identical lines are capped per label across chunks, in order."""
+    first = pd.DataFrame(
+        {
+            "product_description": ["milk", "milk", "soap", "milk"],
+            "category": ["Fresh", "Fresh", "Household", "Household"],
+            "label": [0, 0, 1, 1],
+        }
+    )
+    second = first.copy()
+    output_path = tmp_path / "compacted.txt"
+    compactor = CorpusCompactor(max_replicas=2)
+
+    written = write_fasttext_chunks([first, second], output_path, compactor)
+
+    assert output_path.read_text().splitlines() == [
+        "__label__0 milk",
+        "__label__0 milk",
+        "__label__1 soap",
+        "__label__1 milk",
+        "__label__1 soap",
+        "__label__1 milk",
+    ]
+    assert written == 6
+    report = compactor.report()
+    assert report["compaction_lines_in"] == 8
+    assert report["compaction_distinct_lines"] == 3
+    assert report["compaction_ratio"] == pytest.approx(8 / 6)
+
+
+def test_streaming_compaction_matches_in_memory(training_csv, tmp_path):
+    """Test that streaming and in-memory compaction write the same file."""
+    df = preprocess_data(load_data(training_csv), tmp_path / "encoder.pkl")
+    in_memory_path = tmp_path / "in_memory.txt"
+    in_memory_written = prepare_data_for_fasttext(
+        df, in_memory_path, CorpusCompactor(1)
+    )
+
+    streamed_path = tmp_path / "streamed.txt"
+    streamed_written = stream_fasttext_training_file(
+        training_csv,
+        streamed_path,
+        chunksize=2,
+        label_encoder_path=tmp_path / "streamed_encoder.pkl",
+        compactor=CorpusCompactor(1),
+    )
+
+    assert streamed_path.read_text() == in_memory_path.read_text()
+    assert in_memory_written == streamed_written
+    assert in_memory_written == len(in_memory_path.read_text().splitlines())
+
+
+def test_decode_fasttext_top_k_leaves_missing_ranks_empty():
+    """Test that top-k decoding keeps ranks in order and pads short predictions."""
+    label_encoder = LabelEncoder().fit(["Beverages", "Fresh", "Household"])
+    labels = [("__label__1", "__label__0"), ("__label__2",)]
+    probabilities = [[0.7, 0.2], [0.9]]
+
+    result = decode_fasttext_top_k(labels, probabilities, label_encoder, 2)
+
+    assert result["predicted_category"].tolist() == ["Fresh", "Household"]
+    assert result["top2_category"].tolist() == ["Beverages", None]
+    assert result["probability"].tolist() == pytest.approx([0.7, 0.9])
+    assert result["top2_probability"].isna().tolist() == [False, True]
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet", "arrow"])
+def test_prediction_writer_round_trips_in_row_groups(tmp_path, output_format):
+    """Test that predictions written in row groups read back unchanged."""
+    df = pd.DataFrame(
+        {
+            "product_description": ["Cola", "Milk", "Soap", "Tea", "Eggs"],
+            "predicted_category": [
+                "Beverages",
+                "Fresh",
+                "Household",
+                "Beverages",
+                "Fresh",
+            ],
+            "probability": [0.5, 0.25, 0.75, 0.125, 1.0],
+            "top2_category": ["Fresh", "Beverages", None, "Fresh", "Household"],
+            "top2_probability": [0.25, 0.125, None, 0.0625, 0.0],
+        }
+    )
+    path = tmp_path / f"predictions.{output_format}"
+
+    with PredictionWriter(
+        path,
+        ["Beverages", "Fresh", "Household"],
+        output_format,
+        top_k=2,
+        row_group_size=2,
+    ) as writer:
+        writer.write(df.iloc[:3])
+        writer.write(df.iloc[3:])
+
+    assert writer.rows_written == 5
+    result = read_predictions(path)
+    assert result["predicted_category"].astype(object).tolist() == (
+        df["predicted_category"].tolist()
+    )
+    assert result["top2_category"].astype(object).fillna("").tolist() == (
+        df["top2_category"].fillna("").tolist()
+    )
+    assert result["probability"].tolist() == pytest.approx(df["probability"].tolist())
+    if output_format == "parquet":
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.num_row_groups == 3
+        assert str(pq.read_schema(path).field("probability").type) == "float"
+
+
+def test_prediction_writer_rejects_unknown_format(tmp_path):
+    """Test that an unsupported output format raises a ValueError."""
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        PredictionWriter(tmp_path / "predictions.json", ["Fresh"], "json")
@@ -0,0 +1,115 @@
+"""Test experiments file.
+
+This file provides tests for the experiment and cross-validation scripts.
+"""
+
+import os
+import sys
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "experiments"))
+
+import run_experiment  # noqa: E402
+from cross_validation import (  # noqa: E402
+    plan_concurrency,
+    summarize_folds,
+    train_and_evaluate_fold,
+)
+from pos_classifier.data.preprocessing import (  # noqa: E402
+    read_fasttext_file,
+    write_kfold_files,
+)
+
+
+@pytest.mark.parametrize(
+    "n_jobs, thread_budget, expected",
+    [
+        (12, 4, (4, 1)),
+        (12, 6, (6, 1)),
+        (3, 8, (3, 2)),
+        (2, 7, (2, 3)),
+        (12, 1, (1, 1)),
+        (1, 1, (1, 1)),
+        (5, 0, (1, 1)),
+    ],
+)
+def test_plan_concurrency(n_jobs, thread_budget, expected):
+    """Test that jobs and threads per job are split from the thread budget."""
+    assert plan_concurrency(n_jobs, thread_budget) == expected
+
+
+def test_plan_concurrency_never_oversubscribes():
+    """Test that concurrent jobs times threads per job stays within the budget."""
+    for n_jobs in range(1, 30):
+        for thread_budget in range(1, 30):
+            concurrent, threads = plan_concurrency(n_jobs, thread_budget)
+            assert 1 <= concurrent <= n_jobs
+            assert concurrent * threads <= thread_budget
+
+
+def test_summarize_folds():
+    """Test that fold metrics are reduced to their mean and standard deviation."""
+    summary = summarize_folds(
+        [{"f1": 0.5, "train_time": 1.0}, {"f1": 0.7, "train_time": 3.0}]
+    )
+
+    assert summary == {
+        "cv_mean_f1": pytest.approx(0.6),
+        "cv_std_f1": pytest.approx(0.1),
+        "cv_mean_train_time": 2.0,
+        "cv_std_train_time": 1.0,
+    }
+
+
+def test_train_and_evaluate_fold_reports_per_class_metrics(tmp_path):
+    """Test that a fold is evaluated in memory with per-class metrics."""
+    df = pd.DataFrame(
+        {
+            "product_description": ["apple juice", "orange juice", "toothpaste"] * 50,
+            "category": ["Beverages", "Beverages", "Household"] * 50,
+            "label": [0, 0, 1] * 50,
+        }
+    )
+    train_path, test_path = write_kfold_files(df, tmp_path / "folds", n_splits=3)[0]
+    model_location = str(tmp_path / "fold.bin")
+
+    metrics = train_and_evaluate_fold(
+        {
+            "input": train_path,
+            "test_input": test_path,
+            "model_location": model_location,
+            "minCount": 1,
+            "thread": 1,
+            "verbose": 0,
+        },
+        ["Beverages", "Household"],
+    )
+
+    assert metrics["num_test"] == len(read_fasttext_file(test_path)) == 50
+    assert {"accuracy", "f1", "f1_beverages", "recall_household"} <= set(metrics)
+    assert metrics["train_time"] > 0
+    assert not os.path.exists(model_location)
+
+
+def test_run_experiments_rejects_unknown_selection_metric(monkeypatch):
+    """Test that a mistyped selection metric fails before any trial is trained."""
+    monkeypatch.setattr(
+        run_experiment,
+        "load_label_encoder",
+        lambda: LabelEncoder().fit(["Beverages", "Dry Goods"]),
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("No trial should start.")
+
+    monkeypatch.setattr(run_experiment.mlflow, "start_run", fail)
+    monkeypatch.setattr(run_experiment, "FastTextModelWrapper", fail)
+
+    with pytest.raises(ValueError, match="f1_dry_goods"):
+        run_experiment.run_experiments(pd.DataFrame(), selection_metric="f1_dry_good")
@@ -3,10 +3,36 @@
 This file provides tests for FastTextModelWrapper class in pos classifier package.
 """
 
+import json
+
+import numpy as np
+import pandas as pd
 import pytest
 from unittest.mock import MagicMock, patch
+from sklearn.preprocessing import LabelEncoder
 
-from pos_classifier.model.fasttext_wrapper import FastTextModelWrapper
+from pos_classifier.model.evaluation import (
+    confusion_matrix,
+    evaluate_predictions,
+    flatten_metrics,
+    threshold_sweep,
+)
+from pos_classifier.model.prediction_cache import PredictionCache, hash_descriptions
+from pos_classifier.model.similarity_index import (
+    SimilarityIndex,
+    build_similarity_index,
+    read_fasttext_training_lines,
+)
+from pos_classifier.monitoring.telemetry import RunTelemetry
+from pos_classifier.predict import predict_incremental, predict_top_k
+import pos_classifier.retrain as retrain
+from pos_classifier.data.feedback_store import FeedbackStore
+from pos_classifier.retrain import retrain_model, sample_lines
+from pos_classifier.train import load_params, load_params_section
+from pos_classifier.model.fasttext_wrapper import (
+    FastTextModelWrapper,
+    FastTextPyfuncModel,
+)
 
 
 @pytest.fixture
@@ -91,6 +117,53 @@ def test_predict_returns_predictions(mock_clean, default_params):
     assert probs == [0.95]
 
 
+def test_predict_batch_cleans_and_predicts_in_one_call(default_params):
+    """Test that predict_batch cleans every text and calls FastText once."""
+    model = FastTextModelWrapper(default_params)
+    mock_model = MagicMock()
+    mock_model.predict.return_value = ([["__label__0"], ["__label__1"]], [[0.9], [0.8]])
+    model.model = mock_model
+
+    labels, probs = model.predict_batch(["Apple JUICE!!", "Toothpaste..."])
+
+    mock_model.predict.assert_called_once_with(
+        ["apple juice", "toothpaste"], k=1, threshold=0.0
+    )
+    assert labels == [["__label__0"], ["__label__1"]]
+
+
+@patch("pos_classifier.model.fasttext_wrapper.load_label_encoder")
+@patch("fasttext.load_model")
+def test_pyfunc_model_scores_dataframe(mock_load, mock_encoder):
+    """Test that the pyfunc model loads artifacts once and scores a DataFrame."""
+    mock_load.return_value.predict.return_value = (
+        [["__label__1"], ["__label__0"]],
+        [np.array([0.9]), np.array([0.7])],
+    )
+    mock_encoder.return_value = LabelEncoder().fit(
+        ["Beverages", "Household & Personal Care"]
+    )
+    context = MagicMock()
+    context.artifacts = {
+        "fasttext_model_path": "model.bin",
+        "label_encoder_path": "label_encoder.pkl",
+    }
+
+    pyfunc_model = FastTextPyfuncModel()
+    pyfunc_model.load_context(context)
+    result = pyfunc_model.predict(
+        context, pd.DataFrame({"product_description": ["Toothpaste", "Apple juice"]})
+    )
+
+    mock_load.assert_called_once_with("model.bin")
+    mock_encoder.assert_called_once_with("label_encoder.pkl")
+    assert result["predicted_label"].tolist() == [
+        "Household & Personal Care",
+        "Beverages",
+    ]
+    assert result["probability"].dtype == np.float32
+
+
 def test_evaluate_raises_if_model_not_loaded(default_params):
     """Test that error is raised when evaluating without a loaded model."""
     model = FastTextModelWrapper(default_params)
@@ -114,3 +187,304 @@ def test_evaluate_returns_metrics(default_params):
         "recall": 0.5,
         "f1": 0.5,
     }
+
+
+def test_confusion_matrix_counts_label_pairs():
+    """Test that confusion_matrix counts (true, predicted) pairs."""
+    matrix = confusion_matrix(np.array([0, 0, 1, 2]), np.array([0, 1, 1, 0]), 3)
+    assert matrix.tolist() == [[1, 1, 0], [0, 1, 0], [1, 0, 0]]
+
+
+def test_threshold_sweep_keeps_predictions_at_or_above_threshold():
+    """Test coverage, precision and recall of the threshold sweep."""
+    curve = threshold_sweep(
+        np.array([True, False, True, True]),
+        np.array([0.9, 0.8, 0.6, 0.3]),
+        np.array([0.0, 0.6, 0.85, 0.95]),
+    )
+    assert curve["coverage"].tolist() == [1.0, 0.75, 0.25, 0.0]
+    assert curve["precision"].tolist() == pytest.approx([0.75, 2 / 3, 1.0, 0.0])
+    assert curve["recall"].tolist() == [0.75, 0.5, 0.25, 0.0]
+
+
+def test_evaluate_predictions_report():
+    """Test headline, per-class and flattened metrics of an evaluation report."""
+    report = evaluate_predictions(
+        y_true=np.array([0, 0, 1, 1]),
+        y_pred=np.array([0, 1, 1, 1]),
+        probabilities=np.array([0.9, 0.7, 0.5, 0.95]),
+        class_names=["Beverages", "Dry Goods & Pantry Staples"],
+    )
+
+    assert report["num_test"] == 4
+    assert report["accuracy"] == 0.75
+    assert report["precision"] == pytest.approx(2 / 3)
+    assert report["recall"] == 0.5
+    assert report["per_class"]["Beverages"]["recall"] == 0.5
+    assert report["per_class"]["Dry Goods & Pantry Staples"]["precision"] == (
+        pytest.approx(2 / 3)
+    )
+    metrics = flatten_metrics(report)
+    assert metrics["f1_dry_goods_pantry_staples"] == pytest.approx(0.8)
+    assert "per_class" not in metrics
+
+
+def test_evaluate_dataframe_uses_one_batched_prediction(default_params):
+    """Test that evaluate_dataframe predicts all rows at once without cleaning."""
+    model = FastTextModelWrapper(default_params)
+    mock_model = MagicMock()
+    mock_model.predict.return_value = (
+        [["__label__0"], ["__label__0"]],
+        [np.array([0.9]), np.array([0.8])],
+    )
+    model.model = mock_model
+    df = pd.DataFrame({"product_description": ["apple juice", "toothpaste"]})
+    df["label"] = [0, 1]
+
+    report = model.evaluate_dataframe(df, ["Beverages", "Household & Personal Care"])
+
+    mock_model.predict.assert_called_once_with(
+        ["apple juice", "toothpaste"], k=1, threshold=0.0
+    )
+    assert report["confusion_matrix"] == [[1, 0], [1, 0]]
+    assert report["precision"] == 0.5
+
+
+def test_train_records_telemetry(tmp_path):
+    """Test that training with telemetry records stage timings and throughput."""
+    train_file = tmp_path / "train.txt"
+    train_file.write_text(
+        "__label__0 fresh milk eggs\n__label__1 mint toothpaste soap\n" * 50
+    )
+    params = {
+        "input": str(train_file),
+        "model_location": str(tmp_path / "model.bin"),
+        "epoch": 2,
+        "minCount": 1,
+        "thread": 1,
+        "verbose": 0,
+    }
+    telemetry = RunTelemetry("test")
+
+    FastTextModelWrapper(params).train(telemetry)
+    report = telemetry.report()
+
+    assert set(report["stages"]) == {"train", "save"}
+    assert report["metrics"]["thread"] == 1
+    assert report["metrics"]["tokens_per_epoch"] > 0
+    assert report["metrics"]["words_per_sec_per_thread"] > 0
+    assert report["metrics"]["model_size_mb"] > 0
+    assert report["metrics"]["peak_rss_mb"] > 0
+    assert telemetry.flat_metrics()["time_total"] == pytest.approx(report["total_time"])
+
+    path = telemetry.write_report(tmp_path / "telemetry")
+    assert json.loads(path.read_text())["stages"] == report["stages"]
+
+
+def test_prediction_cache_is_invalidated_by_model_version(tmp_path):
+    """Test that binding the cache to a new model version drops its predictions."""
+    cache = PredictionCache(tmp_path / "cache.db")
+    hashes = hash_descriptions(pd.Series(["milk", "soap"]))
+
+    assert not cache.set_model_version("v1")
+    cache.store(hashes, ["Fresh", "Household"], [0.9, 0.8])
+    assert not cache.set_model_version("v1")
+    assert len(cache.lookup(hashes)) == 2
+
+    assert cache.set_model_version("v2")
+    assert cache.lookup(hashes).empty
+
+
+def test_predict_incremental_scores_only_new_descriptions(tmp_path):
+    """Test that cached descriptions are reused and new ones scored once."""
+    label_encoder = LabelEncoder().fit(["Beverages", "Fresh"])
+    cache = PredictionCache(tmp_path / "cache.db")
+    cache.set_model_version("v1")
+    scores = {"Cola": ("__label__0", 0.9), "Milk": ("__label__1", 0.8)}
+    scores["Eggs"] = ("__label__1", 0.7)
+    model = MagicMock()
+    model.predict_batch.side_effect = lambda texts: (
+        [[scores[text][0]] for text in texts],
+        [[scores[text][1]] for text in texts],
+    )
+    first = pd.DataFrame({"product_description": ["Cola", "Milk", "Cola"]})
+
+    result, n_scored = predict_incremental(first, model, label_encoder, cache)
+
+    assert n_scored == 2
+    assert sorted(model.predict_batch.call_args.args[0]) == ["Cola", "Milk"]
+    assert result["predicted_category"].tolist() == ["Beverages", "Fresh", "Beverages"]
+
+    second = pd.DataFrame({"product_description": ["Milk", "Eggs", "Cola"]})
+
+    result, n_scored = predict_incremental(second, model, label_encoder, cache)
+
+    assert n_scored == 1
+    assert model.predict_batch.call_args.args[0] == ["Eggs"]
+    assert result["predicted_category"].tolist() == ["Fresh", "Fresh", "Beverages"]
+    assert result["probability"].tolist() == pytest.approx([0.8, 0.7, 0.9])
+
+
+def test_predict_top_k_scores_each_description_once():
+    """Test that duplicate descriptions are scored once and keep every rank."""
+    label_encoder = LabelEncoder().fit(["Beverages", "Fresh"])
+    model = MagicMock()
+    model.predict_batch.return_value = (
+        [("__label__0", "__label__1"), ("__label__1", "__label__0")],
+        [np.array([0.8, 0.2]), np.array([0.6, 0.4])],
+    )
+    df = pd.DataFrame({"product_description": ["Cola", "Milk", "Cola"]})
+
+    result = predict_top_k(df, model, label_encoder, 2)
+
+    assert model.predict_batch.call_args.args[0] == ["Cola", "Milk"]
+    assert model.predict_batch.call_args.kwargs == {"k": 2}
+    assert result["predicted_category"].tolist() == ["Beverages", "Fresh", "Beverages"]
+    assert result["top2_category"].tolist() == ["Fresh", "Beverages", "Fresh"]
+    assert result["top2_probability"].tolist() == pytest.approx([0.2, 0.4, 0.2])
+
+
+@pytest.mark.parametrize("strategy", ["warm_start", "delta_replay"])
+def test_retrain_model_learns_feedback_from_current_vectors(tmp_path, strategy):
+    """Test that a retrain keeps the label encoding and learns verified labels."""
+    train_file = tmp_path / "train.txt"
+    train_file.write_text("__label__0 cola soda\n__label__1 milk eggs\n" * 100)
+    params = {"epoch": 5, "minCount": 1, "thread": 1, "verbose": 0}
+    model_path = tmp_path / "model.bin"
+    FastTextModelWrapper(
+        {**params, "input": str(train_file), "model_location": str(model_path)}
+    ).train()
+    label_encoder = LabelEncoder().fit(["Beverages", "Fresh"])
+    feedback = pd.DataFrame(
+        {
+            "product_description": ["Kombucha tea", "Kefir yogurt", "Gift card"],
+            "category": ["Beverages", "Fresh", "Specialty"],
+        }
+    )
+    feedback = pd.concat([feedback] * 20, ignore_index=True)
+
+    report = retrain_model(
+        feedback,
+        model_path,
+        train_file,
+        model_path,
+        label_encoder,
+        params,
+        strategy=strategy,
+        replay_size=50,
+        report_dir=tmp_path / "telemetry",
+    )
+
+    assert report["metrics"]["feedback_lines"] == 40
+    assert report["metrics"]["replay_lines"] == (
+        50 if strategy == "delta_replay" else 0
+    )
+    model = FastTextModelWrapper({"model_location": str(model_path)})
+    model.load_model()
+    labels, _ = model.predict_batch(["Kombucha tea", "Kefir yogurt"])
+    assert [label[0] for label in labels] == ["__label__0", "__label__1"]
+    assert not list(tmp_path.glob("tmp*"))
+
+
+def test_sample_lines_is_seeded_and_keeps_file_order(tmp_path):
+    """Test that replay samples are reproducible and bounded."""
+    path = tmp_path / "lines.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1000)))
+
+    sample = sample_lines(path, 10, seed=1)
+
+    assert len(sample) == 10
+    assert sample == sample_lines(path, 10, seed=1)
+    assert sample == sorted(sample, key=lambda line: int(line.split()[1]))
+    assert len(sample_lines(path, 5000)) == 1000
+
+
+def test_read_fasttext_training_lines_skips_duplicates(tmp_path):
+    """Test that repeated training lines are indexed once."""
+    train_file = tmp_path / "train.txt"
+    train_file.write_text("__label__0 cola\n__label__1 milk\n__label__0 cola\n")
+
+    texts, labels = read_fasttext_training_lines(train_file)
+
+    assert texts == ["cola", "milk"]
+    assert labels.tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("n_partitions", [0, 4])
+def test_similarity_index_finds_nearest_products(tmp_path, n_partitions):
+    """Test that index search matches brute force cosine similarity."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    model = MagicMock()
+    model.model.get_dimension.return_value = 8
+    model.sentence_vectors.side_effect = lambda texts, clean: vectors[
+        [int(text.split()[1]) for text in texts]
+    ]
+    texts = [f"item {row}" for row in range(200)]
+    labels = np.arange(200) % 2
+
+    build_similarity_index(
+        model,
+        texts,
+        labels,
+        ["Beverages", "Fresh"],
+        tmp_path,
+        n_partitions=n_partitions,
+        chunk_size=64,
+    )
+    index = SimilarityIndex(tmp_path, block_size=50)
+    neighbours = index.neighbours(vectors[:3], k=5)
+
+    for query, result in enumerate(neighbours):
+        expected = np.argsort(-(vectors @ vectors[query]), kind="stable")[:5]
+        assert result["product_description"].tolist() == [texts[r] for r in expected]
+        assert result["category"].tolist() == [
+            ["Beverages", "Fresh"][r % 2] for r in expected
+        ]
+        assert result["similarity"].iloc[0] == pytest.approx(1.0)
+    if n_partitions:
+        scores, rows = index.search(vectors[:3], k=5, n_probe=2)
+        probes = np.argsort(-(vectors[:3] @ index.centroids.T), axis=1)[:, :2]
+        partitions = np.searchsorted(index.offsets, rows, side="right") - 1
+        assert scores[:, 0] == pytest.approx(1.0)
+        assert all(len(set(query_rows)) == 5 for query_rows in rows)
+        assert all(np.isin(p, probe).all() for p, probe in zip(partitions, probes))
+
+
+def test_load_params_section_defaults_to_empty(tmp_path):
+    """Test that a missing or empty params section loads as an empty dict."""
+    params_path = tmp_path / "params.yaml"
+    params_path.write_text(
+        "parameters:\n  epoch: 5\nretraining:\n  min_new_labels: 10\ndrift:\n"
+    )
+
+    assert load_params(params_path) == {"epoch": 5}
+    assert load_params_section("retraining", params_path) == {"min_new_labels": 10}
+    assert load_params_section("drift", params_path) == {}
+    assert load_params_section("similarity", params_path) == {}
+
+
+def test_retrain_main_trains_only_on_labels_after_watermark(monkeypatch, tmp_path):
+    """Test that a retrain uses the new labels only and moves the watermark."""
+    store = FeedbackStore(tmp_path / "feedback.db")
+    store.add(["Cola", "Milk"], ["Beverages", "Fresh"])
+    store.mark_retrained(2)
+    store.add(["Tea", "Milk"], ["Beverages", "Beverages"])
+    trained = []
+    monkeypatch.setattr(retrain, "FeedbackStore", lambda: store)
+    monkeypatch.setattr(
+        retrain,
+        "read_params_file",
+        lambda: {"parameters": {}, "retraining": {"min_new_labels": 2}},
+    )
+    monkeypatch.setattr(retrain, "load_label_encoder", lambda: None)
+    monkeypatch.setattr(
+        retrain,
+        "retrain_model",
+        lambda feedback, *args, **kwargs: trained.append(feedback) or {},
+    )
+
+    assert retrain.main() == {}
+    assert trained[0]["product_description"].tolist() == ["Tea", "Milk"]
+    assert store.count_new() == 0
@@ -0,0 +1,412 @@
+"""Test monitoring file.
+
+This file provides tests for monitoring module in pos classifier package.
+"""
+
+import cProfile
+import pstats
+
+import pytest
+import time
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from pos_classifier.monitoring.drift import (
+    drift_scores,
+    kl_divergence,
+    merge_sketches,
+    psi,
+    sample_descriptions,
+    sketch_batch,
+    sketch_prediction,
+)
+from pos_classifier.monitoring.metrics_store import MetricsStore
+from pos_classifier.monitoring.metrics_stream import (
+    DeltaLog,
+    MetricsAggregator,
+    MetricsBroadcaster,
+    MetricsFeed,
+    latency_percentile,
+)
+from pos_classifier.monitoring.profiling import (
+    ProfileStore,
+    ProfilingMiddleware,
+    RequestProfiler,
+    profile_endpoint,
+)
+from pos_classifier.monitoring.telemetry import RunTelemetry
+
+
+START = 60 * (int(time.time()) // 60)
+MINUTE = START // 60
+
+
+@pytest.fixture
+def metrics_store(tmp_path):
+    """Fixture returning an empty metrics store in a temporary directory."""
+    return MetricsStore(tmp_path / "metrics.db", batch_size=3, flush_interval=3600)
+
+
+def test_record_is_buffered_until_batch_size(metrics_store):
+    """Test that events are only written once the batch size is reached."""
+    metrics_store.record("Beverages", 0.1, ts=START + 120)
+    metrics_store.record("Beverages", 0.2, ts=START + 130)
+    assert metrics_store.fetch_events() == []
+
+    metrics_store.record("Beverages", 0.3, correct=True, ts=START + 190)
+    events = metrics_store.fetch_events()
+    assert [event[2:] for event in events] == [
+        ("Beverages", 0.1, None),
+        ("Beverages", 0.2, None),
+        ("Beverages", 0.3, 1),
+    ]
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Poll a condition until it holds or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_started_store_flushes_idle_buffer(tmp_path):
+    """Test that buffered events are written after flush_interval without traffic."""
+    store = MetricsStore(tmp_path / "metrics.db", batch_size=100, flush_interval=0.05)
+    store.record("Beverages", 0.1)
+    assert store.fetch_events() == []
+
+    store.start()
+    try:
+        assert wait_for(lambda: len(store.fetch_events()) == 1)
+        assert store.fetch_rollups()[0][1:3] == ("Beverages", 1)
+    finally:
+        store.close()
+
+    store.record("Beverages", 0.2)
+    store.close()
+    assert len(store.fetch_events()) == 2
+
+
+def test_flush_writes_per_minute_rollups(metrics_store):
+    """Test that flushed events are aggregated per minute and category."""
+    metrics_store.record("Beverages", 0.1, correct=False, ts=START + 120)
+    metrics_store.record("Beverages", 0.3, correct=True, ts=START + 150)
+    metrics_store.record("Household & Personal Care", 0.2, ts=START + 185)
+    metrics_store.flush()
+
+    assert metrics_store.fetch_rollups() == [
+        (MINUTE + 2, "Beverages", 2, pytest.approx(0.4), 0.3, 2, 1),
+        (MINUTE + 3, "Household & Personal Care", 1, 0.2, 0.2, 0, 0),
+    ]
+    assert metrics_store.fetch_rollups(since_minute=MINUTE + 3)[0][1] == (
+        "Household & Personal Care"
+    )
+
+
+def test_fetch_events_returns_only_new_rows(metrics_store):
+    """Test that fetch_events skips rows the caller has already seen."""
+    for offset in (60, 120, 180):
+        metrics_store.record("Beverages", 0.1, ts=START + offset)
+    last_id = metrics_store.fetch_events()[-1][0]
+
+    metrics_store.record("Beverages", 0.1, ts=START + 240)
+    metrics_store.flush()
+
+    new_events = metrics_store.fetch_events(after_id=last_id)
+    assert [event[1] for event in new_events] == [START + 240]
+
+
+def test_compact_drops_expired_events(tmp_path):
+    """Test that compaction removes raw events and rollups past their retention."""
+    store = MetricsStore(
+        tmp_path / "metrics.db", raw_retention=60, rollup_retention=600
+    )
+    store.record("Beverages", 0.1, ts=START)
+    store.record("Beverages", 0.1, ts=START + 500)
+    store.flush()
+
+    store.compact(now=START + 700)
+
+    assert store.fetch_events() == []
+    assert [rollup[0] for rollup in store.fetch_rollups()] == [MINUTE + 8]
+
+
+def test_flush_writes_shadow_comparison_rollups(metrics_store):
+    """Test that candidate comparisons are aggregated per minute and primary category."""
+    metrics_store.record_shadow("Beverages", "Beverages", 0.1, 0.2, ts=START + 120)
+    metrics_store.record_shadow("Beverages", "Fresh", 0.3, 0.4, ts=START + 150)
+    metrics_store.record_shadow("Fresh", "Fresh", 0.2, 0.1, ts=START + 185)
+    assert metrics_store.fetch_events() == []
+
+    assert metrics_store.fetch_shadow_rollups() == [
+        (MINUTE + 2, "Beverages", 2, 1, pytest.approx(0.4), pytest.approx(0.6), 0.4),
+        (MINUTE + 3, "Fresh", 1, 1, 0.2, 0.1, 0.1),
+    ]
+
+    metrics_store.reset()
+    assert metrics_store.fetch_shadow_rollups() == []
+
+
+def test_flush_merges_drift_sketches_per_minute(metrics_store):
+    """Test that drift sketches are added up per minute, feature and key."""
+    metrics_store.record_sketch({"category": {"Beverages": 2}}, ts=START + 120)
+    metrics_store.record_sketch(
+        {"category": {"Beverages": 1, "Fresh": 1}, "confidence": {"9": 2}},
+        ts=START + 150,
+    )
+    metrics_store.record_sketch({"category": {"Fresh": 4}}, ts=START + 185)
+    metrics_store.flush()
+
+    assert sorted(metrics_store.fetch_drift_sketches()) == [
+        (MINUTE + 2, "category", "Beverages", 3),
+        (MINUTE + 2, "category", "Fresh", 1),
+        (MINUTE + 2, "confidence", "9", 2),
+        (MINUTE + 3, "category", "Fresh", 4),
+    ]
+    assert metrics_store.fetch_drift_sketches(since_minute=MINUTE + 3) == [
+        (MINUTE + 3, "category", "Fresh", 4)
+    ]
+
+    metrics_store.reset()
+    assert metrics_store.fetch_drift_sketches() == []
+
+
+def test_sketch_prediction_matches_sketch_batch():
+    """Test that single and batched sketches bin predictions the same way."""
+    rows = [("Beverages", 0.95, "Cola"), ("Fresh", 0.3, "x" * 45), ("Fresh", 1.0, "")]
+
+    batch = sketch_batch(*zip(*rows))
+    singles = merge_sketches(
+        (feature, key, count)
+        for row in rows
+        for feature, counts in sketch_prediction(*row).items()
+        for key, count in counts.items()
+    )
+
+    assert batch == singles
+    assert batch == {
+        "category": {"Fresh": 2, "Beverages": 1},
+        "confidence": {"2": 1, "9": 2},
+        "length": {"0": 2, "4": 1},
+    }
+
+
+def test_drift_scores_grow_with_distribution_shift():
+    """Test that PSI and KL are zero without shift and grow with it."""
+    reference = {"sketch": {"category": {"Beverages": 50, "Fresh": 50}}}
+
+    assert psi({"a": 1, "b": 1}, {"a": 5, "b": 5}) == pytest.approx(0.0)
+    assert kl_divergence({"a": 1, "b": 1}, {"a": 5, "b": 5}) == pytest.approx(0.0)
+    small = drift_scores(reference, {"category": {"Beverages": 55, "Fresh": 45}})
+    large = drift_scores(reference, {"category": {"Beverages": 90, "Fresh": 10}})
+    new_class = drift_scores(reference, {"category": {"Beverages": 50, "Other": 50}})
+
+    assert 0 < small["category"]["psi"] < 0.1 < 0.25 < large["category"]["psi"]
+    assert small["category"]["kl"] < large["category"]["kl"]
+    assert new_class["category"]["psi"] > large["category"]["psi"]
+    assert small["category"]["count"] == 100
+    assert set(small) == {"category"}
+
+
+def test_sample_descriptions_is_seeded_across_chunks(tmp_path):
+    """Test that the reference sample is drawn from the whole file."""
+    path = tmp_path / "train.csv"
+    path.write_text(
+        "Product Description,Category\n"
+        + "".join(f"item {i},Fresh\n" for i in range(100))
+    )
+
+    sample = sample_descriptions(path, 10, seed=1, chunksize=7)
+
+    assert len(sample) == 10
+    assert sample.tolist() == sample_descriptions(path, 10, seed=1).tolist()
+    assert max(int(text.split()[1]) for text in sample) > 50
+
+
+def test_reset_clears_store(metrics_store):
+    """Test that reset removes buffered and stored events."""
+    metrics_store.record("Beverages", 0.1, ts=START + 60)
+    metrics_store.flush()
+    metrics_store.record("Beverages", 0.1, ts=START + 120)
+
+    metrics_store.reset()
+    metrics_store.flush()
+
+    assert metrics_store.fetch_events() == []
+    assert metrics_store.fetch_rollups() == []
+
+
+def test_aggregator_drain_returns_delta_and_resets():
+    """Test that drain returns metrics since the previous drain only."""
+    aggregator = MetricsAggregator(worker_id="worker")
+    aggregator.record("Beverages", 0.002, correct=True)
+    aggregator.record("Beverages", 0.02)
+
+    delta = aggregator.drain()
+    assert delta["seq"] == 1
+    assert delta["categories"] == {"Beverages": 2}
+    assert delta["requests"] == 2
+    assert delta["max_time"] == 0.02
+    assert (delta["total_predictions"], delta["correct_predictions"]) == (1, 1)
+    assert sum(delta["latency_histogram"]) == 2
+
+    empty = aggregator.drain()
+    assert empty["seq"] == 2
+    assert empty["requests"] == 0
+
+
+def test_latency_percentile_uses_bucket_bounds():
+    """Test that percentiles are estimated from histogram bucket bounds."""
+    aggregator = MetricsAggregator()
+    for latency in (0.0005, 0.0005, 0.0005, 0.2):
+        aggregator.record("Beverages", latency)
+    histogram = aggregator.drain()["latency_histogram"]
+
+    assert latency_percentile(histogram, 0.5) == 0.001
+    assert latency_percentile(histogram, 0.99) == 0.25
+    assert latency_percentile([0] * len(histogram), 0.5) == 0.0
+
+
+def test_feed_merges_workers_and_ignores_duplicates():
+    """Test that the feed sums deltas across workers and skips replayed ones."""
+    first, second = MetricsAggregator("a"), MetricsAggregator("b")
+    first.record("Beverages", 0.1)
+    second.record("Beverages", 0.3, correct=False)
+    first_delta, second_delta = first.drain(), second.drain()
+
+    feed = MetricsFeed(urls=[])
+    for delta in (first_delta, second_delta, first_delta):
+        feed.apply(delta)
+
+    totals = feed.totals()
+    assert totals["Beverages"] == 2
+    assert totals["total_requests"] == 2
+    assert totals["max_time"] == 0.3
+    assert totals["avg_time"] == pytest.approx(0.2)
+    assert totals["total_predictions"] == 1
+    assert feed.workers() == ["a", "b"]
+
+
+def test_broadcaster_pushes_deltas_over_websocket():
+    """Test that a WebSocket subscriber receives aggregated deltas."""
+    aggregator = MetricsAggregator(worker_id="worker")
+    broadcaster = MetricsBroadcaster(aggregator, interval=0.01)
+    app = FastAPI()
+
+    @app.websocket("/ws/metrics")
+    async def metrics_stream(websocket: WebSocket):
+        await websocket.accept()
+        await broadcaster.serve(websocket)
+
+    aggregator.record("Beverages", 0.01)
+    with TestClient(app).websocket_connect("/ws/metrics") as websocket:
+        delta = websocket.receive_json()
+
+    assert delta["worker_id"] == "worker"
+    assert delta["categories"] == {"Beverages": 1}
+
+
+def test_stream_relays_deltas_of_all_workers(tmp_path):
+    """Test that one WebSocket connection receives the deltas of every worker."""
+    first, second = MetricsAggregator("a"), MetricsAggregator("b")
+    broadcasters = [
+        MetricsBroadcaster(aggregator, 0.01, DeltaLog(tmp_path / "metrics.db"))
+        for aggregator in (first, second)
+    ]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        for broadcaster in broadcasters:
+            broadcaster.start()
+        yield
+        for broadcaster in broadcasters:
+            await broadcaster.stop()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.websocket("/ws/metrics")
+    async def metrics_stream(websocket: WebSocket):
+        await websocket.accept()
+        await broadcasters[0].serve(websocket)
+
+    first.record("Beverages", 0.1)
+    second.record("Beverages", 0.3)
+    feed = MetricsFeed(urls=[])
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/metrics") as websocket:
+            while feed.totals().get("total_requests", 0) < 2:
+                feed.apply(websocket.receive_json())
+
+    assert feed.workers() == ["a", "b"]
+    assert feed.totals()["Beverages"] == 2
+    assert feed.totals()["max_time"] == 0.3
+
+
+def profiled_functions(path) -> set[str]:
+    """Return the names of the functions recorded in a profile file."""
+    return {function for _, _, function in pstats.Stats(str(path)).stats}
+
+
+def test_profiling_middleware_profiles_selected_requests(tmp_path):
+    """Test that header and sampled requests are profiled, in any thread."""
+    profiler = RequestProfiler(ProfileStore(tmp_path), sample_rate=0.0)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/sync")
+    @profile_endpoint()
+    def sync_endpoint():
+        return {"ok": True}
+
+    @app.get("/async")
+    @profile_endpoint()
+    async def async_endpoint():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/sync").status_code == 200
+    assert profiler.store.names() == []
+
+    assert client.get("/sync", headers={"X-Profile": "1"}).json() == {"ok": True}
+    assert client.get("/async", headers={"X-Profile": "1"}).json() == {"ok": True}
+    profiles = sorted(tmp_path.glob("*.prof"))
+    assert [path.name.split("_")[0] for path in profiles] == ["async", "sync"]
+    assert "sync_endpoint" in profiled_functions(profiles[1])
+    assert "async_endpoint" in profiled_functions(profiles[0])
+
+    profiler.sample_rate = 1.0
+    profiler.enabled = False
+    client.get("/sync")
+    assert len(profiler.store.names()) == 2
+    profiler.enabled = True
+    client.get("/sync")
+    assert len(profiler.store.names()) == 3
+
+
+def test_profile_store_keeps_most_recent_profiles(tmp_path):
+    """Test that the store deletes the oldest profiles beyond its limit."""
+    store = ProfileStore(tmp_path, max_files=2)
+    for name in ["first", "second", "third"]:
+        store.save(cProfile.Profile(), name)
+        time.sleep(0.01)
+
+    assert [name.split("_")[0] for name in store.names()] == ["third", "second"]
+
+
+def test_telemetry_profiles_each_stage(tmp_path):
+    """Test that a telemetry record with a profile store profiles every stage."""
+    telemetry = RunTelemetry("train", ProfileStore(tmp_path))
+    with telemetry.stage("load"):
+        sorted(range(1000))
+    with telemetry.stage("clean"):
+        pass
+
+    names = sorted(name.rsplit("_", 3)[0] for name in telemetry.profile_store.names())
+    assert names == ["train_clean", "train_load"]
+    assert set(telemetry.stages) == {"load", "clean"}